@@ -7,19 +7,23 @@ from models.models import db
 from routes.api import api
 from routes.auth import auth
 from seed_db import seed_database
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from services.market import MarketService
-from database import SQLALCHEMY_DATABASE_URI, engine
+from scheduler import configure_scheduler, shutdown_scheduler
+from utils.cache import identity_cache, response_cache
+from utils.broadcast import market_stream
+from utils.metrics import app_metrics
+from utils.query_counter import request_query_counter
+from utils.passwords import password_hasher
+from utils.blocklist import token_blocklist
+from database import SQLALCHEMY_DATABASE_URI, pool_stats
 import atexit
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Use the database URL directly from database.py
+# Use the database URL directly from database.py; the engine and its pool
+# come from the shared registry there (see SharedEngineSQLAlchemy)
 app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine.dialect.create_connect_args(engine.url)[1]
 
 # JWT Configuration
 app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']
@@ -56,6 +60,13 @@ CORS(app,
 # Initialize extensions
 db.init_app(app)
 jwt = JWTManager(app)
+token_blocklist.init_app(app, jwt)
+response_cache.init_app(app)
+identity_cache.init_app(app)
+password_hasher.init_app(app)
+market_stream.init_app(app)
+app_metrics.init_app(app)
+request_query_counter.init_app(app)
 
 # Handle invalid tokens to prevent 500 errors - return 401 instead
 @jwt.invalid_token_loader
@@ -89,30 +100,11 @@ def missing_token_callback(error_string):
 app.register_blueprint(api, url_prefix='/api')
 app.register_blueprint(auth, url_prefix='/api/auth')
 
-# Initialize scheduler with proper settings for production
-scheduler = BackgroundScheduler(daemon=True)
+# Start background jobs; only the elected leader process actually runs them
+scheduler = configure_scheduler(app)
 
-# Function to wrap update_seed_prices with app context
-def update_prices_with_context():
-    with app.app_context():
-        MarketService.update_seed_prices()
-
-# Add market update job - runs every 30 seconds
-scheduler.add_job(
-    func=update_prices_with_context,
-    trigger=IntervalTrigger(seconds=30),  # Increased to reduce database load
-    id='update_market_prices',
-    name='Update seed market prices',
-    replace_existing=True,
-    max_instances=1,
-    coalesce=True  # Combine multiple pending runs into one
-)
-
-# Start the scheduler
-scheduler.start()
-
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
+# Shut down the scheduler and release the leader lease when exiting the app
+atexit.register(lambda: shutdown_scheduler(app))
 
 # Health check endpoint for AWS ELB/ECS
 @app.route('/health', methods=['GET'])
@@ -136,6 +128,23 @@ def api_health_check():
          "database": db_status
     })
 
+# Connection pool telemetry for this worker process
+@app.route('/api/health/pool', methods=['GET'])
+def pool_health():
+    return jsonify({"pid": os.getpid(), "pools": pool_stats()})
+
+# Which process holds the scheduler lease, for dashboards and failover checks
+@app.route('/api/scheduler/status', methods=['GET'])
+def scheduler_status():
+    election = app.scheduler_election
+    status = election.status()
+    try:
+        status['leader'] = election.current_leader()
+    except Exception as e:
+        status['leader'] = None
+        status['error'] = str(e)
+    return jsonify(status)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()  # Create database tables
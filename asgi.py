@@ -0,0 +1,134 @@
+"""
+Async (ASGI) serving mode for the read-only market endpoints.
+
+Runs next to the Flask app on the same database, e.g.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 2
+
+and serves the same JSON for:
+    GET /api/seeds
+    GET /api/seeds/<id>
+    GET /api/seeds/<id>/latest-price
+    GET /api/seeds/<id>/prices
+    GET /api/market/summary
+
+Each process keeps its own asyncpg pool (ASYNC_DB_POOL_SIZE), so one worker
+can have hundreds of requests in flight while Postgres calls are pending.
+Wherever this runs, also set ASGI_WORKERS to its --workers count in the
+gunicorn processes' environment, so database.pool_options() leaves room for
+these pools in the connection budget. Writes, auth and the scheduler stay on
+the Flask app.
+"""
+import os
+from contextlib import asynccontextmanager
+import asyncpg
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from config import Config
+from database import SQLALCHEMY_DATABASE_URI
+from services.async_market import AsyncMarketService
+from services.market import MarketService
+from utils.pagination import parse_page_args
+from utils.serialization import dumps_like_jsonify
+
+
+class FlaskJSONResponse(JSONResponse):
+    """Render exactly like Flask's jsonify: sorted keys, ASCII, compact, trailing newline"""
+
+    def render(self, content):
+        return dumps_like_jsonify(content)
+
+
+def _int_arg(request, name):
+    try:
+        return int(request.query_params[name]) if request.query_params.get(name) else None
+    except ValueError:
+        return None
+
+
+def _page_args(request, kind, key_types):
+    return parse_page_args(request.query_params, kind, key_types,
+                           Config.PAGE_SIZE_DEFAULT, Config.PAGE_SIZE_MAX)
+
+
+async def get_seeds(request):
+    try:
+        page = _page_args(request, *MarketService.SEEDS_CURSOR)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, status_code=400)
+    if page is None:
+        return FlaskJSONResponse(await AsyncMarketService.get_seeds(request.app.state.pool))
+    return FlaskJSONResponse(await AsyncMarketService.get_seeds_page(request.app.state.pool, page))
+
+
+async def get_seed(request):
+    seed = await AsyncMarketService.get_seed(request.app.state.pool, request.path_params['id'])
+    if seed is None:
+        return FlaskJSONResponse({"error": "Seed not found"}, status_code=404)
+    return FlaskJSONResponse(seed)
+
+
+async def get_seed_latest_price(request):
+    pool = request.app.state.pool
+    seed_id = request.path_params['id']
+    if await AsyncMarketService.get_seed(pool, seed_id) is None:
+        return FlaskJSONResponse({"error": "Seed not found"}, status_code=404)
+    latest_price = await AsyncMarketService.get_latest_price(pool, seed_id)
+    if latest_price is None:
+        return FlaskJSONResponse({"error": "No price history available for this seed"}, status_code=404)
+    return FlaskJSONResponse(latest_price)
+
+
+async def get_seed_prices(request):
+    try:
+        page = _page_args(request, *MarketService.PRICE_CURSOR)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, status_code=400)
+    args = (
+        request.query_params.get('timeframe', '1w'),
+        _int_arg(request, 'limit'),
+        request.query_params.get('resolution')
+    )
+    pool = request.app.state.pool
+    seed_id = request.path_params['seed_id']
+    if page is None:
+        return FlaskJSONResponse(await AsyncMarketService.get_price_history(pool, seed_id, *args))
+    return FlaskJSONResponse(await AsyncMarketService.get_price_page(pool, seed_id, page, *args))
+
+
+async def get_market_summary(request):
+    return FlaskJSONResponse(await AsyncMarketService.get_market_summary(request.app.state.pool))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.pool = await asyncpg.create_pool(
+        os.environ.get('ASYNC_DATABASE_URL', SQLALCHEMY_DATABASE_URI),
+        min_size=Config.ASYNC_DB_POOL_MIN_SIZE,
+        max_size=Config.ASYNC_DB_POOL_SIZE,
+        # Statements are prepared once per connection and reused by asyncpg
+        statement_cache_size=100
+    )
+    try:
+        yield
+    finally:
+        await app.state.pool.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/seeds', get_seeds),
+        Route('/api/seeds/{id:int}', get_seed),
+        Route('/api/seeds/{id:int}/latest-price', get_seed_latest_price),
+        Route('/api/seeds/{seed_id:int}/prices', get_seed_prices),
+        Route('/api/market/summary', get_market_summary),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=[os.environ.get('ALLOWED_ORIGINS', '*')],
+                   allow_credentials=True, allow_methods=['GET'])
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark: ORM vs direct tuple encoding for raw price history.
+
+    python -m benchmarks.bench_price_history --sizes 10000 100000 1000000
+
+Loads N rows for one seed into a throwaway SQLite database (or --database-url),
+then times both paths end to end (query + serialize) and reports wall time
+and peak Python memory as JSON lines. Rows span the 1m timeframe, which is
+served from raw seed_prices; longer timeframes read candles instead (see
+MarketService.price_tier), which this benchmark does not load.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from models.models import db, Seed, SeedPrice
+from services.market import MarketService
+from utils.bulk_load import load_price_rows
+
+# A raw-tier timeframe, so both paths read the same seed_prices rows
+TIMEFRAME = '1m'
+
+
+def _orm_path(seed_id, cutoff):
+    prices = (SeedPrice.query
+              .filter(SeedPrice.seed_id == seed_id, SeedPrice.recorded_at >= cutoff)
+              .order_by(SeedPrice.recorded_at)
+              .all())
+    return jsonify([price.to_dict() for price in prices]).data
+
+
+def _direct_path(seed_id, cutoff):
+    return MarketService.get_price_history_json(seed_id, TIMEFRAME)
+
+
+def _measure(func, *args, trace_memory=True):
+    db.session.expunge_all()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    body = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    db.session.expunge_all()
+    return elapsed, peak, len(body)
+
+
+def run(sizes, database_url=None, repeat=3, trace_memory=True):
+    days = MarketService.TIMEFRAME_DAYS[TIMEFRAME]
+    if MarketService.price_tier(days) is not None:
+        raise SystemExit(f"RAW_RETENTION_DAYS is below {days}; {TIMEFRAME} would be served from candles")
+    app = Flask(__name__)
+    tmpdir = tempfile.mkdtemp()
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        for size in sizes:
+            SeedPrice.query.delete()
+            Seed.query.delete()
+            seed = Seed(name='Bench', species='Benchmarkus')
+            db.session.add(seed)
+            db.session.flush()
+
+            # Spread rows over the timeframe, less a minute, so its cutoff covers them all
+            now = datetime.now()
+            step = (timedelta(days=days) - timedelta(minutes=1)) / size
+            rows = ((seed.id, round(1 + (i % 500) / 100, 2), 500 + i % 10000, now - step * (size - i))
+                    for i in range(size))
+            load_price_rows(rows)
+            db.session.commit()
+            cutoff = now - timedelta(days=days)
+
+            for name, func in (('orm', _orm_path), ('direct', _direct_path)):
+                timings = [_measure(func, seed.id, cutoff, trace_memory=trace_memory) for _ in range(repeat)]
+                best = min(timings, key=lambda t: t[0])
+                print(json.dumps({
+                    'benchmark': 'price_history',
+                    'path': name,
+                    'rows': size,
+                    'seconds': round(best[0], 4),
+                    'rows_per_second': round(size / best[0]),
+                    'peak_bytes': best[1],
+                    'response_bytes': best[2]
+                }), flush=True)
+        db.drop_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--database-url', help='Benchmark against this database instead of SQLite')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc (it slows both paths)')
+    args = parser.parse_args()
+    run(args.sizes, args.database_url, args.repeat, not args.no_memory)
+
+
+if __name__ == '__main__':
+    main()
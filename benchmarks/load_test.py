@@ -0,0 +1,216 @@
+"""
+HTTP load test: throughput and latency percentiles per /api endpoint.
+
+    python -m benchmarks.load_test --seeds 10 --days 365 --concurrency 8 --requests 500
+
+Seeds a throwaway SQLite database (or --database-url, e.g. a disposable
+Postgres) through seed_db.seed_database at the requested scale, serves the
+API from a threaded WSGI server in this process and drives each endpoint
+with --concurrency keep-alive clients. Pass --url to load an already running
+server (e.g. gunicorn) instead; nothing is seeded in that case.
+
+Each endpoint yields one JSON line on stdout (or --output) with requests,
+errors, throughput and p50/p95/p99 latency, preceded by a line describing
+the run, so results from two branches can be diffed or loaded directly.
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Each entry is (name, path template); {seed} is filled with a random seed id
+ENDPOINTS = [
+    ('seeds', '/api/seeds'),
+    ('seed', '/api/seeds/{seed}'),
+    ('latest_price', '/api/seeds/{seed}/latest-price'),
+    ('prices_1w', '/api/seeds/{seed}/prices?timeframe=1w'),
+    ('prices_1y', '/api/seeds/{seed}/prices?timeframe=1y'),
+    ('candles_1d', '/api/seeds/{seed}/candles?interval=1d'),
+    ('market_summary', '/api/market/summary'),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_app(database_url, seeds, days, cache_timeout, rng_seed):
+    """Flask app wired like app.py (minus the scheduler), seeded at the given scale"""
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from models.models import db
+    from routes.api import api
+    from routes.auth import auth
+    from seed_db import seed_database
+    from utils.broadcast import market_stream
+    from utils.cache import response_cache
+
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='load-test',
+        JWT_SECRET_KEY='load-test',
+        SQLALCHEMY_DATABASE_URI=database_url,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        CACHE_DEFAULT_TIMEOUT=cache_timeout,
+    )
+    db.init_app(app)
+    JWTManager(app)
+    response_cache.init_app(app)
+    market_stream.init_app(app)
+    app.register_blueprint(api, url_prefix='/api')
+    app.register_blueprint(auth, url_prefix='/api/auth')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Same rng seed, same data: runs on different branches see identical rows
+        random.seed(rng_seed)
+        # Keep stdout pure JSON lines
+        with contextlib.redirect_stdout(sys.stderr):
+            seed_database(days=days, count=seeds)
+    return app
+
+
+def serve(app):
+    """Start a threaded WSGI server on a free port; returns (server, base url)"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def _fetch_seed_ids(base_url):
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    conn.request('GET', '/api/seeds?paginate=false')
+    seeds = json.loads(conn.getresponse().read())
+    conn.close()
+    return [seed['id'] for seed in seeds]
+
+
+def run_endpoint(base_url, template, seed_ids, requests, concurrency, rng):
+    """Issue `requests` GETs over `concurrency` keep-alive connections"""
+    parts = urlsplit(base_url)
+    paths = [template.format(seed=rng.choice(seed_ids)) for _ in range(requests)]
+    local = threading.local()
+
+    def one(path):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, paths))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'seconds': round(elapsed, 4),
+        'throughput_rps': round(requests / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+    }
+
+
+def run(seeds=10, days=365, concurrency=8, requests=200, warmup=20, endpoints=None,
+        database_url=None, url=None, cache_timeout=30, rng_seed=42, output=sys.stdout):
+    server = None
+    if url is None:
+        database_url = database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+        server, url = serve(build_app(database_url, seeds, days, cache_timeout, rng_seed))
+
+    try:
+        seed_ids = _fetch_seed_ids(url)
+        rng = random.Random(rng_seed)
+        selected = [(name, path) for name, path in ENDPOINTS if not endpoints or name in endpoints]
+
+        emit = lambda record: print(json.dumps(record), file=output, flush=True)
+        emit({
+            'benchmark': 'http_load',
+            'revision': _git_revision(),
+            'target': 'external' if server is None else (database_url or '').split(':', 1)[0],
+            'seeds': len(seed_ids),
+            'days': days if server is not None else None,
+            'concurrency': concurrency,
+            'requests_per_endpoint': requests,
+            'cache_timeout': cache_timeout if server is not None else None,
+        })
+        for name, template in selected:
+            if warmup:
+                run_endpoint(url, template, seed_ids, warmup, concurrency, rng)
+            result = run_endpoint(url, template, seed_ids, requests, concurrency, rng)
+            emit({'benchmark': 'http_load', 'endpoint': name, 'path': template,
+                  'concurrency': concurrency, **result})
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, default=10, help='Number of seeds to create')
+    parser.add_argument('--days', type=int, default=365, help='Days of price history per seed')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per endpoint')
+    parser.add_argument('--endpoint', dest='endpoints', action='append',
+                        choices=[name for name, _ in ENDPOINTS], help='Only run this endpoint (repeatable)')
+    parser.add_argument('--database-url', help='Seed and serve from this database instead of SQLite')
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--cache-timeout', type=int, default=30,
+                        help='Response cache TTL for the in-process server; 0 measures uncached reads')
+    parser.add_argument('--rng-seed', type=int, default=42)
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout)
+    args = parser.parse_args()
+    run(args.seeds, args.days, args.concurrency, args.requests, args.warmup, args.endpoints,
+        args.database_url, args.url, args.cache_timeout, args.rng_seed, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,19 @@ class Config:
     DB_NAME = os.environ.get('DB_NAME') or 'seedmart'
     SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
+    # Connection budget shared by every process (see database.pool_options)
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+    DB_RESERVED_CONNECTIONS = int(os.environ.get('DB_RESERVED_CONNECTIONS', 10))
+    DB_INSTANCES = int(os.environ.get('DB_INSTANCES', 1))
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 4))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    # asyncpg pool per process for the ASGI read path (asgi.py), and how many
+    # uvicorn worker processes each instance runs; set ASGI_WORKERS only where
+    # asgi.py is deployed (the shipped image runs gunicorn alone)
+    ASYNC_DB_POOL_MIN_SIZE = int(os.environ.get('ASYNC_DB_POOL_MIN_SIZE', 2))
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 20))
+    ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 0))
+
     # Disable SQL track modifications for performance
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -28,4 +41,62 @@ class Config:
     
     # Redis cache config (if available)
     REDIS_URL = os.environ.get('REDIS_URL')
-    CACHE_TYPE = 'redis' if REDIS_URL else 'simple'
\ No newline at end of file
+    CACHE_TYPE = 'redis' if REDIS_URL else 'simple'
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 30))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+    # How long a worker reuses the shared data version before re-reading it
+    CACHE_VERSION_TTL = float(os.environ.get('CACHE_VERSION_TTL', 1.0))
+    
+    # Per-client buffer for /api/market/stream; slower clients are dropped
+    STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE', 100))
+
+    # Prometheus /metrics; set PROMETHEUS_MULTIPROC_DIR under gunicorn (see gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Development aid (utils/query_counter.py): X-Query-Count header and a warning
+    # when a view runs more statements than its @query_budget, or QUERY_BUDGET
+    QUERY_COUNTER_ENABLED = os.environ.get('QUERY_COUNTER_ENABLED',
+                                           str(os.environ.get('FLASK_ENV') == 'development')).lower() == 'true'
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 20))
+
+    # Password hashing runs on a bounded pool (utils/passwords.py); the method
+    # string carries the cost, e.g. pbkdf2:sha256:600000 or scrypt:32768:8:1.
+    # Hashes beyond the queue (running + waiting, well below gunicorn's 16
+    # threads) are refused with a 503 rather than waited for
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 4))
+    # Users cached by JWT subject for /me and /refresh
+    IDENTITY_CACHE_TIMEOUT = int(os.environ.get('IDENTITY_CACHE_TIMEOUT', 60))
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.environ.get('IDENTITY_CACHE_MAX_ENTRIES', 1024))
+    # How stale a worker's copy of the JWT blocklist may get without Redis
+    TOKEN_BLOCKLIST_SYNC_SECONDS = int(os.environ.get('TOKEN_BLOCKLIST_SYNC_SECONDS', 5))
+
+    # Tiered retention (services/retention.py): raw ticks, then hourly candles,
+    # then daily candles; nothing older than DATA_RETENTION_DAYS is kept
+    RAW_RETENTION_DAYS = int(os.environ.get('RAW_RETENTION_DAYS', 30))
+    HOURLY_RETENTION_DAYS = int(os.environ.get('HOURLY_RETENTION_DAYS', 90))
+    DATA_RETENTION_DAYS = int(os.environ.get('DATA_RETENTION_DAYS', 365))
+
+    # 'scheduler' ticks the market from the web workers' scheduler; 'process'
+    # leaves it to a dedicated `market_cli.py run-engine` process
+    MARKET_ENGINE = os.environ.get('MARKET_ENGINE', 'scheduler')
+    # Seconds between market ticks, down to 0.1 with run-engine (the scheduler
+    # path is held to 1s). run-engine queues ticks in a bounded buffer that is
+    # written every TICK_FLUSH_MS or TICK_FLUSH_ROWS rows, whichever comes
+    # first; producers wait up to TICK_BUFFER_BLOCK_SECONDS when it is full
+    MARKET_TICK_SECONDS = max(0.1, float(os.environ.get('MARKET_TICK_SECONDS', 30)))
+    TICK_FLUSH_MS = int(os.environ.get('TICK_FLUSH_MS', 500))
+    TICK_FLUSH_ROWS = int(os.environ.get('TICK_FLUSH_ROWS', 5000))
+    TICK_BUFFER_ROWS = int(os.environ.get('TICK_BUFFER_ROWS', 50000))
+    TICK_BUFFER_BLOCK_SECONDS = float(os.environ.get('TICK_BUFFER_BLOCK_SECONDS', 5))
+    # Port run-engine serves Prometheus /metrics on (0 disables)
+    ENGINE_METRICS_PORT = int(os.environ.get('ENGINE_METRICS_PORT', 9100))
+
+    # Most items accepted by POST/PATCH /api/seeds/bulk in one request
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 5000))
+
+    # Keyset pages for /api/seeds and /api/seeds/<id>/prices (?page_size=,
+    # ?cursor=); ?paginate=false returns the old unbounded arrays
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 100))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 1000))
\ No newline at end of file
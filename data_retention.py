@@ -1,7 +1,9 @@
-from datetime import datetime, timedelta
-from sqlalchemy import text
-from models.models import SeedPrice
-from database import SessionLocal
+from flask import Flask
+from config import Config
+from models.models import db
+from database import SQLALCHEMY_DATABASE_URI, Session as SessionLocal
+from services.retention import RetentionService
+from partitions import is_partitioned, drop_expired_partitions, ensure_future_partitions
 import os
 import logging
 
@@ -14,51 +16,55 @@ logger = logging.getLogger(__name__)
 
 def cleanup_old_seed_prices():
     """
-    Deletes SeedPrice records older than one year by using efficient SQL
-    for better performance with large datasets.
+    Tiered retention: raw ticks older than RAW_RETENTION_DAYS are compacted
+    into hourly and daily candles before they are removed, then candles age
+    out of their own tiers (HOURLY_RETENTION_DAYS, DATA_RETENTION_DAYS).
+    When seed_prices is partitioned, whole expired monthly partitions are
+    dropped after compaction instead of deleting rows. Needs an app context.
     """
-    # Use retention days from environment or default to 365
-    retention_days = int(os.environ.get('DATA_RETENTION_DAYS', 365))
-    cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-    
+    horizons = RetentionService.horizons()
+    try:
+        partitioned = is_partitioned(db.session)
+        processed = RetentionService.compact(horizons['raw'], delete_raw=not partitioned)
+        logger.info(f"Compacted {processed} raw seed price records older than {horizons['raw']}")
+
+        if partitioned:
+            # Dropping a partition is a catalog change - no row deletes, no bloat
+            detach_only = os.environ.get('DATA_RETENTION_DETACH_ONLY') == 'true'
+            dropped = drop_expired_partitions(db.session, horizons['raw'], detach_only=detach_only)
+            logger.info(f"Removed {len(dropped)} expired seed price partitions")
+
+        removed = RetentionService.prune_candles(horizons)
+        logger.info(f"Removed {removed} candles past their retention tier")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error during data cleanup: {str(e)}")
+
+def maintain_seed_price_partitions():
+    """Create upcoming monthly seed_prices partitions ahead of time"""
     db = SessionLocal()
     try:
-        # Use raw SQL for more efficient bulk deletion, especially important in production
-        if os.environ.get('FLASK_ENV') == 'production':
-            # More efficient batch deletion for production
-            batch_size = 10000
-            total_deleted = 0
-            
-            while True:
-                # Get IDs of records to delete in batches
-                stmt = text(
-                    "DELETE FROM seed_prices WHERE id IN "
-                    "(SELECT id FROM seed_prices WHERE recorded_at < :cutoff_date LIMIT :batch_size) "
-                    "RETURNING id"
-                )
-                result = db.execute(stmt, {"cutoff_date": cutoff_date, "batch_size": batch_size})
-                deleted_count = result.rowcount
-                db.commit()
-                
-                total_deleted += deleted_count
-                logger.info(f"Deleted batch of {deleted_count} records")
-                
-                if deleted_count < batch_size:
-                    break
-                    
-            logger.info(f"Total deleted: {total_deleted} old seed price records")
-        else:
-            # Simpler approach for development
-            deleted = db.query(SeedPrice).filter(SeedPrice.recorded_at < cutoff_date).delete(synchronize_session=False)
-            db.commit()
-            logger.info(f"Deleted {deleted} old seed price records")
-            
+        ensure_future_partitions(db)
     except Exception as e:
         db.rollback()
-        logger.error(f"Error during data cleanup: {str(e)}")
+        logger.error(f"Error creating seed price partitions: {str(e)}")
     finally:
         db.close()
 
+def create_app():
+    """
+    Bare app for running retention by hand: config and database only. The
+    full app in app.py starts a scheduler that would join the leader election
+    and could tick the market from this process.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
+    db.init_app(app)
+    return app
+
 if __name__ == "__main__":
+    app = create_app()
     logger.info("Running manual data retention cleanup")
-    cleanup_old_seed_prices()
\ No newline at end of file
+    with app.app_context():
+        cleanup_old_seed_prices()
\ No newline at end of file
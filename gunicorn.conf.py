@@ -0,0 +1,21 @@
+# Loaded automatically by gunicorn from the working directory.
+import os
+import shutil
+
+# Workers write Prometheus samples to files in this directory so /metrics on
+# any worker reports the sum over all of them (see utils/metrics.py).
+prometheus_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    # Samples from a previous master would otherwise be added to this one's
+    if prometheus_dir:
+        shutil.rmtree(prometheus_dir, ignore_errors=True)
+        os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (pool usage, job lag)
+    if prometheus_dir:
+        from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+        GunicornInternalPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
@@ -3,17 +3,45 @@ from flask import current_app
 from app import app
 from models.models import db, Seed, SeedPrice
 from services.market import MarketService
+from services.candles import CandleService
+from services.export import ExportService
+from services.engine import MarketEngine
+from services.tick_buffer import TickBuffer
+from scheduler import LeaderElection, MARKET_ENGINE_LOCK_KEY, LEADER_RENEW_SECONDS, hand_market_to_engine
 from datetime import datetime, timedelta
+from sqlalchemy import func, select
+import partitions
+import random
 import sys
+from utils.bulk_load import generate_rows, load_price_rows
+from utils.metrics import app_metrics
 
 @click.group()
 def cli():
     """SeedMart Market Management CLI"""
     pass
 
+def _market_history_rows(task):
+    """Daily (seed_id, price, volume, recorded_at) rows for one seed; runs in worker processes"""
+    seed_id, days, rng_seed = task
+    random.seed(rng_seed)
+    # Generate base price between 1-6 dollars
+    current_price = MarketService.calculate_base_price()
+    end_date = datetime.now()
+    current_date = end_date - timedelta(days=days)
+    rows = []
+    while current_date <= end_date:
+        # Calculate next price using market service
+        current_price = MarketService.calculate_price_change(current_price)
+        rows.append((seed_id, current_price, random.randint(500, 10500), current_date))
+        current_date += timedelta(days=1)
+    return rows
+
 @cli.command()
 @click.option('--days', default=365, help='Number of days of historical data to generate')
-def init_market(days):
+@click.option('--workers', default=1, help='Processes used to generate history in parallel (one seed per task)')
+@click.option('--chunk-size', default=10000, help='Rows per COPY/insert batch')
+def init_market(days, workers, chunk_size):
     """Initialize market with historical price data"""
     with app.app_context():
         try:
@@ -29,36 +57,17 @@ def init_market(days):
                 db.session.commit()
             
             click.echo(f'Generating {days} days of historical price data...')
-            seeds = Seed.query.all()
-            
-            with click.progressbar(seeds) as progress_seeds:
-                for seed in progress_seeds:
-                    # Generate base price between 1-6 dollars
-                    base_price = MarketService.calculate_base_price()
-                    end_date = datetime.now()
-                    start_date = end_date - timedelta(days=days)
-                    
-                    # Generate daily prices
-                    current_date = start_date
-                    current_price = base_price
-                    
-                    while current_date <= end_date:
-                        # Calculate next price using market service
-                        current_price = MarketService.calculate_price_change(current_price)
-                        
-                        # Create price record
-                        price_record = SeedPrice(
-                            seed_id=seed.id,
-                            price=current_price,
-                            volume=MarketService.generate_volume(),
-                            recorded_at=current_date
-                        )
-                        db.session.add(price_record)
-                        
-                        current_date += timedelta(days=1)
+            seed_ids = [seed_id for (seed_id,) in db.session.query(Seed.id)]
+            tasks = [(seed_id, days, random.getrandbits(64)) for seed_id in seed_ids]
+            rows = generate_rows(_market_history_rows, tasks, workers)
             
+            with click.progressbar(length=len(seed_ids) * (days + 1), label='Loading prices') as progress:
+                written = load_price_rows(rows, chunk_size, progress=progress.update)
             db.session.commit()
-            click.echo('Done! Market initialized successfully.')
+            
+            click.echo('Rebuilding candles...')
+            CandleService.backfill()
+            click.echo(f'Done! Market initialized successfully with {written:,} prices.')
             
         except Exception as e:
             click.echo(f'Error: {str(e)}', err=True)
@@ -76,6 +85,92 @@ def update_prices():
             click.echo(f'Error: {str(e)}', err=True)
             sys.exit(1)
 
+@cli.command()
+@click.option('--interval', type=click.FloatRange(min=0.1), default=None,
+              help='Seconds between ticks, down to 0.1 (default: MARKET_TICK_SECONDS)')
+@click.option('--refresh', default=60, help='Seconds between checks for added or removed seeds')
+@click.option('--metrics-port', type=int, default=None,
+              help='Port for Prometheus /metrics, 0 to disable (default: ENGINE_METRICS_PORT)')
+def run_engine(interval, refresh, metrics_port):
+    """Run the market in a long-lived process that keeps prices in memory.
+    Set MARKET_ENGINE=process on the web workers so they stop ticking."""
+    interval = interval or app.config['MARKET_TICK_SECONDS']
+    # This process ticks through MarketEngine only, never the app's scheduler job
+    hand_market_to_engine(app)
+    # No Flask requests reach this process, so it serves its own tick and flush metrics
+    app_metrics.serve(app.config['ENGINE_METRICS_PORT'] if metrics_port is None else metrics_port)
+    with app.app_context():
+        # Ticks are written behind, in batches, by the buffer's flusher thread
+        buffer = TickBuffer.from_config(app)
+        engine = MarketEngine(refresh_seconds=refresh, buffer=buffer)
+        # Standby engines wait on the lease and take over if the leader dies
+        election = LeaderElection(db.engine, lock_key=MARKET_ENGINE_LOCK_KEY)
+        click.echo(f'Market engine {election.node_id} ticking every {interval}s (Ctrl+C to stop)')
+        buffer.start()
+        try:
+            engine.run(interval, election, renew_seconds=LEADER_RENEW_SECONDS)
+        except KeyboardInterrupt:
+            click.echo('Stopping market engine.')
+        finally:
+            buffer.stop()
+            election.release()
+
+@cli.command()
+@click.option('--interval', 'intervals', multiple=True, type=click.Choice(list(CandleService.PERIODS)),
+              help='Candle interval to rebuild (repeatable, default: all)')
+@click.option('--days', default=None, type=int, help='Only rebuild the last N days')
+def backfill_candles(intervals, days):
+    """Rebuild OHLCV candle rollups from raw price history"""
+    with app.app_context():
+        try:
+            since = datetime.now() - timedelta(days=days) if days else None
+            click.echo('Rebuilding candles...')
+            written = CandleService.backfill(list(intervals) or None, since)
+            click.echo(f'Done! Wrote {written} candles.')
+        except Exception as e:
+            click.echo(f'Error: {str(e)}', err=True)
+            db.session.rollback()
+            sys.exit(1)
+
+@cli.command()
+@click.option('--months-ahead', default=partitions.MONTHS_AHEAD, help='Future monthly partitions to create')
+def partition_prices(months_ahead):
+    """Convert seed_prices to a monthly range-partitioned table (PostgreSQL)"""
+    with app.app_context():
+        try:
+            if db.engine.dialect.name != 'postgresql':
+                click.echo('Error: Partitioning requires PostgreSQL.', err=True)
+                sys.exit(1)
+            if not click.confirm('This rewrites seed_prices in one transaction. Continue?'):
+                click.echo('Aborted.')
+                return
+            if partitions.convert_to_partitioned(db.session, months_ahead):
+                click.echo('Done! seed_prices is now partitioned by month.')
+            else:
+                created = partitions.ensure_future_partitions(db.session, months_ahead)
+                click.echo(f'seed_prices is already partitioned; created {created} new partitions.')
+        except Exception as e:
+            click.echo(f'Error: {str(e)}', err=True)
+            db.session.rollback()
+            sys.exit(1)
+
+@cli.command()
+@click.option('--seed', 'seed_ids', multiple=True, type=int, help='Seed id to export (repeatable, default: all)')
+@click.option('--start', type=click.DateTime(), help='Only prices recorded at or after this time')
+@click.option('--end', type=click.DateTime(), help='Only prices recorded before this time')
+@click.option('--format', 'fmt', type=click.Choice(list(ExportService.FORMATS)), default='ndjson')
+@click.option('--output', type=click.File('w'), default='-', help='Output file (default: stdout)')
+def export_prices(seed_ids, start, end, fmt, output):
+    """Stream price history as NDJSON or CSV with constant memory"""
+    with app.app_context():
+        try:
+            _, chunks = ExportService.stream_prices(fmt, list(seed_ids) or None, start, end)
+            for chunk in chunks:
+                output.write(chunk)
+        except Exception as e:
+            click.echo(f'Error: {str(e)}', err=True)
+            sys.exit(1)
+
 @cli.command()
 @click.argument('seed_id', type=int)
 def show_seed_stats(seed_id):
@@ -93,18 +188,19 @@ def show_seed_stats(seed_id):
                           .order_by(SeedPrice.recorded_at.desc())
                           .first())
             
-            # Get price statistics
-            prices = [p.price for p in seed.prices]
-            avg_price = sum(prices) / len(prices) if prices else 0
-            min_price = min(prices) if prices else 0
-            max_price = max(prices) if prices else 0
+            # Aggregate in the database instead of loading every price row
+            avg_price, min_price, max_price, total_volume = db.session.execute(
+                select(func.avg(SeedPrice.price), func.min(SeedPrice.price),
+                       func.max(SeedPrice.price), func.sum(SeedPrice.volume))
+                .where(SeedPrice.seed_id == seed_id)
+            ).one()
             
             click.echo(f'\nMarket Statistics for {seed.name} ({seed.species})')
             click.echo('-' * 50)
             click.echo(f'Current Price: ${latest_price.price:.2f}')
-            click.echo(f'Average Price: ${avg_price:.2f}')
-            click.echo(f'Price Range: ${min_price:.2f} - ${max_price:.2f}')
-            click.echo(f'Total Volume: {sum(p.volume for p in seed.prices):,}')
+            click.echo(f'Average Price: ${avg_price or 0:.2f}')
+            click.echo(f'Price Range: ${min_price or 0:.2f} - ${max_price or 0:.2f}')
+            click.echo(f'Total Volume: {total_volume or 0:,}')
             
         except Exception as e:
             click.echo(f'Error: {str(e)}', err=True)
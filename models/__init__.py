@@ -1 +1 @@
-from models.models import db, Seed, User
\ No newline at end of file
+from models.models import db, Seed, User, RevokedToken
\ No newline at end of file
@@ -1,8 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
+from database import get_engine
 from sqlalchemy.sql import func
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import password_hasher
 
-db = SQLAlchemy()
+class SharedEngineSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy that takes its engines from the process-wide registry
+    in database.py instead of building a second pool"""
+
+    def _make_engine(self, bind_key, options, app):
+        options = dict(options)
+        return get_engine(options.pop('url'), **options)
+
+db = SharedEngineSQLAlchemy()
 
 # User model for authentication
 class User(db.Model):
@@ -19,10 +28,10 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
         
     def to_dict(self):
         return {
@@ -35,6 +44,39 @@ class User(db.Model):
             'last_login': self.last_login.isoformat() if self.last_login else None
         }
 
+class RevokedToken(db.Model):
+    """JWT revoked before it expires; rows are purged once expires_at passes"""
+    __tablename__ = "revoked_tokens"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10))
+    subject = db.Column(db.String(64))
+    # Naive UTC, like the exp claim it comes from
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class RetentionCheckpoint(db.Model):
+    """Progress of a retention compaction run, so a crashed run resumes"""
+    __tablename__ = "retention_checkpoints"
+    
+    name = db.Column(db.String(64), primary_key=True)
+    # Run in progress: everything recorded before cutoff, walked day by day
+    cutoff = db.Column(db.DateTime)
+    # Last day of that run whose candles are rebuilt
+    last_day = db.Column(db.DateTime)
+    # Cutoff of the last run that finished; older rows need no second look
+    completed_cutoff = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
+class CacheVersion(db.Model):
+    """Data version shared by every process on this database (utils/cache.py)"""
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+
 class Product(db.Model):
     __tablename__ = 'products'
 
@@ -67,6 +109,7 @@ class Seed(db.Model):
     
     # Add relationship to SeedPrice
     prices = db.relationship("SeedPrice", back_populates="seed", cascade="all, delete-orphan")
+    candles = db.relationship("SeedCandle", cascade="all, delete-orphan", passive_deletes=True)
     
     def to_dict(self):
         return {
@@ -81,6 +124,12 @@ class Seed(db.Model):
 
 class SeedPrice(db.Model):
     __tablename__ = "seed_prices"
+    __table_args__ = (
+        # Every hot query filters on seed_id and orders by recorded_at
+        db.Index('ix_seed_prices_seed_id_recorded_at', 'seed_id', 'recorded_at'),
+        # Compact range index for time-window scans and retention
+        db.Index('ix_seed_prices_recorded_at_brin', 'recorded_at', postgresql_using='brin'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     seed_id = db.Column(db.Integer, db.ForeignKey('seeds.id'), nullable=False)
@@ -98,4 +147,33 @@ class SeedPrice(db.Model):
             'price': self.price,
             'volume': self.volume,
             'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None
-        }
\ No newline at end of file
+        }
+
+class SeedCandle(db.Model):
+    """OHLCV rollup of seed_prices for one seed, period ('1m', '1h', '1d') and bucket"""
+    __tablename__ = "seed_candles"
+    __table_args__ = (
+        db.UniqueConstraint('seed_id', 'period', 'bucket_start', name='uq_seed_candles_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    seed_id = db.Column(db.Integer, db.ForeignKey('seeds.id', ondelete='CASCADE'), nullable=False)
+    period = db.Column(db.String(4), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.Integer, default=0)
+    
+    def to_dict(self):
+        return {
+            'seed_id': self.seed_id,
+            'interval': self.period,
+            'time': self.bucket_start.isoformat() if self.bucket_start else None,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
@@ -0,0 +1,160 @@
+from datetime import datetime
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'seed_prices'
+PARTITION_PREFIX = 'seed_prices_p'
+# Keep this many future months of partitions ready so inserts never miss a range
+MONTHS_AHEAD = 3
+
+
+def month_start(value):
+    """Truncate a datetime to the first instant of its month"""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    """Shift a month-start datetime by a number of months"""
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start):
+    return f"{PARTITION_PREFIX}{start:%Y_%m}"
+
+
+def partition_start(name):
+    """Inverse of partition_name; None for tables that don't follow the scheme"""
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], '%Y_%m')
+    except ValueError:
+        return None
+
+
+def is_partitioned(session):
+    """True when seed_prices is a native Postgres range-partitioned table"""
+    if session.get_bind().dialect.name != 'postgresql':
+        return False
+    return session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+    ), {"table": PARENT_TABLE}).first() is not None
+
+
+def list_partitions(session):
+    """Return {partition_name: month_start} for every attached monthly partition"""
+    rows = session.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": PARENT_TABLE})
+    partitions = {}
+    for (name,) in rows:
+        start = partition_start(name)
+        if start:
+            partitions[name] = start
+    return partitions
+
+
+def create_partition(session, start):
+    """Create the monthly partition starting at `start` if it is missing"""
+    end = add_months(start, 1)
+    session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+
+
+def ensure_future_partitions(session, months_ahead=MONTHS_AHEAD, now=None):
+    """Create partitions for the current month and the next `months_ahead` months"""
+    if not is_partitioned(session):
+        return 0
+    current = month_start(now or datetime.now())
+    existing = list_partitions(session)
+    created = 0
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        if partition_name(start) not in existing:
+            create_partition(session, start)
+            created += 1
+    session.commit()
+    if created:
+        logger.info(f"Created {created} seed_prices partitions ahead of time")
+    return created
+
+
+def drop_expired_partitions(session, cutoff, detach_only=False):
+    """
+    Drop every monthly partition whose whole range ends at or before `cutoff`.
+    Detaching is a catalog-only change, so no rows are scanned or vacuumed.
+    With detach_only the tables are kept for archiving instead of dropped.
+    """
+    dropped = []
+    for name, start in sorted(list_partitions(session).items(), key=lambda item: item[1]):
+        if add_months(start, 1) > cutoff:
+            continue
+        session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if not detach_only:
+            session.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    session.commit()
+    for name in dropped:
+        logger.info(f"{'Detached' if detach_only else 'Dropped'} partition {name}")
+    return dropped
+
+
+def convert_to_partitioned(session, months_ahead=MONTHS_AHEAD):
+    """
+    One-off migration of the heap seed_prices table to a range-partitioned
+    table by month on recorded_at. Runs in a single transaction: the old table
+    is renamed, the partitioned parent and its partitions are created, rows are
+    copied across, and the old table is dropped.
+    """
+    if is_partitioned(session):
+        logger.info("seed_prices is already partitioned")
+        return False
+
+    bounds = session.execute(text(
+        "SELECT min(recorded_at), max(recorded_at) FROM seed_prices"
+    )).first()
+
+    for statement in (
+        "ALTER TABLE seed_prices RENAME TO seed_prices_legacy",
+        "ALTER TABLE seed_prices_legacy RENAME CONSTRAINT seed_prices_pkey TO seed_prices_legacy_pkey",
+        "DROP INDEX IF EXISTS ix_seed_prices_seed_id_recorded_at",
+        "DROP INDEX IF EXISTS ix_seed_prices_recorded_at_brin",
+        # The partition key must be part of the primary key
+        "CREATE TABLE seed_prices ("
+        " id integer NOT NULL DEFAULT nextval('seed_prices_id_seq'),"
+        " seed_id integer NOT NULL REFERENCES seeds(id),"
+        " price double precision NOT NULL,"
+        " volume integer,"
+        " recorded_at timestamp without time zone NOT NULL DEFAULT now(),"
+        " PRIMARY KEY (id, recorded_at)"
+        ") PARTITION BY RANGE (recorded_at)",
+        "ALTER SEQUENCE seed_prices_id_seq OWNED BY seed_prices.id",
+        "CREATE INDEX ix_seed_prices_seed_id_recorded_at ON seed_prices (seed_id, recorded_at)",
+        "CREATE INDEX ix_seed_prices_recorded_at_brin ON seed_prices USING brin (recorded_at)",
+    ):
+        session.execute(text(statement))
+
+    now = datetime.now()
+    start = month_start(bounds[0] or now)
+    last = add_months(month_start(max(bounds[1] or now, now)), months_ahead)
+    while start <= last:
+        create_partition(session, start)
+        start = add_months(start, 1)
+
+    session.execute(text(
+        "INSERT INTO seed_prices (id, seed_id, price, volume, recorded_at) "
+        "SELECT id, seed_id, price, volume, coalesce(recorded_at, now()) FROM seed_prices_legacy"
+    ))
+    session.execute(text("DROP TABLE seed_prices_legacy"))
+    session.commit()
+    logger.info("Converted seed_prices to a monthly range-partitioned table")
+    return True
@@ -1,28 +1,68 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from models.models import db, Seed, SeedPrice
 from services.market import MarketService
+from services.candles import CandleService
+from services.catalog import CatalogService
+from services.export import ExportService
 from datetime import datetime, timedelta
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from flask_jwt_extended import jwt_required
+from utils.cache import response_cache
+from utils.conditional import conditional
+from utils.broadcast import market_stream
+from utils.query_counter import query_budget
+from utils.pagination import assemble_page, keyset_query, page_args, page_body
 
 api = Blueprint('api', __name__)
 
+def _market_state(**kwargs):
+    """
+    Validator for conditional GETs: the shared data version and when it last
+    changed. Every tick and seed write bumps it (in the database or Redis, so
+    it is identical on every worker), and the cached view reads the same
+    state, so validating costs nothing extra.
+    """
+    state = response_cache.state()
+    if state is None:
+        return None
+    version, changed_at = state
+    return str(version), changed_at
+
 @api.route('/health', methods=['GET'])
 def health():
     return jsonify({"status": "healthy"}), 200
 
 # Public endpoints for market data - no authentication required
 @api.route('/seeds', methods=['GET'])
+@query_budget(2)
+@response_cache.cached
 def get_seeds():
-    seeds = Seed.query.all()
-    return jsonify([seed.to_dict() for seed in seeds])
+    """Seeds in id order, one keyset page at a time (?paginate=false for all)"""
+    try:
+        page = page_args(*MarketService.SEEDS_CURSOR)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if page is None:
+        seeds = Seed.query.order_by(Seed.id).all()
+        return jsonify([seed.to_dict() for seed in seeds])
+
+    seeds = db.session.execute(keyset_query(select(Seed), [Seed.id], page)).scalars()
+    result = assemble_page(seeds, page, MarketService.SEEDS_CURSOR[0], key=lambda seed: (seed.id,))
+    return jsonify(page_body([seed.to_dict() for seed in result.rows], result))
 
 @api.route('/seeds/<int:id>', methods=['GET'])
+@query_budget(2)
+@response_cache.cached
 def get_seed(id):
-    seed = Seed.query.get_or_404(id)
+    # A JSON 404 (not get_or_404's HTML page), the same body asgi.py returns
+    seed = db.session.get(Seed, id)
+    if seed is None:
+        return jsonify({"error": "Seed not found"}), 404
     return jsonify(seed.to_dict())
 
 @api.route('/seeds/<int:seed_id>/prices', methods=['GET'])
+@query_budget(2)
+@conditional(_market_state)
 def get_seed_prices(seed_id):
     """Get price history for a specific seed"""
     timeframe = request.args.get('timeframe', '1w')
@@ -30,14 +70,42 @@ def get_seed_prices(seed_id):
         limit = int(request.args.get('limit')) if request.args.get('limit') else None
     except ValueError:
         limit = None
+    resolution = request.args.get('resolution')
+    try:
+        page = page_args(*MarketService.PRICE_CURSOR)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    price_history = MarketService.get_price_history(seed_id, timeframe, limit)
-    return jsonify(price_history)
+    if page is None:
+        body = MarketService.get_price_history_json(seed_id, timeframe, limit, resolution)
+    else:
+        body = MarketService.get_price_page_json(seed_id, page, timeframe, limit, resolution)
+    return Response(body, mimetype='application/json')
+
+@api.route('/seeds/<int:seed_id>/candles', methods=['GET'])
+@query_budget(1)
+def get_seed_candles(seed_id):
+    """Get OHLCV candles for a seed from the rollup tables"""
+    interval = request.args.get('interval', '1d')
+    if interval not in CandleService.PERIODS:
+        return jsonify({"error": f"Unsupported interval, use one of: {', '.join(CandleService.PERIODS)}"}), 400
+    timeframe = request.args.get('timeframe', '1y')
+    try:
+        limit = int(request.args.get('limit')) if request.args.get('limit') else None
+    except ValueError:
+        limit = None
+    
+    days = MarketService.TIMEFRAME_DAYS.get(timeframe, 365)
+    candles = CandleService.get_candles(seed_id, interval, days, limit)
+    return jsonify(candles)
 
 @api.route('/seeds/<int:id>/latest-price', methods=['GET'])
+@query_budget(3)
+@response_cache.cached
 def get_seed_latest_price(id):
     # Check if seed exists
-    seed = Seed.query.get_or_404(id)
+    if db.session.get(Seed, id) is None:
+        return jsonify({"error": "Seed not found"}), 404
     
     # Get the latest price entry
     latest_price = SeedPrice.query.filter_by(seed_id=id).order_by(desc(SeedPrice.recorded_at)).first()
@@ -48,11 +116,69 @@ def get_seed_latest_price(id):
     return jsonify(latest_price.to_dict())
 
 @api.route('/market/summary', methods=['GET'])
+@query_budget(2)
+@conditional(_market_state)
+@response_cache.cached
 def get_market_summary():
     """Get market summary with current prices and statistics"""
     market_data = MarketService.get_market_summary()
     return jsonify(market_data)
 
+@api.route('/market/stream', methods=['GET'])
+def stream_market():
+    """Server-Sent Events stream of price ticks, optionally filtered by ?seeds=1,2"""
+    seeds = request.args.get('seeds')
+    try:
+        seed_ids = [int(seed_id) for seed_id in seeds.split(',') if seed_id] if seeds else None
+    except ValueError:
+        return jsonify({"error": "seeds must be a comma separated list of ids"}), 400
+    
+    subscription = market_stream.subscribe(seed_ids)
+    return Response(
+        market_stream.stream(subscription),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop nginx/ALB-style proxies buffering the stream
+        }
+    )
+
+@api.route('/export/prices', methods=['GET'])
+@query_budget(2)  # The export query plus a token blocklist refresh
+@jwt_required()
+def export_prices():
+    """Stream raw price ticks as NDJSON or CSV.
+    Query params: seeds=1,2 and/or start/end ISO dates (at least one of seeds
+    or start is required), format=ndjson|csv. Ticks older than
+    RAW_RETENTION_DAYS are only kept as candles (see /seeds/<id>/candles)
+    and are not part of the export."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ExportService.FORMATS:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        seeds = request.args.get('seeds')
+        seed_ids = [int(seed_id) for seed_id in seeds.split(',') if seed_id] if seeds else None
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "seeds must be ids and start/end ISO 8601 dates"}), 400
+    if not seed_ids and start is None:
+        # Never stream the whole table by accident
+        return jsonify({"error": "narrow the export with seeds or start"}), 400
+    
+    mimetype, chunks = ExportService.stream_prices(fmt, seed_ids, start, end)
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=seed_prices.{fmt}'}
+    )
+
+@api.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Response cache hit/miss counters"""
+    return jsonify(response_cache.stats())
+
 # Admin endpoints that require authentication
 @api.route('/market/update', methods=['POST'])
 @jwt_required()
@@ -87,10 +213,36 @@ def create_seed():
             recorded_at=datetime.now()
         )
         db.session.add(new_price)
+        CandleService.record_ticks([new_price])
         db.session.commit()
     
+    response_cache.bump_version()
     return jsonify(new_seed.to_dict()), 201
 
+def _bulk_upsert(partial):
+    items = request.get_json(silent=True)
+    if isinstance(items, dict):
+        items = items.get('seeds')
+    if not isinstance(items, list):
+        return jsonify({"error": "Body must be a JSON array of seeds (or {\"seeds\": [...]})"}), 400
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 5000)
+    if len(items) > max_items:
+        return jsonify({"error": f"At most {max_items} seeds per request"}), 413
+    results = CatalogService.bulk_upsert(items, partial=partial)
+    return jsonify({'results': results, **CatalogService.summarize(results)})
+
+@api.route('/seeds/bulk', methods=['POST'])
+@jwt_required()
+def bulk_upsert_seeds():
+    """Create seeds without an id and replace seeds with one, in one transaction"""
+    return _bulk_upsert(partial=False)
+
+@api.route('/seeds/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_patch_seeds():
+    """Change only the given fields of existing seeds, in one transaction"""
+    return _bulk_upsert(partial=True)
+
 @api.route('/seeds/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_seed(id):
@@ -113,10 +265,12 @@ def update_seed(id):
             recorded_at=datetime.now()
         )
         db.session.add(new_price)
+        CandleService.record_ticks([new_price])
         
     seed.description = data.get('description', seed.description)
     
     db.session.commit()
+    response_cache.bump_version()
     return jsonify(seed.to_dict())
 
 @api.route('/seeds/<int:id>', methods=['DELETE'])
@@ -125,4 +279,5 @@ def delete_seed(id):
     seed = Seed.query.get_or_404(id)
     db.session.delete(seed)
     db.session.commit()
+    response_cache.bump_version()
     return jsonify({"message": "Seed deleted"}), 200
\ No newline at end of file
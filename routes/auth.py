@@ -2,12 +2,31 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, 
-    jwt_required, get_jwt_identity, get_jwt
+    jwt_required, get_jwt_identity, get_jwt, decode_token
 )
+from jwt.exceptions import PyJWTError
 from models.models import db, User
+from utils.blocklist import token_blocklist
+from utils.cache import identity_cache
+from utils.passwords import HashingBusy, password_hasher
 
 auth = Blueprint('auth', __name__)
 
+def _busy():
+    """Response for when every password hashing slot is taken"""
+    return jsonify({"error": "Authentication is busy, please retry shortly"}), 503, {'Retry-After': '1'}
+
+def _load_identity(user_id):
+    """Serialized user for a JWT subject, from the identity cache when possible"""
+    return identity_cache.load(user_id, lambda: _user_dict(user_id))
+
+def _user_dict(user_id):
+    try:
+        user = db.session.get(User, int(user_id))
+    except (TypeError, ValueError):
+        return None
+    return user.to_dict() if user else None
+
 # Register a new user
 @auth.route('/register', methods=['POST'])
 def register():
@@ -32,7 +51,10 @@ def register():
         first_name=data.get('first_name', ''),
         last_name=data.get('last_name', '')
     )
-    new_user.set_password(data['password'])
+    try:
+        new_user.set_password(data['password'])
+    except HashingBusy:
+        return _busy()
     
     db.session.add(new_user)
     db.session.commit()
@@ -55,16 +77,22 @@ def login():
     user = User.query.filter_by(username=data['username']).first()
     
     # Check if user exists and password is correct
-    if not user or not user.check_password(data['password']):
-        return jsonify({"error": "Invalid username or password"}), 401
+    try:
+        if not user or not user.check_password(data['password']):
+            return jsonify({"error": "Invalid username or password"}), 401
+        # Upgrade hashes made before PASSWORD_HASH_METHOD changed
+        if password_hasher.needs_rehash(user.password_hash):
+            user.set_password(data['password'])
+    except HashingBusy:
+        return _busy()
     
     # Update last login time
     user.last_login = datetime.now()
     db.session.commit()
     
-    # Generate access and refresh tokens
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    # Generate access and refresh tokens; JWT subjects must be strings
+    access_token = create_access_token(identity=str(user.id))
+    refresh_token = create_refresh_token(identity=str(user.id))
     
     return jsonify({
         "access_token": access_token,
@@ -80,12 +108,12 @@ def get_user_info():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = _load_identity(user_id)
     
     if not user:
         return jsonify({"error": "User not found"}), 404
         
-    return jsonify(user.to_dict()), 200
+    return jsonify(user), 200
 
 # Refresh access token
 @auth.route('/refresh', methods=['POST'])
@@ -95,7 +123,7 @@ def refresh():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = _load_identity(user_id)
     
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -105,14 +133,25 @@ def refresh():
     
     return jsonify({
         "access_token": access_token,
-        "user": user.to_dict()
+        "user": user
     }), 200
 
-# Logout (client-side mostly, but we'll implement a token blocklist later)
+# Logout: revoke the presented token, and the refresh token if one is sent
 @auth.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    # We will implement a token blocklist in a future enhancement
+    token_blocklist.revoke(get_jwt())
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh = decode_token(refresh_token)
+        except PyJWTError:
+            return jsonify({"error": "Invalid refresh token"}), 400
+        # Only the token's owner may revoke it
+        if refresh.get('sub') == get_jwt_identity():
+            token_blocklist.revoke(refresh)
+    
     return jsonify({"message": "Successfully logged out"}), 200
 
 # Special temporary endpoint to allow frontend access without full authentication
@@ -124,7 +163,7 @@ def temp_market_token():
     # Only enable this endpoint in production environments like Render
     if os.environ.get('RENDER_EXTERNAL_HOSTNAME'):
         # Generate a temporary token that will work for market access only
-        temp_user_id = 1  # Use a default user ID for temporary access
+        temp_user_id = '1'  # Use a default user ID for temporary access
         access_token = create_access_token(
             identity=temp_user_id,
             expires_delta=timedelta(hours=24)  # Longer expiration to avoid frequent refreshes
@@ -1,9 +1,17 @@
 import logging
+import os
+import socket
+import threading
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from data_retention import cleanup_old_seed_prices
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import text
+from data_retention import cleanup_old_seed_prices, maintain_seed_price_partitions
+from models.models import db
+from services.market import MarketService
+from utils.metrics import app_metrics
 from flask import Flask, current_app
-import os
 
 # Set up logging
 logging.basicConfig(
@@ -12,41 +20,216 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Advisory lock key shared by every SeedMart process that may run scheduled jobs
+SCHEDULER_LOCK_KEY = 5321001
+# Held by the one `market_cli.py run-engine` process that ticks the market
+MARKET_ENGINE_LOCK_KEY = 5321002
+LEADER_RENEW_SECONDS = int(os.environ.get('SCHEDULER_LEASE_RENEW_SECONDS', 10))
+
+class LeaderElection:
+    """
+    Elects a single scheduler leader across all workers and tasks with a
+    PostgreSQL session-level advisory lock held on a dedicated connection.
+
+    The lease is renewed by probing that connection every few seconds. If the
+    leader process dies its connection closes and Postgres releases the lock,
+    so the next standby to renew takes over. A leader that can no longer
+    reach the database steps down on its next renewal.
+    """
+
+    def __init__(self, engine, lock_key=SCHEDULER_LOCK_KEY, node_id=None):
+        self.engine = engine
+        self.lock_key = lock_key
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self.leader_since = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def renew(self):
+        """Keep or try to take the lease; returns whether this process leads"""
+        with self._lock:
+            if self.engine.dialect.name != 'postgresql':
+                # No advisory locks (e.g. SQLite in development): single process
+                self._set_leader(True)
+                return True
+            try:
+                if self._conn is None:
+                    self._conn = self.engine.connect()
+                    # Lets any node see the lease holder in pg_stat_activity
+                    self._conn.execute(text("SELECT set_config('application_name', :node, false)"),
+                                       {"node": f"seedmart-scheduler {self.node_id}"[:63]})
+                if self.is_leader:
+                    self._conn.execute(text("SELECT 1"))
+                    self._set_leader(True)
+                else:
+                    acquired = self._conn.execute(text("SELECT pg_try_advisory_lock(:key)"),
+                                                  {"key": self.lock_key}).scalar()
+                    self._set_leader(bool(acquired))
+                # End the implicit transaction; the session-level lock is kept
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Scheduler lease renewal failed on {self.node_id}: {str(e)}")
+                self._reset()
+            return self.is_leader
+
+    def release(self):
+        """Give up the lease, e.g. on graceful shutdown, so failover is immediate"""
+        with self._lock:
+            if self._conn is not None and self.is_leader:
+                try:
+                    self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+                    self._conn.commit()
+                except Exception:
+                    pass
+            self._reset()
+
+    def current_leader(self):
+        """application_name of the connection that holds the lease, if any"""
+        if self.engine.dialect.name != 'postgresql':
+            return self.node_id if self.is_leader else None
+        with self.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT a.application_name FROM pg_locks l "
+                "JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'advisory' AND l.classid = 0 "
+                "AND l.objid = :key AND l.objsubid = 1 AND l.granted"
+            ), {"key": self.lock_key}).scalar()
+
+    def status(self):
+        return {
+            'node': self.node_id,
+            'is_leader': self.is_leader,
+            'leader_since': self.leader_since.isoformat() if self.leader_since else None
+        }
+
+    def _set_leader(self, leader):
+        if leader and not self.is_leader:
+            self.leader_since = datetime.now()
+            logger.info(f"Scheduler lease acquired by {self.node_id}")
+        elif not leader and self.is_leader:
+            logger.warning(f"Scheduler lease lost by {self.node_id}")
+        if not leader:
+            self.leader_since = None
+        self.is_leader = leader
+        app_metrics.observe_leader(self.node_id, self.lock_key, leader)
+
+    def _reset(self):
+        if self._conn is not None:
+            try:
+                # Invalidate so the pool never hands out a connection still holding the lock
+                self._conn.invalidate()
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._set_leader(False)
+
 def configure_scheduler(app: Flask):
     """
     Configure and start background tasks for the application using APScheduler.
     Optimized for running in AWS ECS/Fargate environment.
+
+    Every process runs a scheduler, but jobs only execute on the process that
+    holds the leader lease, so each tick runs once across the whole fleet.
     """
+    with app.app_context():
+        election = LeaderElection(db.engine)
     scheduler = BackgroundScheduler(daemon=True)
     
+    # Renew (or contend for) the leader lease, starting immediately
+    scheduler.add_job(
+        func=election.renew,
+        trigger=IntervalTrigger(seconds=LEADER_RENEW_SECONDS),
+        id="scheduler_lease_renewal",
+        name="Renew scheduler leader lease",
+        max_instances=1,
+        replace_existing=True,
+        coalesce=True,
+        next_run_time=datetime.now(),
+    )
+    
+    # Add market update job - runs every MARKET_TICK_SECONDS (30 by default),
+    # unless a run-engine process owns the market
+    if app.config.get('MARKET_ENGINE', 'scheduler') == 'scheduler':
+        scheduler.add_job(
+            func=lambda: _tick_market(app, election),
+            # Each run is a read and a commit; sub-second ticks belong in run-engine
+            trigger=IntervalTrigger(seconds=max(1.0, app.config.get('MARKET_TICK_SECONDS', 30))),
+            id='update_market_prices',
+            name='Update seed market prices',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True  # Combine multiple pending runs into one
+        )
+    
     # Register data retention job to run at 2 AM daily
     # This is a good time when server load is typically low
     scheduler.add_job(
-        func=lambda: _run_with_app_context(app, cleanup_old_seed_prices),
+        func=lambda: _run_if_leader(app, election, cleanup_old_seed_prices, job_id='data_retention_job'),
         trigger=CronTrigger(hour=2, minute=0),
         id="data_retention_job",
-        name="Remove old seed price records",
+        name="Compact and expire old seed prices",
         max_instances=1,
         replace_existing=True,
         coalesce=True,  # Combine multiple executions into one if system was down
     )
     
+    # Create next months' seed_prices partitions well before inserts need them
+    scheduler.add_job(
+        func=lambda: _run_if_leader(app, election, maintain_seed_price_partitions, job_id='partition_maintenance_job'),
+        trigger=CronTrigger(hour=1, minute=30),
+        id="partition_maintenance_job",
+        name="Create upcoming seed price partitions",
+        max_instances=1,
+        replace_existing=True,
+        coalesce=True,
+    )
+    
     # Only add resource-intensive jobs if we have enough system resources
     # or if explicitly enabled through environment variables
     if os.environ.get('ENABLE_INTENSIVE_JOBS') == 'true':
         logger.info("Scheduling intensive maintenance jobs")
         # Add any resource-intensive maintenance jobs here
     
+    # Lag and missed runs for /metrics
+    app_metrics.watch_scheduler(scheduler)
+    
     # Start the scheduler
     scheduler.start()
-    logger.info("Background scheduler started")
+    logger.info(f"Background scheduler started on {election.node_id}")
     
     # Register shutdown with Flask
     app.scheduler = scheduler  # Store reference to shut it down later
+    app.scheduler_election = election
     
     return scheduler
 
-def _run_with_app_context(app, func, *args, **kwargs):
+def hand_market_to_engine(app):
+    """
+    Stop this process's scheduler from ticking the market. run-engine imports
+    the app, and with it a scheduler that would otherwise add its own tick
+    job whenever MARKET_ENGINE is 'scheduler' (the default).
+    """
+    app.config['MARKET_ENGINE'] = 'process'
+    scheduler = getattr(app, 'scheduler', None)
+    if scheduler is not None and scheduler.get_job('update_market_prices') is not None:
+        scheduler.remove_job('update_market_prices')
+
+def _tick_market(app, election):
+    # Checked per run as well, in case a run was already due when the job was removed
+    if app.config.get('MARKET_ENGINE', 'scheduler') != 'scheduler':
+        return None
+    return _run_if_leader(app, election, MarketService.update_seed_prices, job_id='update_market_prices')
+
+def _run_if_leader(app, election, func, *args, job_id=None, **kwargs):
+    """Run a scheduled job only on the process holding the leader lease"""
+    if not election.is_leader:
+        logger.debug(f"Skipping {func.__name__}: {election.node_id} is not the scheduler leader")
+        return None
+    return _run_with_app_context(app, func, *args, job_id=job_id, **kwargs)
+
+def _run_with_app_context(app, func, *args, job_id=None, **kwargs):
     """
     Execute the given function within the Flask application context.
     This ensures that database models and other Flask extensions are accessible.
@@ -54,17 +237,27 @@ def _run_with_app_context(app, func, *args, **kwargs):
     with app.app_context():
         try:
             logger.info(f"Running scheduled task: {func.__name__}")
-            result = func(*args, **kwargs)
+            with app_metrics.time_job(job_id or func.__name__):
+                result = func(*args, **kwargs)
             logger.info(f"Completed scheduled task: {func.__name__}")
             return result
         except Exception as e:
             logger.error(f"Error in scheduled task {func.__name__}: {str(e)}")
             # In production, you might want to send an alert here
 
+def shutdown_scheduler(app: Flask):
+    """Stop scheduled jobs and hand the leader lease to another process"""
+    if hasattr(app, 'scheduler'):
+        app.scheduler.shutdown(wait=False)
+    if hasattr(app, 'scheduler_election'):
+        app.scheduler_election.release()
+
 # This allows the scheduler to be tested independently
 if __name__ == "__main__":
     # Create a test app just for demonstration
     test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite://')
+    db.init_app(test_app)
     configure_scheduler(test_app)
     
     # Keep the script running to test the scheduler
@@ -74,6 +267,5 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except (KeyboardInterrupt, SystemExit):
-        if hasattr(test_app, 'scheduler'):
-            test_app.scheduler.shutdown()
-        logger.info("Scheduler shut down successfully")
\ No newline at end of file
+        shutdown_scheduler(test_app)
+        logger.info("Scheduler shut down successfully")
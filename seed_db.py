@@ -1,7 +1,9 @@
 import random
 import math
 from datetime import datetime, timedelta
-from models.models import db, Seed, SeedPrice
+from models.models import db, Seed
+from services.candles import CandleService
+from utils.bulk_load import generate_rows, load_price_rows
 
 # Mirror the seed types from frontend/public/market-data.js
 SEED_TYPES = [
@@ -71,35 +73,48 @@ def generate_historical_prices(base_price, days=365):
     
     return prices
 
-def seed_database():
-    """Initialize database with seed data if empty"""
+def historical_price_rows(task):
+    """
+    Generate (seed_id, price, volume, recorded_at) rows for one seed.
+    task is (seed_id, days, rng_seed); the seed keeps parallel workers from
+    producing identical series after fork.
+    """
+    seed_id, days, rng_seed = task
+    random.seed(rng_seed)
+    base_price = random.uniform(1, 6)
+    return [(seed_id, p['price'], p['volume'], p['recorded_at'])
+            for p in generate_historical_prices(base_price, days)]
+
+def seed_database(days=365, workers=1, progress=None, count=None):
+    """Initialize database with seed data if empty.
+
+    Price history is generated per seed (in parallel with workers > 1) and
+    streamed into seed_prices in chunks, so memory stays flat regardless of
+    how many rows are written. count overrides the number of seeds created,
+    cycling through SEED_TYPES with a numeric suffix once they run out.
+    """
     if Seed.query.first() is None:
         print("Seeding database...")
-        for seed_type in SEED_TYPES:
+        seeds = []
+        for i in range(len(SEED_TYPES) if count is None else count):
+            seed_type = SEED_TYPES[i % len(SEED_TYPES)]
+            cycle = i // len(SEED_TYPES)
             # Create new seed
             new_seed = Seed(
-                name=seed_type['name'],
+                name=seed_type['name'] if cycle == 0 else f"{seed_type['name']} {cycle + 1}",
                 species=seed_type['species'],
                 description=generate_description(seed_type['name'], seed_type['species'])
             )
             db.session.add(new_seed)
-            db.session.flush()  # Flush to get the ID
-            
-            # Generate and add historical price data
-            base_price = random.uniform(1, 6)
-            price_history = generate_historical_prices(base_price)
-            
-            # Add price records
-            for price_data in price_history:
-                price_record = SeedPrice(
-                    seed_id=new_seed.id,
-                    price=price_data['price'],
-                    volume=price_data['volume'],
-                    recorded_at=price_data['recorded_at']
-                )
-                db.session.add(price_record)
+            seeds.append(new_seed)
+        db.session.flush()  # Flush to get the IDs
+        
+        # Generate and bulk load historical price data
+        tasks = [(seed.id, days, random.getrandbits(64)) for seed in seeds]
+        load_price_rows(generate_rows(historical_price_rows, tasks, workers), progress=progress)
+        CandleService.backfill()
         
         db.session.commit()
         print("Database seeded successfully!")
     else:
-        print("Database already contains data. Skipping seed operation.")
\ No newline at end of file
+        print("Database already contains data. Skipping seed operation.")
@@ -1,3 +1,5 @@
 from .market import MarketService
+from .candles import CandleService
+from .simulation import BatchPriceEngine
 
-__all__ = ['MarketService']
\ No newline at end of file
+__all__ = ['MarketService', 'CandleService', 'BatchPriceEngine']
\ No newline at end of file
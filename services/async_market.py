@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+from models.models import Seed, SeedPrice
+from services.candles import CandleService
+from services.market import MarketService
+from utils.pagination import Page, assemble_page, page_body
+
+# Same statements the ORM issues on PostgreSQL, written for asyncpg ($n params)
+SEEDS_SQL = (
+    "SELECT id, name, species, quantity, price, description, created_at "
+    "FROM seeds ORDER BY id"
+)
+# Keyset pages (utils/pagination.py): the first page, then rows after or before a cursor
+SEEDS_PAGE_SQL = {
+    None: "SELECT id, name, species, quantity, price, description, created_at "
+          "FROM seeds ORDER BY id LIMIT $1",
+    'next': "SELECT id, name, species, quantity, price, description, created_at "
+            "FROM seeds WHERE id > $1 ORDER BY id LIMIT $2",
+    'prev': "SELECT id, name, species, quantity, price, description, created_at "
+            "FROM seeds WHERE id < $1 ORDER BY id DESC LIMIT $2",
+}
+SEED_SQL = (
+    "SELECT id, name, species, quantity, price, description, created_at "
+    "FROM seeds WHERE id = $1"
+)
+LATEST_PRICE_SQL = (
+    "SELECT id, seed_id, price, volume, recorded_at FROM seed_prices "
+    "WHERE seed_id = $1 ORDER BY recorded_at DESC LIMIT 1"
+)
+PRICE_HISTORY_SQL = (
+    "SELECT id, seed_id, price, volume, recorded_at FROM seed_prices "
+    "WHERE seed_id = $1 AND recorded_at >= $2 ORDER BY recorded_at"
+)
+PRICE_PAGE_SQL = {
+    None: "SELECT id, seed_id, price, volume, recorded_at FROM seed_prices "
+          "WHERE seed_id = $1 AND recorded_at >= $2 ORDER BY recorded_at, id LIMIT $3",
+    'next': "SELECT id, seed_id, price, volume, recorded_at FROM seed_prices "
+            "WHERE seed_id = $1 AND recorded_at >= $2 AND (recorded_at, id) > ($3, $4) "
+            "ORDER BY recorded_at, id LIMIT $5",
+    'prev': "SELECT id, seed_id, price, volume, recorded_at FROM seed_prices "
+            "WHERE seed_id = $1 AND recorded_at >= $2 AND (recorded_at, id) < ($3, $4) "
+            "ORDER BY recorded_at DESC, id DESC LIMIT $5",
+}
+BUCKETED_PRICES_SQL = (
+    "SELECT max(id), avg(price), sum(volume), min(recorded_at) FROM seed_prices "
+    "WHERE seed_id = $1 AND recorded_at >= $2 "
+    "GROUP BY floor(extract(epoch FROM recorded_at) / $3::float8) "
+    "ORDER BY min(recorded_at)"
+)
+CANDLE_PRICES_SQL = (
+    "SELECT max(id), avg(close), sum(volume), min(bucket_start) FROM seed_candles "
+    "WHERE seed_id = $1 AND period = $2 AND bucket_start >= $3 "
+    "GROUP BY floor(extract(epoch FROM bucket_start) / $4::float8) "
+    "ORDER BY min(bucket_start)"
+)
+SUMMARY_SQL = (
+    "SELECT s.id, s.name, s.species, s.description, r.price, r.volume, r.rn "
+    "FROM seeds s LEFT JOIN LATERAL ("
+    " SELECT price, volume, row_number() OVER (ORDER BY recorded_at DESC) AS rn"
+    " FROM seed_prices WHERE seed_id = s.id ORDER BY recorded_at DESC LIMIT 2"
+    ") r ON true ORDER BY s.id, r.rn"
+)
+
+
+def _to_dict(model, record):
+    """Serialize an asyncpg record with the model's own to_dict so both read
+    paths produce identical JSON"""
+    return model.to_dict(SimpleNamespace(**dict(record)))
+
+
+class AsyncMarketService:
+    """Read-only market queries for the ASGI app, run on an asyncpg pool.
+    Result shaping is delegated to MarketService / the models."""
+
+    @staticmethod
+    async def get_seeds(pool):
+        return [_to_dict(Seed, record) for record in await pool.fetch(SEEDS_SQL)]
+
+    @staticmethod
+    async def get_seeds_page(pool, page):
+        sql = SEEDS_PAGE_SQL[page.direction if page.key else None]
+        records = await pool.fetch(sql, *(page.key or ()), page.size + 1)
+        result = assemble_page(records, page, MarketService.SEEDS_CURSOR[0], key=lambda record: (record['id'],))
+        return page_body([_to_dict(Seed, record) for record in result.rows], result)
+
+    @staticmethod
+    async def get_seed(pool, seed_id):
+        record = await pool.fetchrow(SEED_SQL, seed_id)
+        return _to_dict(Seed, record) if record else None
+
+    @staticmethod
+    async def get_latest_price(pool, seed_id):
+        record = await pool.fetchrow(LATEST_PRICE_SQL, seed_id)
+        return _to_dict(SeedPrice, record) if record else None
+
+    @staticmethod
+    async def get_price_history(pool, seed_id, timeframe='1w', limit=None, resolution=None):
+        mode, cutoff_date, width, limit, tier = MarketService.price_history_plan(timeframe, limit, resolution)
+
+        if mode == 'raw':
+            records = await pool.fetch(PRICE_HISTORY_SQL, seed_id, cutoff_date)
+            return [_to_dict(SeedPrice, record) for record in records]
+
+        if tier is not None:
+            records = await pool.fetch(CANDLE_PRICES_SQL, seed_id, tier,
+                                       CandleService.PERIODS[tier](cutoff_date), float(width))
+        else:
+            records = await pool.fetch(BUCKETED_PRICES_SQL, seed_id, cutoff_date, float(width))
+        points = MarketService.bucket_dicts(seed_id, [tuple(record) for record in records])
+        return MarketService.finish_price_history(mode, points, limit)
+
+    @staticmethod
+    async def get_price_page(pool, seed_id, page, timeframe='1w', limit=None, resolution=None):
+        mode, cutoff_date, _, _, _ = MarketService.price_history_plan(timeframe, limit, resolution)
+        if mode != 'raw':
+            items = await AsyncMarketService.get_price_history(pool, seed_id, timeframe, limit, resolution)
+            return page_body(items, Page(None, None, None, page.size))
+
+        sql = PRICE_PAGE_SQL[page.direction if page.key else None]
+        records = await pool.fetch(sql, seed_id, cutoff_date, *(page.key or ()), page.size + 1)
+        result = assemble_page(records, page, MarketService.PRICE_CURSOR[0],
+                               key=lambda record: (record['recorded_at'], record['id']))
+        return page_body([_to_dict(SeedPrice, record) for record in result.rows], result)
+
+    @staticmethod
+    async def get_market_summary(pool):
+        rows = [(SimpleNamespace(id=r['id'], name=r['name'], species=r['species'],
+                                 description=r['description']),
+                 r['price'], r['volume'], r['rn'])
+                for r in await pool.fetch(SUMMARY_SQL)]
+        return MarketService.build_summary(rows)
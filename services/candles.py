@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from models.models import db, SeedPrice, SeedCandle
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+
+class CandleService:
+    # Supported rollup periods and how to truncate a timestamp to their bucket
+    PERIODS = {
+        '1m': lambda ts: ts.replace(second=0, microsecond=0),
+        '1h': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+        '1d': lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    }
+
+    @staticmethod
+    def _merge_ticks(ticks, periods):
+        """Fold (seed_id, price, volume, recorded_at) ticks into candle dicts
+        keyed by (seed_id, period, bucket_start). Ticks must be in time order."""
+        candles = {}
+        for seed_id, price, volume, recorded_at in ticks:
+            for period in periods:
+                key = (seed_id, period, CandleService.PERIODS[period](recorded_at))
+                candle = candles.get(key)
+                if candle is None:
+                    candles[key] = {
+                        'seed_id': seed_id,
+                        'period': period,
+                        'bucket_start': key[2],
+                        'open': price,
+                        'high': price,
+                        'low': price,
+                        'close': price,
+                        'volume': volume or 0
+                    }
+                else:
+                    candle['high'] = max(candle['high'], price)
+                    candle['low'] = min(candle['low'], price)
+                    candle['close'] = price
+                    candle['volume'] += volume or 0
+        return candles
+
+    @staticmethod
+    def record_ticks(price_records):
+        """Roll new SeedPrice records into every candle period.
+        Runs inside the caller's transaction; the caller commits."""
+        ticks = sorted(((p.seed_id, p.price, p.volume, p.recorded_at) for p in price_records),
+                       key=lambda tick: tick[3])
+        candles = CandleService._merge_ticks(ticks, CandleService.PERIODS)
+        if not candles:
+            return 0
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            stmt = pg_insert(SeedCandle).values(list(candles.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['seed_id', 'period', 'bucket_start'],
+                set_={
+                    'high': func.greatest(SeedCandle.high, stmt.excluded.high),
+                    'low': func.least(SeedCandle.low, stmt.excluded.low),
+                    'close': stmt.excluded.close,
+                    'volume': SeedCandle.volume + stmt.excluded.volume
+                }
+            )
+            db.session.execute(stmt)
+            return len(candles)
+
+        # Portable path: one lookup per period, then merge in Python
+        count = len(candles)
+        seed_ids = {key[0] for key in candles}
+        changed = []
+        for period in CandleService.PERIODS:
+            buckets = {key[2] for key in candles if key[1] == period}
+            existing = (db.session.query(SeedCandle.id, SeedCandle.seed_id, SeedCandle.bucket_start,
+                                         SeedCandle.high, SeedCandle.low, SeedCandle.volume)
+                        .filter(SeedCandle.period == period,
+                                SeedCandle.seed_id.in_(seed_ids),
+                                SeedCandle.bucket_start.in_(buckets))
+                        .all())
+            for candle in existing:
+                merged = candles.pop((candle.seed_id, period, candle.bucket_start), None)
+                if merged:
+                    changed.append({
+                        'id': candle.id,
+                        'high': max(candle.high, merged['high']),
+                        'low': min(candle.low, merged['low']),
+                        'close': merged['close'],
+                        'volume': (candle.volume or 0) + merged['volume']
+                    })
+
+        if changed:
+            # ORM bulk UPDATE by primary key: one executemany, no hydration
+            db.session.execute(update(SeedCandle), changed)
+        if candles:
+            db.session.execute(SeedCandle.__table__.insert(), list(candles.values()))
+        return count
+
+    @staticmethod
+    def backfill(periods=None, since=None, batch_size=10000):
+        """Rebuild candles from raw seed_prices, streaming rows in time order.
+        Existing candles from `since` onwards are replaced."""
+        periods = periods or list(CandleService.PERIODS)
+
+        delete = SeedCandle.query.filter(SeedCandle.period.in_(periods))
+        query = (db.session.query(SeedPrice.seed_id, SeedPrice.price,
+                                  SeedPrice.volume, SeedPrice.recorded_at)
+                 .order_by(SeedPrice.seed_id, SeedPrice.recorded_at))
+        if since:
+            # Align to the widest bucket so partially covered candles are rebuilt whole
+            since = CandleService.PERIODS['1d'](since)
+            delete = delete.filter(SeedCandle.bucket_start >= since)
+            query = query.filter(SeedPrice.recorded_at >= since)
+        delete.delete(synchronize_session=False)
+
+        to_day = CandleService.PERIODS['1d']
+        written = 0
+        pending = []
+        current_day = None
+        for row in query.yield_per(batch_size):
+            # Only flush on a seed/day boundary so no candle is split across batches
+            day = (row.seed_id, to_day(row.recorded_at))
+            if day != current_day and len(pending) >= batch_size:
+                written += CandleService._write_candles(pending, periods)
+                pending = []
+            current_day = day
+            pending.append(tuple(row))
+
+        written += CandleService._write_candles(pending, periods)
+        db.session.commit()
+        return written
+
+    @staticmethod
+    def _write_candles(ticks, periods):
+        candles = CandleService._merge_ticks(ticks, periods)
+        if candles:
+            db.session.execute(SeedCandle.__table__.insert(), list(candles.values()))
+        return len(candles)
+
+    @staticmethod
+    def get_candles(seed_id, period='1d', timeframe_days=365, limit=None):
+        """Read candles for a seed from the rollup only"""
+        cutoff_date = datetime.now() - timedelta(days=timeframe_days)
+        query = (SeedCandle.query
+                 .filter(SeedCandle.seed_id == seed_id,
+                         SeedCandle.period == period,
+                         SeedCandle.bucket_start >= cutoff_date)
+                 .order_by(SeedCandle.bucket_start.desc()))
+        if limit:
+            query = query.limit(limit)
+        return [candle.to_dict() for candle in reversed(query.all())]
@@ -0,0 +1,158 @@
+from datetime import datetime
+from numbers import Real
+from models.models import db, Seed
+from services.market import MarketService
+from services.simulation import Tick
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from utils.cache import response_cache
+
+
+class CatalogService:
+    """
+    Set-based create/update for many seeds at once (POST/PATCH /api/seeds/bulk).
+
+    A whole request is one transaction with a fixed number of statements,
+    whatever the item count: one SELECT for the seeds it names, one multi-row
+    INSERT ... RETURNING for new seeds, one INSERT ... ON CONFLICT (id) DO
+    UPDATE for existing ones, and one insert of price rows (plus the candle
+    upsert) for every seed created with or moved to a new price. (SQLite has
+    no way to return ids in parameter order from a multi-row INSERT, so there
+    SQLAlchemy inserts new seeds one row at a time.)
+    """
+
+    FIELDS = ('name', 'species', 'quantity', 'price', 'description')
+    STRING_LIMITS = {'name': 100, 'species': 100}
+
+    @staticmethod
+    def _validate(item, partial):
+        """Return (seed_id, fields, error) for one request item"""
+        if not isinstance(item, dict):
+            return None, None, 'each item must be an object'
+        unknown = set(item) - set(CatalogService.FIELDS) - {'id'}
+        if unknown:
+            return None, None, f"unknown fields: {', '.join(sorted(unknown))}"
+        seed_id = item.get('id')
+        if seed_id is not None and (not isinstance(seed_id, int) or isinstance(seed_id, bool)):
+            return None, None, 'id must be an integer'
+        if partial and seed_id is None:
+            return None, None, 'id is required'
+        if not partial and not item.get('name'):
+            return None, None, 'name is required'
+
+        fields = {field: item[field] for field in CatalogService.FIELDS if field in item}
+        for field in ('name', 'species', 'description'):
+            value = fields.get(field)
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                return None, None, f'{field} must be a string'
+            if len(value) > CatalogService.STRING_LIMITS.get(field, len(value)):
+                return None, None, f'{field} is longer than {CatalogService.STRING_LIMITS[field]} characters'
+        if partial and 'name' in fields and not fields['name']:
+            return None, None, 'name cannot be empty'
+        quantity = fields.get('quantity')
+        if quantity is not None and (not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0):
+            return None, None, 'quantity must be a non-negative integer'
+        price = fields.get('price')
+        if price is not None and (not isinstance(price, Real) or isinstance(price, bool) or price < 0):
+            return None, None, 'price must be a non-negative number'
+        return seed_id, fields, None
+
+    @staticmethod
+    def _upsert_statement():
+        insert_ = pg_insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite_insert
+        stmt = insert_(Seed)
+        return stmt.on_conflict_do_update(
+            index_elements=[Seed.id],
+            set_={field: stmt.excluded[field] for field in CatalogService.FIELDS}
+        )
+
+    @staticmethod
+    def bulk_upsert(items, partial=False):
+        """
+        Create items without an id and update items with one, in one transaction.
+
+        partial=False (POST) replaces every field of an existing seed, like a
+        create would; partial=True (PATCH) changes only the fields given and
+        requires an id. Returns one result per item, in request order:
+        {'index', 'status': created|updated|not_found|invalid, 'id' or 'error'}.
+        """
+        results = [None] * len(items)
+        valid = []
+        seen_ids = set()
+        for index, item in enumerate(items):
+            seed_id, fields, error = CatalogService._validate(item, partial)
+            if error is None and seed_id is not None:
+                if seed_id in seen_ids:
+                    error = 'id appears more than once in this request'
+                seen_ids.add(seed_id)
+            if error:
+                results[index] = {'index': index, 'status': 'invalid', 'error': error}
+            else:
+                valid.append((index, seed_id, fields))
+
+        existing = {}
+        if seen_ids:
+            rows = db.session.execute(
+                select(Seed.id, *(getattr(Seed, field) for field in CatalogService.FIELDS))
+                .where(Seed.id.in_(seen_ids))
+            )
+            existing = {row.id: row._asdict() for row in rows}
+
+        now = datetime.now()
+        created, created_indexes, updated, ticks = [], [], [], []
+        for index, seed_id, fields in valid:
+            if seed_id is None:
+                row = {field: fields.get(field) for field in CatalogService.FIELDS}
+                row['quantity'] = row['quantity'] or 0
+                row['created_at'] = now
+                created.append(row)
+                created_indexes.append(index)
+                continue
+            current = existing.get(seed_id)
+            if current is None:
+                results[index] = {'index': index, 'status': 'not_found', 'id': seed_id}
+                continue
+            if partial:
+                row = {**current, **fields}
+            else:
+                row = {'id': seed_id, **{field: fields.get(field) for field in CatalogService.FIELDS}}
+                row['quantity'] = row['quantity'] or 0
+            updated.append(row)
+            # Same rule as PUT /seeds/<id>: a changed price is also a price tick
+            if row['price'] and row['price'] != current['price']:
+                ticks.append(Tick(seed_id, row['price'], row['quantity'] or 0, now))
+            results[index] = {'index': index, 'status': 'updated', 'id': seed_id}
+
+        try:
+            if created:
+                # insertmanyvalues batches the rows into multi-row INSERTs and
+                # returns ids in parameter order, whatever order the database uses
+                new_ids = db.session.execute(
+                    insert(Seed).returning(Seed.id, sort_by_parameter_order=True), created
+                ).scalars().all()
+                for index, row, seed_id in zip(created_indexes, created, new_ids):
+                    results[index] = {'index': index, 'status': 'created', 'id': seed_id}
+                    if row['price']:
+                        ticks.append(Tick(seed_id, row['price'], row['quantity'], now))
+            if updated:
+                db.session.execute(CatalogService._upsert_statement(), updated)
+            if ticks:
+                MarketService.write_ticks(ticks)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if created or updated:
+            response_cache.bump_version()
+        return results
+
+    @staticmethod
+    def summarize(results):
+        counts = {status: 0 for status in ('created', 'updated', 'not_found', 'invalid')}
+        for result in results:
+            counts[result['status']] += 1
+        return counts
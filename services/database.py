@@ -1,19 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from database import SQLALCHEMY_DATABASE_URI
+# Shares the process-wide engine and pool from database.py
+from database import engine, Session, get_session, close_session
 
-# Use the main database connection URL which already includes SSL parameters
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
-
-Session = sessionmaker(bind=engine)
-
-def get_session():
-    return Session()
-
-def close_session(session):
-    session.close()
\ No newline at end of file
+__all__ = ['engine', 'Session', 'get_session', 'close_session']
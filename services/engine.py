@@ -0,0 +1,125 @@
+import logging
+import time
+import numpy as np
+from datetime import datetime
+from models.models import db, Seed
+from sqlalchemy import select
+from services.market import MarketService
+from services.simulation import BatchPriceEngine, Tick
+
+logger = logging.getLogger(__name__)
+
+
+class MarketEngine:
+    """
+    Long-running market simulation that keeps every seed's last price and
+    volume in memory (market_cli.py run-engine).
+
+    State is recovered from the database with one query on start, after which
+    a tick reads nothing: it advances the in-memory prices with
+    BatchPriceEngine and writes them with MarketService.record_tick, a single
+    multi-row insert. Seeds added or removed through the API are picked up by
+    a cheap id-only query every `refresh_seconds`.
+
+    With a TickBuffer, ticks are queued instead and written in batches by its
+    flusher thread, which is what makes sub-second intervals affordable. The
+    buffer marks the seed set stale when it meets a deleted seed, and is
+    emptied whenever the lease is lost.
+    """
+
+    def __init__(self, price_engine=None, refresh_seconds=60, buffer=None):
+        self.price_engine = price_engine or BatchPriceEngine()
+        self.refresh_seconds = refresh_seconds
+        self.buffer = buffer
+        self.seed_ids = []
+        self.prices = np.empty(0)
+        self.volumes = np.empty(0, dtype=np.int64)
+        self._refreshed_at = None
+        if buffer is not None:
+            buffer.on_unknown_seeds = self.mark_stale
+
+    def mark_stale(self):
+        """Reload state from the database before the next tick"""
+        self._refreshed_at = None
+
+    def load(self):
+        """Recover the last price and volume of every seed in one query"""
+        rows = MarketService._latest_price_rows(depth=1, seed_entity=Seed.id)
+        self.seed_ids = [seed_id for seed_id, _, _, _ in rows]
+        self.prices = np.array([np.nan if price is None else price for _, price, _, _ in rows], dtype=np.float64)
+        self.volumes = np.array([volume or 0 for _, _, volume, _ in rows], dtype=np.int64)
+        self._refreshed_at = time.monotonic()
+        db.session.commit()
+        logger.info(f"Market engine loaded {len(self.seed_ids)} seeds")
+        return len(self.seed_ids)
+
+    def refresh_seeds(self):
+        """Add seeds created since the last refresh (without history) and drop deleted ones"""
+        current = db.session.execute(select(Seed.id).order_by(Seed.id)).scalars().all()
+        db.session.commit()
+        self._refreshed_at = time.monotonic()
+        if current == self.seed_ids:
+            return
+        known = dict(zip(self.seed_ids, zip(self.prices.tolist(), self.volumes.tolist())))
+        self.seed_ids = current
+        self.prices = np.array([known.get(seed_id, (np.nan, 0))[0] for seed_id in current], dtype=np.float64)
+        self.volumes = np.array([known.get(seed_id, (np.nan, 0))[1] for seed_id in current], dtype=np.int64)
+
+    def tick(self, recorded_at=None):
+        """Advance and persist (or queue) every seed once; returns the number of rows"""
+        if self._refreshed_at is None:
+            self.load()
+        elif time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self.refresh_seeds()
+        if not self.seed_ids:
+            return 0
+
+        new_prices, new_volumes = self.price_engine.step(self.prices)
+        recorded_at = recorded_at or datetime.now()
+        updates = [Tick(seed_id, price, volume, recorded_at)
+                   for seed_id, price, volume in zip(self.seed_ids, new_prices.tolist(), new_volumes.tolist())]
+        previous_prices = {seed_id: price for seed_id, price in zip(self.seed_ids, self.prices.tolist())
+                           if not np.isnan(price)}
+        if self.buffer is not None:
+            # Raises BufferFull under backpressure, leaving the state unadvanced
+            self.buffer.put(updates, previous_prices)
+            self.prices, self.volumes = new_prices, new_volumes
+            return len(updates)
+        try:
+            written = MarketService.record_tick(updates, previous_prices)
+        except Exception:
+            db.session.rollback()
+            # e.g. a seed deleted since the last refresh; the next tick starts from the database
+            self.mark_stale()
+            raise
+        self.prices, self.volumes = new_prices, new_volumes
+        return written
+
+    def run(self, interval, election=None, renew_seconds=10, should_stop=lambda: False):
+        """Tick every `interval` seconds until should_stop() is true. With a
+        LeaderElection only the lease holder ticks; state is reloaded whenever
+        the lease is (re)acquired, since another engine may have ticked meanwhile."""
+        leading = False
+        renewed_at = None
+        next_tick = time.monotonic()
+        while not should_stop():
+            if election is not None and (renewed_at is None or time.monotonic() - renewed_at >= renew_seconds):
+                was_leading, leading = leading, election.renew()
+                renewed_at = time.monotonic()
+                if was_leading and not leading and self.buffer is not None:
+                    # Another engine may lead now; unwritten ticks are no longer ours to write
+                    self.buffer.discard('lease_lost')
+                if leading and not was_leading:
+                    self.load()
+            if election is not None and not leading:
+                time.sleep(min(interval, renew_seconds))
+                next_tick = time.monotonic()
+                continue
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Market engine tick failed: {str(e)}")
+            next_tick += interval
+            # Skip ticks that were missed rather than bursting to catch up
+            next_tick = max(next_tick, time.monotonic())
+            time.sleep(max(0.0, next_tick - time.monotonic()))
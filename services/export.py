@@ -0,0 +1,46 @@
+from models.models import db, SeedPrice
+from sqlalchemy import select
+from utils.serialization import iter_csv, iter_ndjson
+
+
+class ExportService:
+    FORMATS = {
+        'ndjson': ('application/x-ndjson', iter_ndjson),
+        'csv': ('text/csv', iter_csv)
+    }
+
+    @staticmethod
+    def iter_prices(seed_ids=None, start=None, end=None, batch_size=5000):
+        """
+        Yield (id, price, recorded_at, seed_id, volume) tuples for any date
+        range and any set of seeds, ordered by seed then time. Rows are read
+        through a server-side cursor `batch_size` at a time, so memory stays
+        flat however many rows match.
+
+        Only raw ticks are exported. Rows older than RAW_RETENTION_DAYS have
+        been compacted into 1h/1d candles (services/retention.py), so a range
+        reaching further back returns nothing for that part; read those from
+        /api/seeds/<id>/candles.
+        """
+        query = select(SeedPrice.id, SeedPrice.price, SeedPrice.recorded_at,
+                       SeedPrice.seed_id, SeedPrice.volume)
+        if seed_ids:
+            query = query.where(SeedPrice.seed_id.in_(seed_ids))
+        if start:
+            query = query.where(SeedPrice.recorded_at >= start)
+        if end:
+            query = query.where(SeedPrice.recorded_at < end)
+        query = query.order_by(SeedPrice.seed_id, SeedPrice.recorded_at, SeedPrice.id)
+
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def stream_prices(fmt='ndjson', seed_ids=None, start=None, end=None):
+        """Return (mimetype, iterator of text chunks) for an export"""
+        mimetype, encoder = ExportService.FORMATS[fmt]
+        return mimetype, encoder(ExportService.iter_prices(seed_ids, start, end))
@@ -1,9 +1,51 @@
+import math
 import random
+import numpy as np
 from datetime import datetime, timedelta
-from models.models import db, Seed, SeedPrice
-from sqlalchemy import func
+from config import Config
+from models.models import db, Seed, SeedPrice, SeedCandle
+from services.candles import CandleService
+from services.simulation import BatchPriceEngine, Tick
+from utils.cache import response_cache
+from utils.broadcast import market_stream
+from utils.metrics import app_metrics
+from utils.pagination import Page, assemble_page, keyset_query, page_body
+from utils.serialization import dumps_like_jsonify, encode_price_page, encode_price_rows
+from sqlalchemy import func, select, and_, true, cast, Integer
 
 class MarketService:
+    TIMEFRAME_DAYS = {
+        '1d': 1,
+        '1w': 7,
+        '1m': 30,
+        '3m': 90,
+        '1y': 365
+    }
+
+    # Bucket widths (seconds) for named price-history resolutions
+    RESOLUTION_SECONDS = {
+        'minute': 60,
+        'hour': 3600,
+        'day': 86400,
+        'week': 604800
+    }
+    # Where history older than each horizon lives (see services/retention.py):
+    # raw seed_prices, then hourly, then daily candles
+    RETENTION_TIERS = [
+        (Config.RAW_RETENTION_DAYS, None),
+        (Config.HOURLY_RETENTION_DAYS, '1h'),
+        (Config.DATA_RETENTION_DAYS, '1d')
+    ]
+    TIER_SECONDS = {'1h': 3600, '1d': 86400}
+    DEFAULT_LTTB_POINTS = 500
+    LTTB_OVERSAMPLE = 4  # Buckets fetched per LTTB output point
+    # Keyset cursors (utils/pagination.py): seeds page on id, prices on (recorded_at, id)
+    SEEDS_CURSOR = ('seeds', (int,))
+    PRICE_CURSOR = ('prices', (datetime, int))
+
+    # Shared vectorized simulator for scheduled ticks
+    price_engine = BatchPriceEngine()
+
     @staticmethod
     def calculate_base_price():
         """Generate a base price between 1-6 dollars with reduced volatility"""
@@ -17,34 +59,72 @@ class MarketService:
         new_price = max(0.2, current_price + current_price * change)
         return round(new_price, 2)
 
+    @staticmethod
+    def _latest_price_rows(depth=2, seed_entity=Seed):
+        """Return (seed, price, volume, rn) rows for the newest `depth` prices of
+        every seed in a single round-trip. Seeds without prices come back once
+        with NULL price columns. Pass seed_entity=Seed.id to skip hydrating seeds."""
+        bind = db.session.get_bind()
+        if bind.dialect.name == 'postgresql':
+            # LATERAL lets Postgres walk the (seed_id, recorded_at) index per seed
+            recent = (select(SeedPrice.price.label('price'),
+                             SeedPrice.volume.label('volume'),
+                             func.row_number().over(
+                                 order_by=SeedPrice.recorded_at.desc()).label('rn'))
+                      .where(SeedPrice.seed_id == Seed.id)
+                      .order_by(SeedPrice.recorded_at.desc())
+                      .limit(depth)
+                      .lateral('recent'))
+            rows = recent.c
+            query = db.session.query(seed_entity).outerjoin(recent, true())
+        else:
+            ranked = (select(SeedPrice.seed_id.label('seed_id'),
+                             SeedPrice.price.label('price'),
+                             SeedPrice.volume.label('volume'),
+                             func.row_number().over(
+                                 partition_by=SeedPrice.seed_id,
+                                 order_by=SeedPrice.recorded_at.desc()).label('rn'))
+                      .subquery('ranked'))
+            rows = ranked.c
+            query = (db.session.query(seed_entity)
+                     .outerjoin(ranked, and_(ranked.c.seed_id == Seed.id,
+                                             ranked.c.rn <= depth)))
+        return (query.add_columns(rows.price, rows.volume, rows.rn)
+                .order_by(Seed.id, rows.rn)
+                .all())
+
     @staticmethod
     def get_market_summary():
         """Get current market statistics"""
-        seeds = Seed.query.all()
+        return MarketService.build_summary(MarketService._latest_price_rows())
+
+    @staticmethod
+    def build_summary(rows):
+        """Shape (seed, price, volume, rn) rows, ordered by seed id and rn, into
+        the market summary payload. Shared with the async read path."""
+        latest = {}
+        previous = {}
+        seeds = []
+        for seed, price, volume, rn in rows:
+            if not seeds or seeds[-1].id != seed.id:
+                seeds.append(seed)
+            if rn == 1:
+                latest[seed.id] = (price, volume)
+            elif rn == 2:
+                previous[seed.id] = price
+
         total_volume = 0
         market_cap = 0
         summaries = []
 
         for seed in seeds:
-            latest_price = (SeedPrice.query
-                          .filter_by(seed_id=seed.id)
-                          .order_by(SeedPrice.recorded_at.desc())
-                          .first())
-            
-            previous_price = (SeedPrice.query
-                            .filter_by(seed_id=seed.id)
-                            .order_by(SeedPrice.recorded_at.desc())
-                            .offset(1)
-                            .first())
-
-            if latest_price:
-                current_price = latest_price.price
-                previous_price_value = previous_price.price if previous_price else current_price
+            if seed.id in latest:
+                current_price, daily_volume = latest[seed.id]
+                previous_price_value = previous.get(seed.id, current_price)
                 change = round(current_price - previous_price_value, 2)
                 change_percent = round((change / previous_price_value * 100), 1) if previous_price_value > 0 else 0
                 
                 # Calculate volume and market cap
-                daily_volume = latest_price.volume
                 total_volume += daily_volume
                 market_cap += current_price * 1000  # Assuming 1000 units per seed type
 
@@ -70,63 +150,269 @@ class MarketService:
         }
 
     @staticmethod
-    def get_price_history(seed_id, timeframe='1w', limit=None):
-        """Get price history for a specific seed with optional limit"""
-        timeframe_days = {
-            '1d': 1,
-            '1w': 7,
-            '1m': 30,
-            '3m': 90,
-            '1y': 365
-        }
-        
-        days = timeframe_days.get(timeframe, 7)
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        query = (SeedPrice.query
-                .filter(SeedPrice.seed_id == seed_id,
-                       SeedPrice.recorded_at >= cutoff_date)
-                .order_by(SeedPrice.recorded_at))
-
-        if limit:
-            # If limit is specified, get evenly spaced samples
-            prices = query.all()
-            if len(prices) > limit:
-                # Calculate step size for even sampling
-                step = len(prices) // limit
-                prices = prices[::step][:limit]
-            return [price.to_dict() for price in prices]
+    def _epoch_bucket(width, column=SeedPrice.recorded_at):
+        """SQL expression numbering fixed-width time buckets of `width` seconds"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return func.floor(func.extract('epoch', column) / width)
+        return cast(func.strftime('%s', column), Integer) // width
+
+    @staticmethod
+    def _bucketed_prices(seed_id, cutoff_date, width, tier=None):
+        """Aggregate price history into `width`-second buckets inside the database.
+        Each bucket reports its average price, total volume and first timestamp.
+        With a tier ('1h', '1d') the buckets are built from those candles' closes."""
+        if tier is None:
+            price_id, price, volume, recorded_at = SeedPrice.id, SeedPrice.price, SeedPrice.volume, SeedPrice.recorded_at
+            filters = [SeedPrice.seed_id == seed_id, recorded_at >= cutoff_date]
         else:
-            # Return all prices if no limit specified
+            price_id, price, volume, recorded_at = SeedCandle.id, SeedCandle.close, SeedCandle.volume, SeedCandle.bucket_start
+            filters = [SeedCandle.seed_id == seed_id, SeedCandle.period == tier,
+                       recorded_at >= CandleService.PERIODS[tier](cutoff_date)]
+        bucket = MarketService._epoch_bucket(width, recorded_at)
+        first_recorded = func.min(recorded_at)
+        rows = (db.session.query(func.max(price_id),
+                                 func.avg(price),
+                                 func.sum(volume),
+                                 first_recorded)
+                .filter(*filters)
+                .group_by(bucket)
+                .order_by(first_recorded)
+                .all())
+        return MarketService.bucket_dicts(seed_id, rows)
+
+    @staticmethod
+    def bucket_dicts(seed_id, rows):
+        """Shape (max id, avg price, total volume, first timestamp) bucket rows"""
+        return [{
+            'id': price_id,
+            'seed_id': seed_id,
+            'price': round(price, 2),
+            'volume': int(volume or 0),
+            'recorded_at': recorded_at.isoformat() if recorded_at else None
+        } for price_id, price, volume, recorded_at in rows]
+
+    @staticmethod
+    def _lttb(points, threshold):
+        """Largest-triangle-three-buckets downsampling of price points.
+        Keeps the first and last point and, per bucket, the point forming the
+        largest triangle with its neighbours so peaks and troughs survive."""
+        if threshold >= len(points) or threshold < 3:
+            return points
+
+        def xy(point):
+            return datetime.fromisoformat(point['recorded_at']).timestamp(), point['price']
+
+        coords = [xy(point) for point in points]
+        sampled = [points[0]]
+        every = (len(points) - 2) / (threshold - 2)
+        a = 0
+
+        for i in range(threshold - 2):
+            # Average of the next bucket is the third triangle vertex
+            next_start = int((i + 1) * every) + 1
+            next_end = min(int((i + 2) * every) + 1, len(points))
+            next_slice = coords[next_start:next_end] or [coords[-1]]
+            avg_x = sum(x for x, _ in next_slice) / len(next_slice)
+            avg_y = sum(y for _, y in next_slice) / len(next_slice)
+
+            ax, ay = coords[a]
+            best_area = -1
+            best = None
+            for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+                bx, by = coords[j]
+                area = abs((ax - avg_x) * (by - ay) - (ax - bx) * (avg_y - ay))
+                if area > best_area:
+                    best_area = area
+                    best = j
+
+            sampled.append(points[best])
+            a = best
+
+        sampled.append(points[-1])
+        return sampled
+
+    @staticmethod
+    def price_tier(days):
+        """Candle period holding `days` of history, or None for raw seed_prices"""
+        for horizon_days, tier in MarketService.RETENTION_TIERS:
+            if days <= horizon_days:
+                return tier
+        return MarketService.RETENTION_TIERS[-1][1]
+
+    @staticmethod
+    def price_history_plan(timeframe='1w', limit=None, resolution=None):
+        """Decide how a price-history request is served.
+
+        Returns (mode, cutoff_date, width, limit, tier) where mode is 'raw'
+        (every stored row), 'bucket' (fixed-width buckets of `width` seconds,
+        trimmed to `limit` when set) or 'lttb' (buckets reduced to `limit`
+        points), and tier is the candle period to read from when the timeframe
+        reaches past the raw retention horizon (None reads seed_prices).
+        resolution may be 'minute', 'hour', 'day', 'week', 'auto' (default when
+        limit is set), 'lttb' or 'raw'.
+        """
+        days = MarketService.TIMEFRAME_DAYS.get(timeframe, 7)
+        cutoff_date = datetime.now() - timedelta(days=days)
+        tier = MarketService.price_tier(days)
+        # Candles can't be split finer than their own period
+        floor = MarketService.TIER_SECONDS.get(tier, 1)
+
+        if resolution in MarketService.RESOLUTION_SECONDS:
+            return 'bucket', cutoff_date, max(floor, MarketService.RESOLUTION_SECONDS[resolution]), None, tier
+
+        if resolution == 'lttb':
+            limit = limit or MarketService.DEFAULT_LTTB_POINTS
+            # Pre-aggregate in the database so memory scales with limit, not rows
+            width = max(floor, math.ceil(days * 86400 / (limit * MarketService.LTTB_OVERSAMPLE)))
+            return 'lttb', cutoff_date, width, limit, tier
+
+        if limit and resolution != 'raw':
+            return 'bucket', cutoff_date, max(floor, math.ceil(days * 86400 / limit)), limit, tier
+
+        if tier is not None:
+            # One point per candle
+            return 'bucket', cutoff_date, floor, None, tier
+
+        return 'raw', cutoff_date, None, None, None
+
+    @staticmethod
+    def finish_price_history(mode, points, limit):
+        """Apply the in-memory step of a plan to bucketed points"""
+        if mode == 'lttb':
+            return MarketService._lttb(points, limit)
+        return points[-limit:] if limit else points
+
+    @staticmethod
+    def get_price_history(seed_id, timeframe='1w', limit=None, resolution=None):
+        """Get price history for a specific seed, downsampled in the database
+        according to price_history_plan."""
+        mode, cutoff_date, width, limit, tier = MarketService.price_history_plan(timeframe, limit, resolution)
+
+        if mode == 'raw':
+            query = (SeedPrice.query
+                    .filter(SeedPrice.seed_id == seed_id,
+                           SeedPrice.recorded_at >= cutoff_date)
+                    .order_by(SeedPrice.recorded_at))
             return [price.to_dict() for price in query.all()]
 
+        points = MarketService._bucketed_prices(seed_id, cutoff_date, width, tier)
+        return MarketService.finish_price_history(mode, points, limit)
+
     @staticmethod
-    def update_seed_prices():
-        """Update all seed prices with new calculated values"""
-        seeds = Seed.query.all()
-        updates = []
-        
-        for seed in seeds:
-            latest_price = (SeedPrice.query
-                          .filter_by(seed_id=seed.id)
-                          .order_by(SeedPrice.recorded_at.desc())
-                          .first())
-            
-            if latest_price:
-                new_price = MarketService.calculate_price_change(latest_price.price)
-                new_volume = random.randint(500, 10500)  # Random volume for now
-            else:
-                new_price = MarketService.calculate_base_price()
-                new_volume = random.randint(500, 10500)
-
-            price_record = SeedPrice(
-                seed_id=seed.id,
-                price=new_price,
-                volume=new_volume,
-                recorded_at=datetime.now()
+    def get_price_history_json(seed_id, timeframe='1w', limit=None, resolution=None):
+        """get_price_history encoded as response-ready JSON bytes.
+
+        Raw history is selected as plain column tuples and encoded directly,
+        skipping ORM hydration, the identity map and per-row dicts.
+        """
+        mode, cutoff_date, width, limit, tier = MarketService.price_history_plan(timeframe, limit, resolution)
+
+        if mode == 'raw':
+            rows = db.session.execute(
+                select(SeedPrice.id, SeedPrice.price, SeedPrice.recorded_at,
+                       SeedPrice.seed_id, SeedPrice.volume)
+                .where(SeedPrice.seed_id == seed_id,
+                       SeedPrice.recorded_at >= cutoff_date)
+                .order_by(SeedPrice.recorded_at)
             )
-            updates.append(price_record)
+            return encode_price_rows(rows)
+
+        points = MarketService._bucketed_prices(seed_id, cutoff_date, width, tier)
+        return dumps_like_jsonify(MarketService.finish_price_history(mode, points, limit))
+
+    @staticmethod
+    def get_price_page_json(seed_id, page, timeframe='1w', limit=None, resolution=None):
+        """One keyset page of get_price_history_json, wrapped with cursors.
+
+        Raw history is paged on (recorded_at, id) with the same index probe
+        whichever page is asked for. Downsampled history is already bounded
+        by limit/resolution and comes back whole as a single page.
+        """
+        mode, cutoff_date, width, limit, tier = MarketService.price_history_plan(timeframe, limit, resolution)
+
+        if mode == 'raw':
+            query = keyset_query(
+                select(SeedPrice.id, SeedPrice.price, SeedPrice.recorded_at,
+                       SeedPrice.seed_id, SeedPrice.volume)
+                .where(SeedPrice.seed_id == seed_id,
+                       SeedPrice.recorded_at >= cutoff_date),
+                [SeedPrice.recorded_at, SeedPrice.id], page)
+            result = assemble_page(db.session.execute(query), page, MarketService.PRICE_CURSOR[0],
+                                   key=lambda row: (row.recorded_at, row.id))
+            return encode_price_page(result.rows, result)
 
-        db.session.bulk_save_objects(updates)
+        points = MarketService._bucketed_prices(seed_id, cutoff_date, width, tier)
+        return dumps_like_jsonify(page_body(MarketService.finish_price_history(mode, points, limit),
+                                            Page(None, None, None, page.size)))
+
+    @staticmethod
+    def update_seed_prices(engine=None):
+        """Update all seed prices with new calculated values.
+
+        Reads every seed's last price in one query, advances all of them with a
+        single vectorized step, and writes the tick with one multi-row insert.
+        """
+        engine = engine or MarketService.price_engine
+        rows = MarketService._latest_price_rows(depth=1, seed_entity=Seed.id)
+        if not rows:
+            return 0
+
+        seed_ids = [seed_id for seed_id, _, _, _ in rows]
+        last_prices = np.array([np.nan if price is None else price for _, price, _, _ in rows])
+        new_prices, new_volumes = engine.step(last_prices)
+
+        recorded_at = datetime.now()
+        updates = [Tick(seed_id, price, volume, recorded_at)
+                   for seed_id, price, volume in zip(seed_ids, new_prices.tolist(), new_volumes.tolist())]
+        previous_prices = {seed_id: price for seed_id, price, _, _ in rows if price is not None}
+        return MarketService.record_tick(updates, previous_prices)
+
+    @staticmethod
+    def record_tick(updates, previous_prices):
+        """Persist one tick of Ticks with a single multi-row insert, roll it into
+        the candles and notify caches and stream clients"""
+        MarketService.write_ticks(updates)
         db.session.commit()
-        return len(updates)
\ No newline at end of file
+        MarketService.announce_tick(updates, previous_prices)
+        return len(updates)
+
+    @staticmethod
+    def write_ticks(updates):
+        """Insert Ticks (one or many ticks' worth) and roll them into the candles
+        inside the caller's transaction; the caller commits"""
+        db.session.execute(SeedPrice.__table__.insert(), [tick._asdict() for tick in updates])
+        CandleService.record_ticks(updates)
+
+    @staticmethod
+    def announce_tick(updates, previous_prices, bump_cache=True):
+        """Tell metrics, the response cache and stream clients about a committed tick"""
+        app_metrics.observe_tick(len(updates))
+        if bump_cache:
+            response_cache.bump_version()
+        market_stream.publish(MarketService.build_tick_event(updates, previous_prices))
+
+    @staticmethod
+    def build_tick_event(price_records, previous_prices):
+        """Describe one tick for streaming clients: new prices plus deltas"""
+        prices = []
+        for record in price_records:
+            previous = previous_prices.get(record.seed_id, record.price)
+            change = round(record.price - previous, 2)
+            prices.append({
+                'seed_id': record.seed_id,
+                'price': record.price,
+                'previousPrice': previous,
+                'change': change,
+                'changePercent': round((change / previous * 100), 1) if previous > 0 else 0,
+                'volume': record.volume,
+                'recorded_at': record.recorded_at.isoformat() if record.recorded_at else None
+            })
+        return {
+            'type': 'tick',
+            'prices': prices,
+            'marketStats': {
+                'totalVolume': sum(record.volume for record in price_records),
+                'marketCap': sum(record.price * 1000 for record in price_records),
+                'seedCount': len(price_records)
+            }
+        }
\ No newline at end of file
@@ -0,0 +1,146 @@
+import logging
+from datetime import datetime, timedelta
+from config import Config
+from models.models import db, SeedPrice, SeedCandle, RetentionCheckpoint
+from services.candles import CandleService
+from sqlalchemy import delete, func, select
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionService:
+    """
+    Tiered retention for price data:
+
+    - raw seed_prices for RAW_RETENTION_DAYS (with their 1m candles),
+    - 1h candles for HOURLY_RETENTION_DAYS,
+    - 1d candles for DATA_RETENTION_DAYS.
+
+    compact() walks the days older than the raw horizon in order. For each
+    day it rebuilds the 1h and 1d candles of every seed from that day's raw
+    rows, then drops those rows, and records the day in the same transaction,
+    so each day is read once even when rows are kept for a partition drop. A
+    crash rolls the day back and the next run resumes from the checkpoint.
+    Days are rebuilt whole because the raw horizon is aligned to midnight.
+    """
+
+    CHECKPOINT = 'seed_prices_compaction'
+    COMPACTED_PERIODS = ['1h', '1d']
+
+    @staticmethod
+    def horizons(now=None, raw_days=None, hourly_days=None, data_days=None):
+        """Cutoff datetimes for each tier, aligned to midnight"""
+        to_day = CandleService.PERIODS['1d']
+        now = now or datetime.now()
+        # An explicit 0 is a real horizon (keep nothing), not "use the default"
+        if raw_days is None:
+            raw_days = Config.RAW_RETENTION_DAYS
+        if hourly_days is None:
+            hourly_days = Config.HOURLY_RETENTION_DAYS
+        if data_days is None:
+            data_days = Config.DATA_RETENTION_DAYS
+        return {
+            'raw': to_day(now - timedelta(days=raw_days)),
+            '1h': to_day(now - timedelta(days=hourly_days)),
+            '1d': to_day(now - timedelta(days=data_days)),
+        }
+
+    @staticmethod
+    def compact(cutoff, batch_size=5000, delete_raw=True):
+        """Fold raw rows recorded before `cutoff` into 1h/1d candles, then drop them.
+        With delete_raw=False (partitioned tables) rows are left for the
+        partition drop. Returns the number of raw rows folded in."""
+        checkpoint = db.session.get(RetentionCheckpoint, RetentionService.CHECKPOINT)
+        if checkpoint is None:
+            checkpoint = RetentionCheckpoint(name=RetentionService.CHECKPOINT)
+            db.session.add(checkpoint)
+        if checkpoint.cutoff != cutoff:
+            # New run; an unfinished older run is covered since this range is a superset
+            checkpoint.cutoff = cutoff
+            checkpoint.last_day = None
+        db.session.commit()
+
+        one_day = timedelta(days=1)
+        if checkpoint.last_day is not None:
+            day = checkpoint.last_day + one_day
+        elif checkpoint.completed_cutoff is not None:
+            # Older rows were compacted by the last finished run
+            day = checkpoint.completed_cutoff
+        else:
+            oldest = db.session.execute(
+                select(func.min(SeedPrice.recorded_at)).where(SeedPrice.recorded_at < cutoff)
+            ).scalar()
+            day = CandleService.PERIODS['1d'](oldest) if oldest is not None else cutoff
+
+        processed = 0
+        while day < cutoff:
+            # A day without raw rows keeps its candles, which may be all that is left of it
+            if RetentionService._has_raw_rows(day, day + one_day):
+                folded = RetentionService._rebuild_day(day, delete_raw, batch_size)
+                checkpoint.last_day = day
+                db.session.commit()
+                processed += folded
+                logger.info(f"Compacted {folded} raw price rows from {day:%Y-%m-%d}")
+            day += one_day
+
+        checkpoint.completed_cutoff = cutoff
+        db.session.commit()
+        return processed
+
+    @staticmethod
+    def _has_raw_rows(start, end):
+        return db.session.execute(
+            select(SeedPrice.id).where(SeedPrice.recorded_at >= start, SeedPrice.recorded_at < end).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def _rebuild_day(day, delete_raw, batch_size):
+        """Replace every seed's candles for one day from its raw rows and
+        return how many raw rows it held; caller commits. Rows are streamed
+        per seed, so memory stays bounded however busy the day was."""
+        end = day + timedelta(days=1)
+        # Minute candles share the raw tier and go with it
+        db.session.execute(delete(SeedCandle)
+                           .where(SeedCandle.period.in_(RetentionService.COMPACTED_PERIODS + ['1m']),
+                                  SeedCandle.bucket_start >= day, SeedCandle.bucket_start < end)
+                           .execution_options(synchronize_session=False))
+
+        ticks = db.session.execute(
+            select(SeedPrice.seed_id, SeedPrice.price, SeedPrice.volume, SeedPrice.recorded_at)
+            .where(SeedPrice.recorded_at >= day, SeedPrice.recorded_at < end)
+            .order_by(SeedPrice.seed_id, SeedPrice.recorded_at)
+            .execution_options(yield_per=batch_size)
+        )
+        folded = 0
+        pending = []
+        current_seed = None
+        for row in ticks:
+            # Only flush on a seed boundary so no candle is split across writes
+            if row.seed_id != current_seed and len(pending) >= batch_size:
+                CandleService._write_candles(pending, RetentionService.COMPACTED_PERIODS)
+                folded += len(pending)
+                pending = []
+            current_seed = row.seed_id
+            pending.append(tuple(row))
+        CandleService._write_candles(pending, RetentionService.COMPACTED_PERIODS)
+        folded += len(pending)
+
+        if delete_raw:
+            db.session.execute(delete(SeedPrice)
+                               .where(SeedPrice.recorded_at >= day, SeedPrice.recorded_at < end)
+                               .execution_options(synchronize_session=False))
+        return folded
+
+    @staticmethod
+    def prune_candles(horizons):
+        """Drop candles that have aged out of their tier"""
+        removed = 0
+        for periods, cutoff in ((['1m'], horizons['raw']), (['1h'], horizons['1h']),
+                                (['1d'], horizons['1d'])):
+            removed += db.session.execute(
+                delete(SeedCandle)
+                .where(SeedCandle.period.in_(periods), SeedCandle.bucket_start < cutoff)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.session.commit()
+        return removed
@@ -0,0 +1,46 @@
+from collections import namedtuple
+import numpy as np
+
+# Lightweight stand-in for a SeedPrice row; CandleService and tick events only
+# read these attributes, so ticks never need ORM objects
+Tick = namedtuple('Tick', ['seed_id', 'price', 'volume', 'recorded_at'])
+
+
+class BatchPriceEngine:
+    """
+    Vectorized version of MarketService.calculate_price_change /
+    calculate_base_price that advances every seed in one NumPy operation.
+
+    Semantics match the scalar code: each seed gets a random +/-2% trend plus
+    uniform noise scaled by volatility, prices never drop below the 0.20 floor,
+    and seeds without a previous price start at a base price of 1-6 dollars.
+    Pass `seed` for deterministic output in tests.
+    """
+
+    PRICE_FLOOR = 0.2
+    TREND_STEP = 0.02
+    BASE_PRICE_RANGE = (1, 6)
+    VOLUME_RANGE = (500, 10500)  # Inclusive, like random.randint
+
+    def __init__(self, seed=None, volatility=0.02):
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+
+    def step(self, last_prices):
+        """
+        Given an array of last prices (NaN where a seed has no history), return
+        (new_prices, volumes) arrays of the same length.
+        """
+        last_prices = np.asarray(last_prices, dtype=np.float64)
+        count = last_prices.shape[0]
+
+        trend = np.where(self.rng.random(count) > 0.5, 1.0, -1.0)
+        change = (self.rng.random(count) - 0.5) * self.volatility + trend * self.TREND_STEP
+        new_prices = np.maximum(self.PRICE_FLOOR, last_prices + last_prices * change)
+
+        missing = np.isnan(last_prices)
+        if missing.any():
+            new_prices[missing] = self.rng.uniform(*self.BASE_PRICE_RANGE, size=int(missing.sum()))
+
+        volumes = self.rng.integers(self.VOLUME_RANGE[0], self.VOLUME_RANGE[1] + 1, size=count)
+        return np.round(new_prices, 2), volumes
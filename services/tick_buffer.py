@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+from collections import deque
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from models.models import db, Seed
+from services.market import MarketService
+from utils.metrics import app_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """The write-behind buffer stayed full for TICK_BUFFER_BLOCK_SECONDS"""
+
+
+class TickBuffer:
+    """
+    Write-behind queue between MarketEngine and seed_prices, so sub-second
+    ticks never cost one transaction each.
+
+    put() queues a tick's rows in memory. A flusher thread writes everything
+    queued as a single transaction (one multi-row insert and one candle
+    rollup) every `flush_ms` milliseconds, or sooner once `flush_rows` rows
+    are waiting. Stream clients and the response cache hear about ticks only
+    after they commit.
+
+    The buffer holds at most `max_rows` rows, counting a flush in progress.
+    When the database falls behind, put() blocks for up to `block_seconds`
+    and then raises BufferFull, so the engine slows to what the database can
+    absorb instead of growing without bound. A failed flush is retried with
+    backoff. When the database rejects a batch, rows for seeds deleted since
+    they were queued are dropped, `on_unknown_seeds` is called (MarketEngine
+    reloads its seed set) and the rest is written; a batch still rejected
+    after that is dropped and counted.
+    """
+
+    MAX_BACKOFF_SECONDS = 5
+
+    def __init__(self, app=None, flush_ms=500, flush_rows=5000, max_rows=50000, block_seconds=5):
+        self.app = app
+        self.flush_ms = flush_ms
+        self.flush_rows = flush_rows
+        self.max_rows = max(max_rows, flush_rows)
+        self.block_seconds = block_seconds
+        self._pending = deque()
+        self._rows = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread = None
+        self.on_unknown_seeds = None
+
+    @classmethod
+    def from_config(cls, app):
+        return cls(app,
+                   flush_ms=app.config.get('TICK_FLUSH_MS', 500),
+                   flush_rows=app.config.get('TICK_FLUSH_ROWS', 5000),
+                   max_rows=app.config.get('TICK_BUFFER_ROWS', 50000),
+                   block_seconds=app.config.get('TICK_BUFFER_BLOCK_SECONDS', 5))
+
+    def __len__(self):
+        return self._rows
+
+    def put(self, updates, previous_prices):
+        """Queue one tick's Ticks; blocks while the buffer is full"""
+        rows = len(updates)
+        with self._cond:
+            if self._rows and self._rows + rows > self.max_rows:
+                start = time.perf_counter()
+                has_room = self._cond.wait_for(lambda: not self._rows or self._rows + rows <= self.max_rows,
+                                               timeout=self.block_seconds)
+                app_metrics.observe_tick_backpressure(time.perf_counter() - start)
+                if not has_room:
+                    app_metrics.count_dropped_ticks(rows, 'buffer_full')
+                    raise BufferFull(f"{self._rows} price rows still waiting to be written")
+            self._pending.append((updates, previous_prices))
+            self._rows += rows
+            app_metrics.observe_tick_buffer(self._rows)
+            if self._rows >= self.flush_rows:
+                self._cond.notify_all()
+
+    def flush(self):
+        """Write queued ticks (up to about flush_rows rows) in one transaction.
+        Needs an app context; returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                batch = []
+                rows = 0
+                while self._pending and (not batch or rows < self.flush_rows):
+                    updates, previous_prices = self._pending.popleft()
+                    batch.append((updates, previous_prices))
+                    rows += len(updates)
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            queued = rows
+            try:
+                try:
+                    MarketService.write_ticks([tick for updates, _ in batch for tick in updates])
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+                    # Usually a seed deleted since its ticks were queued: drop
+                    # just those rows and write the rest
+                    batch, rows = self._known_seeds_only(batch)
+                    if rows == queued:
+                        raise
+                    MarketService.write_ticks([tick for updates, _ in batch for tick in updates])
+                    db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                logger.error(f"Dropping {rows} buffered price rows the database rejected: {str(e)}")
+                app_metrics.count_dropped_ticks(rows, 'rejected')
+                self._release(queued)
+                return 0
+            except Exception:
+                db.session.rollback()
+                self._release(queued - rows)
+                with self._cond:
+                    # Back to the front, in order, for the retry
+                    self._pending.extendleft(reversed(batch))
+                raise
+            app_metrics.observe_tick_flush(rows, time.perf_counter() - start)
+            self._release(queued)
+
+            for i, (updates, previous_prices) in enumerate(batch):
+                # One cache invalidation covers the whole flush
+                MarketService.announce_tick(updates, previous_prices, bump_cache=i == len(batch) - 1)
+            return rows
+
+    def _known_seeds_only(self, batch):
+        """Drop rows for seeds that no longer exist; returns (batch, rows left)"""
+        seed_ids = {tick.seed_id for updates, _ in batch for tick in updates}
+        known = set(db.session.execute(select(Seed.id).where(Seed.id.in_(seed_ids))).scalars())
+        if known == seed_ids:
+            return batch, sum(len(updates) for updates, _ in batch)
+        kept = [([tick for tick in updates if tick.seed_id in known], previous_prices)
+                for updates, previous_prices in batch]
+        kept = [(updates, previous_prices) for updates, previous_prices in kept if updates]
+        rows = sum(len(updates) for updates, _ in kept)
+        dropped = sum(len(updates) for updates, _ in batch) - rows
+        logger.warning(f"Dropping {dropped} buffered price rows for deleted seeds {sorted(seed_ids - known)}")
+        app_metrics.count_dropped_ticks(dropped, 'unknown_seed')
+        if self.on_unknown_seeds is not None:
+            self.on_unknown_seeds()
+        return kept, rows
+
+    def discard(self, reason):
+        """Drop everything queued, e.g. when the engine loses its lease and
+        another engine's ticks must not be interleaved with these"""
+        with self._cond:
+            rows = sum(len(updates) for updates, _ in self._pending)
+            self._pending.clear()
+        if rows:
+            logger.warning(f"Discarding {rows} buffered price rows: {reason}")
+            app_metrics.count_dropped_ticks(rows, reason)
+            self._release(rows)
+        return rows
+
+    def _release(self, rows):
+        with self._cond:
+            self._rows -= rows
+            app_metrics.observe_tick_buffer(self._rows)
+            self._cond.notify_all()
+
+    def start(self):
+        """Flush from a background thread until stop()"""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='tick-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=30):
+        """Stop the flusher after writing everything still queued"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._rows >= self.flush_rows,
+                                    timeout=self.flush_ms / 1000)
+                stopping = self._stopping
+            try:
+                with self.app.app_context():
+                    while self.flush() and (stopping or self._rows >= self.flush_rows):
+                        pass
+                failures = 0
+            except Exception as e:
+                failures += 1
+                backoff = min(self.MAX_BACKOFF_SECONDS, self.flush_ms / 1000 * 2 ** failures)
+                logger.error(f"Tick flush failed ({len(self)} rows waiting), retrying in {backoff:.1f}s: {str(e)}")
+                if stopping:
+                    return
+                time.sleep(backoff)
+                continue
+            if stopping:
+                return
@@ -0,0 +1,106 @@
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from models.models import db, Seed, SeedPrice, User
+from routes.api import api
+from routes.auth import auth
+from utils.cache import identity_cache, response_cache
+from utils.passwords import password_hasher
+from utils.blocklist import token_blocklist
+from utils.broadcast import market_stream
+from utils.query_counter import track_queries
+
+
+@pytest.fixture
+def database_uri():
+    """In-memory SQLite; modules that need PostgreSQL override this"""
+    return 'sqlite://'
+
+
+@pytest.fixture
+def app(database_uri):
+    """Flask app wired like app.py, backed by `database_uri`"""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY='test-secret',
+        JWT_SECRET_KEY='test-secret',
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # Cheap hashes keep auth tests fast
+        PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+    )
+    db.init_app(app)
+    token_blocklist.init_app(app, JWTManager(app))
+    response_cache.init_app(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    market_stream.init_app(app)
+    app.register_blueprint(api, url_prefix='/api')
+    app.register_blueprint(auth, url_prefix='/api/auth')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization header for a freshly registered user"""
+    user = User(username='trader', email='trader@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def make_seeds(app):
+    """Create `count` seeds, each with `ticks` price rows one minute apart"""
+    def _make(count, ticks=3):
+        now = datetime.now()
+        seeds = []
+        for i in range(count):
+            seed = Seed(name=f'Seed {i}', species=f'Species {i}', description='test')
+            db.session.add(seed)
+            db.session.flush()
+            for t in range(ticks):
+                db.session.add(SeedPrice(
+                    seed_id=seed.id,
+                    price=round(1.0 + i + t * 0.5, 2),
+                    volume=1000 + t,
+                    recorded_at=now - timedelta(minutes=ticks - t)
+                ))
+            seeds.append(seed)
+        db.session.commit()
+        # Like every API write, so validators and cached reads see the change
+        response_cache.bump_version()
+        return seeds
+    return _make
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager factory that counts SQL statements sent to the engine"""
+    return track_queries
+
+
+@pytest.fixture
+def within_query_budget(app):
+    """Context manager asserting a block runs at most `limit` statements and no N+1 pattern"""
+    @contextmanager
+    def _check(limit):
+        with track_queries() as queries:
+            yield queries
+        assert queries.count <= limit, queries.report()
+        assert not queries.n_plus_one_suspects(), queries.report()
+    return _check
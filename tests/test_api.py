@@ -1,39 +1,42 @@
-from flask import Flask, jsonify, request
-from backend.services.database import get_db_connection
-
-app = Flask(__name__)
-
-@app.route('/api/items', methods=['GET'])
-def get_items():
-    conn = get_db_connection()
-    items = conn.execute('SELECT * FROM items').fetchall()
-    conn.close()
-    return jsonify([dict(item) for item in items])
-
-@app.route('/api/items', methods=['POST'])
-def create_item():
-    new_item = request.json
-    conn = get_db_connection()
-    conn.execute('INSERT INTO items (name, description) VALUES (?, ?)', 
-                 (new_item['name'], new_item['description']))
-    conn.commit()
-    conn.close()
-    return jsonify(new_item), 201
-
-@app.route('/api/items/<int:item_id>', methods=['PUT'])
-def update_item(item_id):
-    updated_item = request.json
-    conn = get_db_connection()
-    conn.execute('UPDATE items SET name = ?, description = ? WHERE id = ?', 
-                 (updated_item['name'], updated_item['description'], item_id))
-    conn.commit()
-    conn.close()
-    return jsonify(updated_item)
-
-@app.route('/api/items/<int:item_id>', methods=['DELETE'])
-def delete_item(item_id):
-    conn = get_db_connection()
-    conn.execute('DELETE FROM items WHERE id = ?', (item_id,))
-    conn.commit()
-    conn.close()
-    return jsonify({'result': True})
\ No newline at end of file
+from models.models import db, Seed, SeedPrice, SeedCandle
+
+
+def test_list_and_get_seeds(client, make_seeds):
+    seeds = make_seeds(2)
+
+    listed = client.get('/api/seeds').get_json()
+    assert [seed['id'] for seed in listed['items']] == [seed.id for seed in seeds]
+    assert listed['next_cursor'] is None and listed['prev_cursor'] is None
+    legacy = client.get('/api/seeds?paginate=false').get_json()
+    assert legacy == listed['items']
+    assert client.get(f'/api/seeds/{seeds[0].id}').get_json()['name'] == 'Seed 0'
+    assert client.get('/api/seeds/999').status_code == 404
+
+
+def test_latest_price_and_summary(client, make_seeds):
+    seed = make_seeds(1, ticks=3)[0]
+
+    assert client.get(f'/api/seeds/{seed.id}/latest-price').get_json()['price'] == 2.0
+    summary = client.get('/api/market/summary').get_json()
+    assert summary['seeds'][0]['currentPrice'] == 2.0
+    assert summary['seeds'][0]['previousPrice'] == 1.5
+
+
+def test_writes_require_auth(client):
+    assert client.post('/api/seeds', json={'name': 'Kale'}).status_code == 401
+
+
+def test_create_update_delete_seed(client, auth_headers):
+    created = client.post('/api/seeds', json={'name': 'Kale', 'price': 3.5, 'quantity': 10},
+                          headers=auth_headers)
+    assert created.status_code == 201
+    seed_id = created.get_json()['id']
+    assert SeedPrice.query.filter_by(seed_id=seed_id).count() == 1
+    assert SeedCandle.query.filter_by(seed_id=seed_id).count() == 3
+
+    updated = client.put(f'/api/seeds/{seed_id}', json={'price': 4.0}, headers=auth_headers)
+    assert updated.get_json()['price'] == 4.0
+    assert client.get(f'/api/seeds/{seed_id}/latest-price').get_json()['price'] == 4.0
+
+    assert client.delete(f'/api/seeds/{seed_id}', headers=auth_headers).status_code == 200
+    assert db.session.get(Seed, seed_id) is None
@@ -0,0 +1,131 @@
+import threading
+import time
+import pytest
+from models.models import db, User
+from utils.passwords import HashingBusy, PasswordHasher, password_hasher
+
+
+def register_and_login(client):
+    client.post('/api/auth/register', json={'username': 'ana', 'email': 'ana@example.com', 'password': 'pw'})
+    return client.post('/api/auth/login', json={'username': 'ana', 'password': 'pw'}).get_json()
+
+
+def test_login_and_me_round_trip(client):
+    tokens = register_and_login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+
+    me = client.get('/api/auth/me', headers=headers)
+    assert me.status_code == 200
+    assert me.get_json()['username'] == 'ana'
+    assert client.post('/api/auth/login', json={'username': 'ana', 'password': 'nope'}).status_code == 401
+
+
+def test_me_and_refresh_served_from_identity_cache(client, count_queries):
+    tokens = register_and_login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    client.get('/api/auth/me', headers=headers)
+
+    with count_queries() as queries:
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+        refreshed = client.post('/api/auth/refresh',
+                                headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+    assert refreshed.status_code == 200
+    assert queries.count == 0
+
+
+def test_user_update_invalidates_identity_cache(client):
+    tokens = register_and_login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    client.get('/api/auth/me', headers=headers)
+
+    user = User.query.filter_by(username='ana').one()
+    user.first_name = 'Ana'
+    db.session.commit()
+
+    assert client.get('/api/auth/me', headers=headers).get_json()['first_name'] == 'Ana'
+
+
+def test_login_upgrades_hash_after_cost_change(client, app):
+    register_and_login(client)
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    password_hasher.init_app(app)
+
+    client.post('/api/auth/login', json={'username': 'ana', 'password': 'pw'})
+    assert User.query.filter_by(username='ana').one().password_hash.startswith('pbkdf2:sha256:2000$')
+
+
+def test_hasher_rejects_callers_beyond_its_queue():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, queue_size=1)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=hasher._submit, args=(lambda: started.set() or release.wait(),))
+    blocker.start()
+    started.wait()
+    try:
+        # Refused at once, without waiting for the slot to free up
+        began = time.perf_counter()
+        with pytest.raises(HashingBusy):
+            hasher.hash('pw')
+        assert time.perf_counter() - began < 0.5
+    finally:
+        release.set()
+        blocker.join()
+    assert hasher.verify(hasher.hash('pw'), 'pw')
+    hasher.shutdown()
+
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    tokens = register_and_login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+
+    assert client.post('/api/auth/logout', headers=headers,
+                       json={'refresh_token': tokens['refresh_token']}).status_code == 200
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+    assert client.post('/api/auth/refresh',
+                       headers={'Authorization': f"Bearer {tokens['refresh_token']}"}).status_code == 401
+
+
+def test_blocklist_check_needs_no_query_between_syncs(client, count_queries):
+    tokens = register_and_login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    client.get('/api/auth/me', headers=headers)
+
+    with count_queries() as queries:
+        for _ in range(3):
+            client.get('/api/auth/me', headers=headers)
+    assert queries.count == 0
+
+
+def test_other_workers_pick_up_revocations_on_sync(client):
+    from utils.blocklist import TokenBlocklist
+    from flask_jwt_extended import decode_token
+
+    tokens = register_and_login(client)
+    other_worker = TokenBlocklist(sync_interval=0)
+    jti = decode_token(tokens['access_token'])['jti']
+    assert not other_worker.is_revoked(jti)
+
+    client.post('/api/auth/logout', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+    assert other_worker.is_revoked(jti)
+
+
+def test_temp_market_token_can_be_revoked(client, monkeypatch):
+    monkeypatch.setenv('RENDER_EXTERNAL_HOSTNAME', 'seedmart.example.com')
+    token = client.get('/api/auth/temp-market-token').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.post('/api/market/update', headers=headers).status_code == 401
+
+
+def test_expired_revocations_are_purged(app):
+    from datetime import datetime, timedelta
+    from models.models import db, RevokedToken
+    from utils.blocklist import token_blocklist
+
+    db.session.add(RevokedToken(jti='old', expires_at=datetime.utcnow() - timedelta(minutes=1),
+                                revoked_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+    token_blocklist.revoke({'jti': 'new', 'exp': (datetime.utcnow() + timedelta(hours=1)).timestamp()})
+
+    assert [row.jti for row in RevokedToken.query.all()] == ['new']
+    assert not token_blocklist.is_revoked('old')
@@ -0,0 +1,9 @@
+import json
+from benchmarks import bench_price_history
+
+
+def test_both_paths_return_the_same_rows(tmp_path, capsys):
+    bench_price_history.run([200], database_url=f"sqlite:///{tmp_path / 'bench.db'}", repeat=1, trace_memory=False)
+
+    records = {record['path']: record for record in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert records['direct']['response_bytes'] == records['orm']['response_bytes'] > 200
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+from models.models import db, Seed, SeedCandle, SeedPrice
+from seed_db import SEED_TYPES, historical_price_rows, seed_database
+from utils.bulk_load import generate_rows, load_price_rows
+
+
+def test_load_price_rows_in_chunks(make_seeds, count_queries):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    start = datetime(2026, 1, 1)
+    rows = ((seed_id, 1.0 + i / 100, 500 + i, start + timedelta(hours=i)) for i in range(250))
+    chunks = []
+
+    with count_queries() as queries:
+        written = load_price_rows(rows, chunk_size=100, progress=chunks.append)
+    db.session.commit()
+
+    assert written == 250
+    assert chunks == [100, 100, 50]
+    assert queries.count == 3
+    assert SeedPrice.query.count() == 250
+
+
+def test_parallel_generation_gives_each_seed_its_own_series():
+    tasks = [(1, 30, 11), (2, 30, 22)]
+    serial = list(generate_rows(historical_price_rows, tasks))
+    parallel = list(generate_rows(historical_price_rows, tasks, workers=2))
+
+    assert [row[:3] for row in serial] == [row[:3] for row in parallel]
+    first = [price for seed_id, price, _, _ in serial if seed_id == 1]
+    second = [price for seed_id, price, _, _ in serial if seed_id == 2]
+    assert first != second
+
+
+def test_seed_database_bulk_loads_history(app):
+    seed_database(days=20)
+
+    assert Seed.query.count() == len(SEED_TYPES)
+    assert SeedPrice.query.count() == len(SEED_TYPES) * 20
+    assert SeedCandle.query.filter_by(period='1d').count() == len(SEED_TYPES) * 20
@@ -0,0 +1,81 @@
+from services.market import MarketService
+from utils.cache import DatabaseVersion, MemoryBackend, response_cache
+
+
+def test_summary_is_served_from_cache_until_tick(client, make_seeds, count_queries):
+    make_seeds(2)
+    first = client.get('/api/market/summary')
+
+    with count_queries() as queries:
+        second = client.get('/api/market/summary')
+    # The shared data version is memoised, so a hit never reaches the database
+    assert queries.count == 0
+    assert second.get_json() == first.get_json()
+    assert response_cache.stats()['hits'] == 1
+
+    MarketService.update_seed_prices()
+    with count_queries() as queries:
+        third = client.get('/api/market/summary')
+    assert queries.count > 0
+    assert third.get_json() != first.get_json()
+
+
+def test_query_string_is_part_of_the_key(client, make_seeds):
+    make_seeds(3)
+    assert len(client.get('/api/seeds').get_json()['items']) == 3
+    assert client.get('/api/seeds/1').get_json()['id'] == 1
+    assert client.get('/api/seeds/2').get_json()['id'] == 2
+    assert response_cache.stats()['misses'] == 3
+
+
+def test_errors_are_not_cached(client, app):
+    assert client.get('/api/seeds/99').status_code == 404
+    assert response_cache.stats()['size'] == 0
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', b'1', 30)
+    backend.set('b', b'2', 30)
+    backend.get('a')
+    backend.set('c', b'3', 30)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == b'1'
+    assert backend.stats()['evictions'] == 1
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend()
+    backend.set('a', b'1', -1)
+    assert backend.get('a') is None
+
+
+def test_version_is_shared_through_the_database(app):
+    # Two workers: separate in-process entries, one database
+    other = MemoryBackend(versions=DatabaseVersion(ttl=0))
+    before = other.get_version()
+    response_cache.bump_version()
+
+    version, bumped_at = other.get_state()
+    assert version == before + 1 == response_cache.version()
+    assert bumped_at is not None
+
+
+def test_version_lookups_are_memoised(app, count_queries):
+    versions = DatabaseVersion(ttl=60)
+    versions.get_state()
+    with count_queries() as queries:
+        assert versions.get_state() == (0, None)
+    assert queries.count == 0
+
+    # This process's own bump is visible at once
+    assert versions.bump() == 1
+    with count_queries() as queries:
+        assert versions.get_state()[0] == 1
+    assert queries.count == 0
+
+    versions.ttl = 0
+    with count_queries() as queries:
+        versions.get_state()
+    assert queries.count == 1
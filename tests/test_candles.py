@@ -0,0 +1,49 @@
+from datetime import datetime
+from models.models import db, SeedCandle, SeedPrice
+from services.candles import CandleService
+from services.market import MarketService
+
+
+def test_ticks_roll_into_all_periods(make_seeds):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    at = datetime(2026, 1, 1, 12, 30, 5)
+    ticks = [SeedPrice(seed_id=seed_id, price=price, volume=10,
+                       recorded_at=at.replace(second=second))
+             for second, price in ((5, 2.0), (20, 3.5), (40, 1.5), (50, 2.5))]
+    CandleService.record_ticks(ticks[:2])
+    db.session.commit()
+    CandleService.record_ticks(ticks[2:])
+    db.session.commit()
+
+    for period in CandleService.PERIODS:
+        candle = SeedCandle.query.filter_by(seed_id=seed_id, period=period).one()
+        assert (candle.open, candle.high, candle.low, candle.close, candle.volume) == (2.0, 3.5, 1.5, 2.5, 40)
+
+
+def test_update_seed_prices_maintains_candles(make_seeds):
+    make_seeds(3, ticks=1)
+    MarketService.update_seed_prices()
+
+    assert SeedCandle.query.filter_by(period='1d').count() == 3
+
+
+def test_backfill_matches_raw_history(make_seeds):
+    make_seeds(2, ticks=5)
+    written = CandleService.backfill(batch_size=3)
+
+    daily = SeedCandle.query.filter_by(period='1d').order_by(SeedCandle.seed_id).all()
+    assert written == SeedCandle.query.count()
+    assert sum(candle.volume for candle in daily) == 2 * sum(1000 + t for t in range(5))
+
+
+def test_candles_endpoint(client, make_seeds):
+    seed_id = make_seeds(1, ticks=4)[0].id
+    CandleService.backfill()
+
+    response = client.get(f'/api/seeds/{seed_id}/candles?interval=1h')
+    assert response.status_code == 200
+    candles = response.get_json()
+    assert 1 <= len(candles) <= 2
+    assert set(candles[0]) == {'seed_id', 'interval', 'time', 'open', 'high', 'low', 'close', 'volume'}
+
+    assert client.get(f'/api/seeds/{seed_id}/candles?interval=5m').status_code == 400
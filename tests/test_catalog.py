@@ -0,0 +1,76 @@
+from models.models import db, Seed, SeedPrice, SeedCandle
+from services.catalog import CatalogService
+
+
+def test_bulk_create_and_replace(client, auth_headers, make_seeds):
+    existing = make_seeds(1, ticks=0)[0].id
+    body = [
+        {'name': 'Basil', 'species': 'Ocimum', 'quantity': 10, 'price': 2.5},
+        {'name': 'Dill'},
+        {'id': existing, 'name': 'Renamed', 'price': 3.0},
+        {'id': 9999, 'name': 'Ghost'},
+        {'species': 'no name'},
+    ]
+    response = client.post('/api/seeds/bulk', json=body, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert [result['status'] for result in data['results']] == ['created', 'created', 'updated', 'not_found', 'invalid']
+    assert (data['created'], data['updated'], data['not_found'], data['invalid']) == (2, 1, 1, 1)
+    basil = db.session.get(Seed, data['results'][0]['id'])
+    assert (basil.name, basil.quantity, basil.price) == ('Basil', 10, 2.5)
+    renamed = db.session.get(Seed, existing)
+    # POST replaces: fields left out are reset
+    assert (renamed.name, renamed.species, renamed.price) == ('Renamed', None, 3.0)
+    # Seeds created with or moved to a price get a price row and candles
+    assert {row.seed_id for row in SeedPrice.query} == {basil.id, existing}
+    assert SeedCandle.query.filter_by(period='1d').count() == 2
+
+
+def test_bulk_patch_changes_only_given_fields(client, auth_headers, make_seeds):
+    seeds = make_seeds(2, ticks=0)
+    body = [{'id': seeds[0].id, 'quantity': 7}, {'id': seeds[1].id, 'price': 9.5}, {'name': 'no id'}]
+    response = client.patch('/api/seeds/bulk', json={'seeds': body}, headers=auth_headers)
+    data = response.get_json()
+
+    assert [result['status'] for result in data['results']] == ['updated', 'updated', 'invalid']
+    first, second = db.session.get(Seed, seeds[0].id), db.session.get(Seed, seeds[1].id)
+    assert (first.name, first.species, first.quantity) == ('Seed 0', 'Species 0', 7)
+    assert second.price == 9.5
+    assert SeedPrice.query.filter_by(seed_id=seeds[1].id).count() == 1
+
+
+def test_bulk_statement_count_is_independent_of_size(app, make_seeds, count_queries):
+    def run(count):
+        seeds = make_seeds(count, ticks=0)
+        items = [{'name': f'New {i}', 'price': 1.0 + i} for i in range(count)]
+        items += [{'id': seed.id, 'name': seed.name, 'price': 2.0} for seed in seeds]
+        with count_queries() as queries:
+            results = CatalogService.bulk_upsert(items)
+        assert all(result['status'] in ('created', 'updated') for result in results)
+        # PostgreSQL batches INSERT ... RETURNING in parameter order; SQLite
+        # can't, so SQLAlchemy inserts new seeds row by row there
+        return sum(not statement.startswith('INSERT INTO seeds ') for statement in queries.statements)
+
+    run(1)  # the first write creates the shared cache version row
+    assert run(3) == run(60)
+
+
+def test_bulk_validates_request(client, auth_headers, app):
+    assert client.post('/api/seeds/bulk', json=[{'name': 'x'}]).status_code == 401
+    assert client.post('/api/seeds/bulk', json={'name': 'x'}, headers=auth_headers).status_code == 400
+    app.config['BULK_MAX_ITEMS'] = 2
+    assert client.post('/api/seeds/bulk', json=[{'name': 'x'}] * 3, headers=auth_headers).status_code == 413
+
+    data = client.post('/api/seeds/bulk', json=[{'name': 'x', 'price': -1}, {'name': 'y', 'quantity': 'lots'}],
+                       headers=auth_headers).get_json()
+    assert [result['error'] for result in data['results']] == [
+        'price must be a non-negative number', 'quantity must be a non-negative integer']
+    assert Seed.query.count() == 0
+
+
+def test_created_ids_follow_request_order(app):
+    items = [{'name': f'Seed {i:02}'} for i in range(25)]
+    results = CatalogService.bulk_upsert(items)
+    names = {seed.id: seed.name for seed in Seed.query}
+    assert [names[result['id']] for result in results] == [item['name'] for item in items]
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from models.models import db, CacheVersion
+from services.market import MarketService
+from utils.cache import DatabaseVersion, MemoryBackend, response_cache
+
+
+def test_summary_returns_304_for_matching_etag(client, make_seeds, count_queries):
+    make_seeds(2)
+    first = client.get('/api/market/summary')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    with count_queries() as queries:
+        second = client.get('/api/market/summary', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+    # The shared data version is memoised per worker
+    assert queries.count == 0
+
+    MarketService.update_seed_prices()
+    third = client.get('/api/market/summary', headers={'If-None-Match': first.headers['ETag']})
+    assert third.status_code == 200
+    assert third.headers['ETag'] != first.headers['ETag']
+
+
+def test_prices_honour_if_modified_since(client, make_seeds):
+    seed_id = make_seeds(1)[0].id
+    first = client.get(f'/api/seeds/{seed_id}/prices')
+
+    second = client.get(f'/api/seeds/{seed_id}/prices',
+                        headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert second.status_code == 304
+
+
+def test_etag_varies_with_query_string(client, make_seeds):
+    seed_id = make_seeds(1)[0].id
+    week = client.get(f'/api/seeds/{seed_id}/prices?timeframe=1w')
+    day = client.get(f'/api/seeds/{seed_id}/prices?timeframe=1d',
+                     headers={'If-None-Match': week.headers['ETag']})
+    assert day.status_code == 200
+
+
+def test_no_validators_when_the_version_is_unreachable(client, make_seeds, monkeypatch):
+    seed_id = make_seeds(1)[0].id
+    monkeypatch.setattr(response_cache, 'state', lambda: None)
+    response = client.get(f'/api/seeds/{seed_id}/prices')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_seed_edit_invalidates_validators(client, make_seeds, auth_headers):
+    seed_id = make_seeds(2)[0].id
+    # Last-Modified has one-second precision; age the seeding write past it
+    CacheVersion.query.update({'updated_at': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+    response_cache.backend.versions.ttl = 0
+    first = client.get('/api/market/summary')
+
+    client.put(f'/api/seeds/{seed_id}', json={'name': 'Renamed'}, headers=auth_headers)
+    by_etag = client.get('/api/market/summary', headers={'If-None-Match': first.headers['ETag']})
+    by_date = client.get('/api/market/summary', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert by_etag.status_code == 200 and by_date.status_code == 200
+    assert by_date.last_modified > first.last_modified
+
+
+def test_etag_does_not_depend_on_the_worker(app, client, make_seeds):
+    make_seeds(2)
+    first = client.get('/api/market/summary')
+
+    # A fresh worker starts with empty memory but reads the same shared version
+    backend = response_cache.backend
+    response_cache.backend = MemoryBackend(versions=DatabaseVersion())
+    try:
+        second = client.get('/api/market/summary', headers={'If-None-Match': first.headers['ETag']})
+    finally:
+        response_cache.backend = backend
+    assert second.status_code == 304
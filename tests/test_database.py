@@ -0,0 +1,49 @@
+from sqlalchemy import text
+import database
+from models.models import db
+
+
+def test_flask_sqlalchemy_uses_the_registry_engine(app):
+    assert database.get_engine(app.config['SQLALCHEMY_DATABASE_URI']) is db.engine
+
+
+def test_queue_pool_is_sized_from_the_connection_budget(monkeypatch):
+    monkeypatch.setattr(database.Config, 'DB_MAX_CONNECTIONS', 100)
+    monkeypatch.setattr(database.Config, 'DB_RESERVED_CONNECTIONS', 20)
+    monkeypatch.setattr(database.Config, 'WEB_CONCURRENCY', 4)
+    monkeypatch.setattr(database.Config, 'DB_INSTANCES', 2)
+    monkeypatch.setattr(database.Config, 'ASGI_WORKERS', 0)
+    options = database.pool_options()
+
+    assert options['pool_size'] + options['max_overflow'] == 10
+    assert options['poolclass'] is database.InstrumentedQueuePool
+
+
+def test_budget_leaves_room_for_asyncpg_pools(monkeypatch):
+    monkeypatch.setattr(database.Config, 'DB_MAX_CONNECTIONS', 100)
+    monkeypatch.setattr(database.Config, 'DB_RESERVED_CONNECTIONS', 10)
+    monkeypatch.setattr(database.Config, 'WEB_CONCURRENCY', 4)
+    monkeypatch.setattr(database.Config, 'DB_INSTANCES', 1)
+    monkeypatch.setattr(database.Config, 'ASGI_WORKERS', 2)
+    monkeypatch.setattr(database.Config, 'ASYNC_DB_POOL_SIZE', 20)
+    options = database.pool_options()
+
+    per_worker = options['pool_size'] + options['max_overflow']
+    # Four gunicorn workers and two uvicorn workers fit in 90 connections
+    assert per_worker == 12
+    assert 4 * per_worker + 2 * 20 <= 90
+
+
+def test_pool_stats_report_checkouts_and_waits(tmp_path):
+    engine = database.get_engine(f"sqlite:///{tmp_path / 'pool.db'}",
+                                 poolclass=database.InstrumentedQueuePool, pool_size=1, max_overflow=0)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        stats = database.pool_stats()
+        entry = next(value for key, value in stats.items() if 'pool.db' in key)
+        assert entry['checked_out'] == 1
+        assert entry['checkouts'] == 1
+        assert entry['max_overflow'] == 0
+
+    database._dispose_after_fork()
+    assert engine.pool.checkedin() == 0
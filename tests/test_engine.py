@@ -0,0 +1,62 @@
+from models.models import db, Seed, SeedPrice
+from scheduler import LeaderElection
+from services.engine import MarketEngine
+from services.simulation import BatchPriceEngine
+
+
+def test_load_recovers_state_in_one_query(make_seeds, count_queries):
+    make_seeds(3, ticks=2)
+    make_seeds(1, ticks=0)
+    engine = MarketEngine(BatchPriceEngine(seed=1))
+
+    with count_queries() as queries:
+        assert engine.load() == 4
+    assert queries.count == 1, queries.report()
+    assert engine.prices[:3].tolist() == [1.5, 2.5, 3.5]
+    assert engine.volumes.tolist() == [1001, 1001, 1001, 0]
+
+
+def test_tick_only_writes(make_seeds, count_queries):
+    make_seeds(5, ticks=1)
+    engine = MarketEngine(BatchPriceEngine(seed=2))
+    engine.load()
+
+    with count_queries() as queries:
+        assert engine.tick() == 5
+    # Candle rollups may read-merge outside Postgres; prices and seeds are never read
+    reads = [statement for statement in queries.statements if statement.lstrip().upper().startswith('SELECT')]
+    assert not any('seed_prices' in statement or 'FROM seeds' in statement for statement in reads)
+    assert sum('INSERT INTO seed_prices' in statement for statement in queries.statements) == 1
+
+    latest = SeedPrice.query.order_by(SeedPrice.id.desc()).first()
+    assert engine.prices[engine.seed_ids.index(latest.seed_id)] == latest.price
+
+
+def test_refresh_picks_up_new_and_deleted_seeds(make_seeds):
+    seeds = make_seeds(2, ticks=1)
+    engine = MarketEngine(BatchPriceEngine(seed=3), refresh_seconds=0)
+    engine.load()
+    kept_price = engine.prices[1]
+
+    SeedPrice.query.filter_by(seed_id=seeds[0].id).delete()
+    db.session.delete(seeds[0])
+    db.session.add(Seed(name='New', species='New', description='test'))
+    db.session.commit()
+
+    assert engine.tick() == 2
+    assert engine.seed_ids[0] == seeds[1].id
+    assert 1 <= engine.prices[1] <= 6
+    assert abs(engine.prices[0] - kept_price) <= kept_price * 0.03 + 0.005
+
+
+def test_run_ticks_only_while_leading(make_seeds):
+    make_seeds(2, ticks=1)
+    engine = MarketEngine(BatchPriceEngine(seed=4))
+    ticks = []
+    original_tick = engine.tick
+    engine.tick = lambda: ticks.append(original_tick())
+
+    engine.run(0, LeaderElection(db.engine, node_id='engine-a'), should_stop=lambda: len(ticks) >= 3)
+
+    assert ticks == [2, 2, 2]
+    assert SeedPrice.query.count() == 2 + 6
@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+from flask import jsonify
+from models.models import SeedPrice
+from services.export import ExportService
+
+
+def test_ndjson_export_streams_every_seed(client, make_seeds, auth_headers):
+    seeds = make_seeds(3, ticks=4)
+    ids = ','.join(str(seed.id) for seed in seeds)
+    response = client.get(f'/api/export/prices?seeds={ids}', headers=auth_headers)
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 12
+    assert lines[0] == json.loads(jsonify(SeedPrice.query.get(lines[0]['id']).to_dict()).data)
+
+
+def test_csv_export_filters_seeds_and_dates(client, make_seeds, auth_headers):
+    seeds = make_seeds(2, ticks=4)
+    prices = SeedPrice.query.filter_by(seed_id=seeds[1].id).order_by(SeedPrice.recorded_at).all()
+    start = prices[1].recorded_at.isoformat()
+    end = prices[3].recorded_at.isoformat()
+
+    response = client.get(f'/api/export/prices?format=csv&seeds={seeds[1].id}&start={start}&end={end}',
+                          headers=auth_headers)
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert [int(row['id']) for row in rows] == [prices[1].id, prices[2].id]
+
+
+def test_export_rejects_bad_arguments(client, app, auth_headers):
+    assert client.get('/api/export/prices?seeds=1&format=xml', headers=auth_headers).status_code == 400
+    assert client.get('/api/export/prices?start=yesterday', headers=auth_headers).status_code == 400
+
+
+def test_export_requires_auth_and_a_bound(client, auth_headers):
+    assert client.get('/api/export/prices?seeds=1').status_code == 401
+    assert client.get('/api/export/prices', headers=auth_headers).status_code == 400
+    assert client.get('/api/export/prices?end=2026-01-01', headers=auth_headers).status_code == 400
+    assert client.get('/api/export/prices?start=2026-01-01', headers=auth_headers).status_code == 200
+
+
+def test_iter_prices_reads_in_batches(make_seeds):
+    make_seeds(2, ticks=5)
+    rows = list(ExportService.iter_prices(batch_size=3))
+    assert len(rows) == 10
+    assert [row.seed_id for row in rows] == sorted(row.seed_id for row in rows)
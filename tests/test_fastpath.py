@@ -0,0 +1,16 @@
+import database
+from utils import db as fastpath
+
+
+def test_execute_query_reuses_the_shared_pool(tmp_path, monkeypatch):
+    engine = database.get_engine(f"sqlite:///{tmp_path / 'fastpath.db'}",
+                                 poolclass=database.InstrumentedQueuePool, pool_size=1, max_overflow=0)
+    monkeypatch.setattr(database, 'engine', engine)
+
+    fastpath.execute_query("CREATE TABLE ticks (price REAL)", fetch=False)
+    fastpath.execute_query("INSERT INTO ticks VALUES (?)", (1.5,), fetch=False)
+    assert fastpath.execute_query("SELECT price FROM ticks") == [(1.5,)]
+
+    # Every call borrowed the one pooled connection and gave it back
+    assert engine.pool.checkedout() == 0
+    assert engine.pool.wait_stats['checkouts'] == 3
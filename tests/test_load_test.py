@@ -0,0 +1,22 @@
+import io
+import json
+from benchmarks import load_test
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert load_test.percentile(values, 50) == 50
+    assert load_test.percentile(values, 99) == 99
+    assert load_test.percentile([7], 95) == 7
+    assert load_test.percentile([], 50) is None
+
+
+def test_run_reports_every_endpoint(tmp_path):
+    output = io.StringIO()
+    load_test.run(seeds=2, days=3, concurrency=2, requests=4, warmup=0,
+                  database_url=f"sqlite:///{tmp_path / 'load.db'}", output=output)
+
+    header, *records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert header['seeds'] == 2
+    assert [record['endpoint'] for record in records] == [name for name, _ in load_test.ENDPOINTS]
+    assert all(record['errors'] == 0 and record['p99_ms'] >= record['p50_ms'] for record in records)
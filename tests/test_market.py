@@ -0,0 +1,77 @@
+from services.market import MarketService
+
+
+def test_market_summary_shape(make_seeds):
+    make_seeds(2, ticks=3)
+    summary = MarketService.get_market_summary()
+
+    assert summary['marketStats']['seedCount'] == 2
+    first = summary['seeds'][0]
+    assert first['currentPrice'] == 2.0
+    assert first['previousPrice'] == 1.5
+    assert first['change'] == 0.5
+    assert first['changePercent'] == 33.3
+    assert first['volume'] == 1002
+    assert set(first) == {'id', 'name', 'species', 'currentPrice', 'previousPrice',
+                          'change', 'changePercent', 'volume', 'description'}
+
+
+def test_market_summary_single_price_and_no_price(make_seeds):
+    make_seeds(1, ticks=1)
+    make_seeds(1, ticks=0)
+    summary = MarketService.get_market_summary()
+
+    assert summary['marketStats']['seedCount'] == 2
+    assert len(summary['seeds']) == 1
+    assert summary['seeds'][0]['previousPrice'] == summary['seeds'][0]['currentPrice']
+    assert summary['seeds'][0]['change'] == 0
+
+
+def test_market_summary_query_count_is_constant(make_seeds, count_queries):
+    make_seeds(3)
+    with count_queries() as small:
+        MarketService.get_market_summary()
+
+    make_seeds(30)
+    with count_queries() as large:
+        summary = MarketService.get_market_summary()
+
+    assert summary['marketStats']['seedCount'] == 33
+    assert small.count == large.count == 1
+
+
+def test_price_history_limit_buckets_in_database(make_seeds, count_queries):
+    seed_id = make_seeds(1, ticks=240)[0].id
+    with count_queries() as queries:
+        history = MarketService.get_price_history(seed_id, '1d', limit=10)
+
+    assert queries.count == 1
+    assert 0 < len(history) <= 10
+    assert sum(point['volume'] for point in history) == sum(1000 + t for t in range(240))
+    assert set(history[0]) == {'id', 'seed_id', 'price', 'volume', 'recorded_at'}
+
+
+def test_price_history_named_resolution(make_seeds):
+    seed = make_seeds(1, ticks=180)[0]
+    hourly = MarketService.get_price_history(seed.id, '1d', resolution='hour')
+    raw = MarketService.get_price_history(seed.id, '1d')
+
+    assert len(raw) == 180
+    assert 3 <= len(hourly) <= 4
+
+
+def test_price_history_lttb_keeps_endpoints(make_seeds):
+    seed = make_seeds(1, ticks=600)[0]
+    history = MarketService.get_price_history(seed.id, '1d', limit=20, resolution='lttb')
+
+    assert len(history) == 20
+    timestamps = [point['recorded_at'] for point in history]
+    assert timestamps == sorted(timestamps)
+
+
+def test_prices_endpoint_accepts_resolution(client, make_seeds):
+    seed = make_seeds(1, ticks=120)[0]
+    response = client.get(f'/api/seeds/{seed.id}/prices?timeframe=1d&resolution=hour')
+
+    assert response.status_code == 200
+    assert 2 <= len(response.get_json()['items']) <= 3
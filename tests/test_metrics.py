@@ -0,0 +1,78 @@
+import os
+import socket
+import subprocess
+import sys
+from urllib.request import urlopen
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry
+from utils.metrics import app_metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def metrics_client(app):
+    # A private registry for the exporter's own metrics so repeated app
+    # fixtures don't register them twice
+    app_metrics.init_app(app, registry=CollectorRegistry())
+    return app.test_client()
+
+
+def test_metrics_endpoint_reports_request_latency(metrics_client, make_seeds):
+    make_seeds(1)
+    metrics_client.get('/api/seeds')
+
+    body = metrics_client.get('/metrics').get_data(as_text=True)
+    assert 'flask_http_request_duration_seconds_bucket' in body
+    assert 'api.get_seeds' in body
+
+
+def test_sql_statements_recorded_per_request(metrics_client, make_seeds):
+    seed = make_seeds(1)[0]
+    before = sample('seedmart_db_statements_per_request_count', endpoint='api.get_seed_latest_price')
+    before_sum = sample('seedmart_db_statements_per_request_sum', endpoint='api.get_seed_latest_price')
+
+    metrics_client.get(f'/api/seeds/{seed.id}/latest-price')
+
+    assert sample('seedmart_db_statements_per_request_count', endpoint='api.get_seed_latest_price') == before + 1
+    assert sample('seedmart_db_statements_per_request_sum', endpoint='api.get_seed_latest_price') > before_sum
+
+
+def test_scheduled_jobs_timed_and_tick_rows_counted(app, make_seeds):
+    from scheduler import _run_with_app_context
+    from services.market import MarketService
+
+    make_seeds(3)
+    runs = sample('seedmart_job_runs_total', job='update_market_prices', status='success')
+    rows = sample('seedmart_tick_rows_written_sum')
+
+    _run_with_app_context(app, MarketService.update_seed_prices, job_id='update_market_prices')
+    _run_with_app_context(app, lambda: 1 / 0, job_id='failing_job')
+
+    assert sample('seedmart_job_runs_total', job='update_market_prices', status='success') == runs + 1
+    assert sample('seedmart_job_runs_total', job='failing_job', status='error') >= 1
+    assert sample('seedmart_tick_rows_written_sum') == rows + 3
+
+
+def test_multiprocess_directory_is_created_outside_gunicorn(tmp_path):
+    directory = tmp_path / 'prometheus'
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(directory))
+    subprocess.run([sys.executable, '-c', 'import utils.metrics'], env=env, check=True,
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert directory.is_dir()
+
+
+def test_engine_serves_its_own_metrics():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = app_metrics.serve(port, '127.0.0.1')
+    try:
+        body = urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'seedmart_tick_rows_written' in body
+    assert app_metrics.serve(0) is None
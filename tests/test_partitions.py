@@ -0,0 +1,22 @@
+from datetime import datetime
+from models.models import db
+import partitions
+
+
+def test_month_arithmetic_wraps_years():
+    start = partitions.month_start(datetime(2026, 11, 17, 8, 30))
+    assert start == datetime(2026, 11, 1)
+    assert partitions.add_months(start, 2) == datetime(2027, 1, 1)
+    assert partitions.add_months(start, -11) == datetime(2025, 12, 1)
+
+
+def test_partition_names_round_trip():
+    name = partitions.partition_name(datetime(2027, 3, 1))
+    assert name == 'seed_prices_p2027_03'
+    assert partitions.partition_start(name) == datetime(2027, 3, 1)
+    assert partitions.partition_start('seed_prices_legacy') is None
+
+
+def test_non_postgres_tables_are_not_partitioned(app):
+    assert partitions.is_partitioned(db.session) is False
+    assert partitions.ensure_future_partitions(db.session) == 0
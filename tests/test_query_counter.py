@@ -0,0 +1,63 @@
+import logging
+import pytest
+from models.models import Seed
+from utils.query_counter import request_query_counter, track_queries
+
+# Every public read endpoint with a declared @query_budget
+ENDPOINTS = [
+    ('api.get_seeds', '/api/seeds'),
+    ('api.get_seed', '/api/seeds/{seed}'),
+    ('api.get_seed_prices', '/api/seeds/{seed}/prices?timeframe=1y'),
+    ('api.get_seed_candles', '/api/seeds/{seed}/candles'),
+    ('api.get_seed_latest_price', '/api/seeds/{seed}/latest-price'),
+    ('api.get_market_summary', '/api/market/summary'),
+    ('api.export_prices', '/api/export/prices?seeds={seed}'),
+]
+
+
+def test_lazy_loads_in_a_loop_are_flagged(make_seeds):
+    make_seeds(4)
+    with track_queries() as queries:
+        for seed in Seed.query.all():
+            seed.prices
+
+    assert queries.count == 5
+    suspects = queries.n_plus_one_suspects()
+    assert list(suspects.values()) == [4]
+    assert 'possible N+1 (4x)' in queries.report()
+
+
+def test_repeating_the_same_query_is_not_n_plus_one(make_seeds):
+    make_seeds(1)
+    with track_queries() as queries:
+        for _ in range(3):
+            Seed.query.order_by(Seed.id).all()
+    assert queries.n_plus_one_suspects() == {}
+
+
+@pytest.mark.parametrize('endpoint, path', ENDPOINTS)
+def test_endpoint_stays_within_budget(app, client, make_seeds, auth_headers, within_query_budget, endpoint, path):
+    seed_id = make_seeds(12, ticks=5)[-1].id
+    budget = app.view_functions[endpoint].query_budget
+
+    with within_query_budget(budget):
+        response = client.get(path.format(seed=seed_id), headers=auth_headers)
+        response.get_data()
+    assert response.status_code == 200
+
+
+def test_dev_header_and_budget_warning(app, client, make_seeds, caplog):
+    app.config['QUERY_COUNTER_ENABLED'] = True
+    request_query_counter.init_app(app)
+    make_seeds(1)
+
+    response = client.get('/api/seeds')
+    assert response.headers['X-Query-Count'] == '1'
+
+    app.view_functions['api.get_seeds'].query_budget = 0
+    try:
+        with caplog.at_level(logging.WARNING, logger='utils.query_counter'):
+            client.get('/api/seeds?again=1')
+    finally:
+        app.view_functions['api.get_seeds'].query_budget = 2
+    assert 'ran 1 SQL statements, budget 0' in caplog.text
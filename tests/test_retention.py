@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+import data_retention
+from models.models import db, SeedCandle, SeedPrice, RetentionCheckpoint
+from services.candles import CandleService
+from services.market import MarketService
+from services.retention import RetentionService
+
+
+def _old_ticks(seed_id, days_ago, count=4):
+    day = CandleService.PERIODS['1d'](datetime.now() - timedelta(days=days_ago))
+    ticks = [SeedPrice(seed_id=seed_id, price=1.0 + i, volume=10,
+                       recorded_at=day + timedelta(hours=i)) for i in range(count)]
+    db.session.add_all(ticks)
+    db.session.flush()
+    CandleService.record_ticks(ticks)
+    db.session.commit()
+    return day
+
+
+def test_zero_day_horizon_is_not_the_default():
+    now = datetime(2026, 6, 15, 12, 30)
+    horizons = RetentionService.horizons(now, raw_days=0, hourly_days=0, data_days=0)
+    assert set(horizons.values()) == {datetime(2026, 6, 15)}
+
+
+def test_compact_folds_raw_rows_into_candles(make_seeds):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    _old_ticks(seed_id, 40)
+    _old_ticks(seed_id, 41)
+    horizons = RetentionService.horizons()
+
+    assert RetentionService.compact(horizons['raw'], batch_size=3) == 8
+
+    assert SeedPrice.query.filter(SeedPrice.recorded_at < horizons['raw']).count() == 0
+    assert SeedCandle.query.filter_by(period='1m').count() == 0
+    assert SeedCandle.query.filter_by(period='1h').count() == 8
+    daily = SeedCandle.query.filter_by(period='1d').order_by(SeedCandle.bucket_start).all()
+    assert [(c.open, c.high, c.low, c.close, c.volume) for c in daily] == [(1.0, 4.0, 1.0, 4.0, 40)] * 2
+    assert db.session.get(RetentionCheckpoint, RetentionService.CHECKPOINT).completed_cutoff == horizons['raw']
+
+
+def test_compact_resumes_from_checkpoint(make_seeds, monkeypatch):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    _old_ticks(seed_id, 40)
+    older = _old_ticks(seed_id, 41)
+    cutoff = RetentionService.horizons()['raw']
+    rebuild = RetentionService._rebuild_day
+    calls = []
+
+    def crash_on_second_day(day, delete_raw, batch_size):
+        calls.append(day)
+        if len(calls) == 2:
+            raise RuntimeError('worker killed')
+        return rebuild(day, delete_raw, batch_size)
+
+    monkeypatch.setattr(RetentionService, '_rebuild_day', crash_on_second_day)
+    try:
+        RetentionService.compact(cutoff, batch_size=4)
+    except RuntimeError:
+        db.session.rollback()
+    checkpoint = db.session.get(RetentionCheckpoint, RetentionService.CHECKPOINT)
+    assert checkpoint.last_day == older and checkpoint.completed_cutoff is None
+
+    monkeypatch.setattr(RetentionService, '_rebuild_day', rebuild)
+    assert RetentionService.compact(cutoff, batch_size=4) == 4
+    assert SeedCandle.query.filter_by(period='1d').count() == 2
+    assert RetentionService.compact(cutoff) == 0
+
+
+def test_kept_raw_rows_are_read_once_per_day(make_seeds, monkeypatch):
+    seed_ids = [seed.id for seed in make_seeds(2, ticks=0)]
+    days = [_old_ticks(seed_id, days_ago) for days_ago in (41, 40) for seed_id in seed_ids][::2]
+    cutoff = RetentionService.horizons()['raw']
+    rebuild = RetentionService._rebuild_day
+    calls = []
+
+    def record(day, delete_raw, batch_size):
+        calls.append(day)
+        return rebuild(day, delete_raw, batch_size)
+
+    monkeypatch.setattr(RetentionService, '_rebuild_day', record)
+    # Partitioned tables keep their rows for the partition drop
+    assert RetentionService.compact(cutoff, batch_size=3, delete_raw=False) == 16
+
+    assert calls == days
+    assert SeedPrice.query.count() == 16
+    daily = SeedCandle.query.filter_by(period='1d').all()
+    assert sorted((c.seed_id, c.volume) for c in daily) == sorted((seed_id, 40) for seed_id in seed_ids * 2)
+    assert RetentionService.compact(cutoff, delete_raw=False) == 0
+    assert calls == days
+
+
+def test_compacted_days_keep_their_candles(make_seeds):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    _old_ticks(seed_id, 40)
+    cutoff = RetentionService.horizons()['raw']
+    RetentionService.compact(cutoff)
+
+    # A fresh checkpoint walks from an older day across the compacted one
+    db.session.delete(db.session.get(RetentionCheckpoint, RetentionService.CHECKPOINT))
+    _old_ticks(seed_id, 45)
+    assert RetentionService.compact(cutoff) == 4
+    assert SeedCandle.query.filter_by(period='1d').count() == 2
+
+
+def test_prune_candles_by_tier(make_seeds):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    _old_ticks(seed_id, 100)
+    _old_ticks(seed_id, 400)
+    horizons = RetentionService.horizons()
+    RetentionService.compact(horizons['raw'])
+
+    RetentionService.prune_candles(horizons)
+
+    assert SeedCandle.query.filter_by(period='1h').count() == 0
+    assert SeedCandle.query.filter_by(period='1d').count() == 1
+
+
+def test_long_history_reads_from_candles(make_seeds):
+    seed_id = make_seeds(1, ticks=0)[0].id
+    _old_ticks(seed_id, 200)
+    RetentionService.compact(RetentionService.horizons()['raw'])
+
+    assert MarketService.price_history_plan('1y')[4] == '1d'
+    assert MarketService.price_history_plan('1d')[4] is None
+    history = MarketService.get_price_history(seed_id, '1y')
+    assert len(history) == 1
+    assert history[0]['price'] == 4.0
+    assert history[0]['volume'] == 40
+
+
+def test_manual_run_app_has_no_scheduler():
+    app = data_retention.create_app()
+    assert 'sqlalchemy' in app.extensions
+    assert not hasattr(app, 'scheduler') and not hasattr(app, 'scheduler_election')
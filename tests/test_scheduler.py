@@ -0,0 +1,60 @@
+from models.models import db, SeedPrice
+from scheduler import LeaderElection, _run_if_leader
+
+
+def test_single_process_backend_always_leads(app):
+    election = LeaderElection(db.engine, node_id='node-a')
+    assert election.renew() is True
+    assert election.status()['is_leader'] is True
+    assert election.current_leader() == 'node-a'
+
+    election.release()
+    assert election.is_leader is False
+    assert election.status()['leader_since'] is None
+
+
+def test_jobs_only_run_on_the_leader(app):
+    calls = []
+    election = LeaderElection(db.engine, node_id='node-b')
+
+    _run_if_leader(app, election, lambda: calls.append('ran'))
+    assert calls == []
+
+    election.renew()
+    _run_if_leader(app, election, lambda: calls.append('ran'))
+    assert calls == ['ran']
+
+
+def test_leader_gauge_follows_the_lease(app):
+    from prometheus_client import REGISTRY
+    election = LeaderElection(db.engine, node_id='node-c')
+
+    def gauge():
+        return REGISTRY.get_sample_value('seedmart_scheduler_leader', {'node': 'node-c', 'lock': str(election.lock_key)})
+
+    election.renew()
+    assert gauge() == 1
+    election.renew()
+    assert gauge() == 1
+    election.release()
+    assert gauge() == 0
+
+
+def test_engine_process_registers_no_tick_job(app, make_seeds):
+    from scheduler import _tick_market, configure_scheduler, hand_market_to_engine, shutdown_scheduler
+    app.config['MARKET_ENGINE'] = 'scheduler'
+    configure_scheduler(app)
+    try:
+        assert app.scheduler.get_job('update_market_prices') is not None
+        hand_market_to_engine(app)
+        assert app.scheduler.get_job('update_market_prices') is None
+    finally:
+        shutdown_scheduler(app)
+
+    # A run that was already due does nothing either
+    make_seeds(1)
+    election = LeaderElection(db.engine, node_id='node-d')
+    election.renew()
+    before = SeedPrice.query.count()
+    _tick_market(app, election)
+    assert SeedPrice.query.count() == before
@@ -0,0 +1,25 @@
+from datetime import datetime
+from flask import jsonify
+from models.models import SeedPrice
+from services.market import MarketService
+from utils.serialization import encode_price_rows
+
+
+def test_encoded_rows_match_jsonify(app):
+    prices = [
+        SeedPrice(id=1, seed_id=3, price=1.1, volume=None, recorded_at=datetime(2026, 1, 1, 12, 0, 0, 5)),
+        SeedPrice(id=2, seed_id=3, price=2.0, volume=700, recorded_at=None),
+        SeedPrice(id=3, seed_id=3, price=1e-7, volume=0, recorded_at=datetime(2026, 1, 2)),
+    ]
+    rows = [(p.id, p.price, p.recorded_at, p.seed_id, p.volume) for p in prices]
+
+    assert encode_price_rows(rows) == jsonify([p.to_dict() for p in prices]).data
+    assert encode_price_rows([]) == jsonify([]).data
+
+
+def test_direct_history_matches_orm_history(app, make_seeds):
+    seed_id = make_seeds(1, ticks=50)[0].id
+    for resolution in (None, 'hour', 'lttb'):
+        direct = MarketService.get_price_history_json(seed_id, '1d', 10 if resolution else None, resolution)
+        orm = jsonify(MarketService.get_price_history(seed_id, '1d', 10 if resolution else None, resolution)).data
+        assert direct == orm
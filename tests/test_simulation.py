@@ -0,0 +1,43 @@
+import numpy as np
+from models.models import SeedPrice
+from services.market import MarketService
+from services.simulation import BatchPriceEngine
+
+
+def test_step_is_deterministic_for_a_seed():
+    last = np.array([1.0, 2.5, 4.0])
+    first_prices, first_volumes = BatchPriceEngine(seed=42).step(last)
+    second_prices, second_volumes = BatchPriceEngine(seed=42).step(last)
+
+    assert np.array_equal(first_prices, second_prices)
+    assert np.array_equal(first_volumes, second_volumes)
+
+
+def test_step_respects_bounds_and_floor():
+    engine = BatchPriceEngine(seed=1)
+    last = np.array([0.2] * 1000 + [5.0] * 1000)
+    prices, volumes = engine.step(last)
+
+    assert prices.min() >= 0.2
+    # Trend (+/-2%) plus noise (+/-1%) caps each move at 3%
+    assert np.all(np.abs(prices[1000:] - 5.0) <= 5.0 * 0.03 + 0.005)
+    assert volumes.min() >= 500 and volumes.max() <= 10500
+
+
+def test_seeds_without_history_get_a_base_price():
+    prices, _ = BatchPriceEngine(seed=7).step(np.array([np.nan, np.nan]))
+    assert np.all((prices >= 1) & (prices <= 6))
+
+
+def test_tick_cost_does_not_grow_with_seed_count(make_seeds, count_queries):
+    make_seeds(3, ticks=1)
+    with count_queries() as small:
+        MarketService.update_seed_prices(BatchPriceEngine(seed=3))
+
+    make_seeds(40, ticks=0)
+    with count_queries() as large:
+        written = MarketService.update_seed_prices(BatchPriceEngine(seed=3))
+
+    assert written == 43
+    assert SeedPrice.query.count() == 3 + 3 + 43
+    assert large.count <= small.count + 1
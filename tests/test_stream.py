@@ -0,0 +1,93 @@
+import json
+from services.market import MarketService
+from utils.broadcast import MarketBroadcaster, market_stream
+
+
+def _event(*seed_ids):
+    return {'type': 'tick', 'prices': [{'seed_id': seed_id, 'price': 1.0} for seed_id in seed_ids]}
+
+
+def test_subscribers_only_receive_their_seeds():
+    broadcaster = MarketBroadcaster()
+    everything = broadcaster.subscribe()
+    filtered = broadcaster.subscribe([2])
+
+    broadcaster.publish(_event(1, 2))
+    broadcaster.publish(_event(1))
+
+    assert everything.queue.qsize() == 2
+    assert filtered.queue.qsize() == 1
+    assert [p['seed_id'] for p in json.loads(filtered.queue.get())['prices']] == [2]
+
+
+def test_slow_consumer_is_dropped():
+    broadcaster = MarketBroadcaster(buffer_size=2)
+    slow = broadcaster.subscribe()
+    for _ in range(3):
+        broadcaster.publish(_event(1))
+
+    assert slow.dropped
+    assert broadcaster.subscriber_count == 0
+    events = broadcaster.stream(slow)
+    assert next(events).startswith('retry:')
+    assert next(events).startswith('event: dropped')
+
+
+def test_tick_publishes_prices_and_deltas(make_seeds):
+    make_seeds(2)
+    subscription = market_stream.subscribe()
+    MarketService.update_seed_prices()
+    market_stream.unsubscribe(subscription)
+
+    event = json.loads(subscription.queue.get_nowait())
+    assert event['marketStats']['seedCount'] == 2
+    first = event['prices'][0]
+    assert first['change'] == round(first['price'] - first['previousPrice'], 2)
+
+
+def test_stream_endpoint(client, make_seeds):
+    make_seeds(1)
+    response = client.get('/api/market/stream?seeds=1')
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+
+    market_stream.publish(_event(1))
+    assert next(chunks).startswith(b'event: tick')
+    response.close()
+
+    assert client.get('/api/market/stream?seeds=a').status_code == 400
+
+
+def test_large_ticks_are_split_into_notify_payloads():
+    broadcaster = MarketBroadcaster()
+    payloads = list(broadcaster._payloads(_event(*range(1, 1001))))
+
+    assert len(payloads) > 1
+    assert all(len(payload) <= MarketBroadcaster.PG_PAYLOAD_LIMIT for payload in payloads)
+    seed_ids = [p['seed_id'] for payload in payloads for p in json.loads(payload)['prices']]
+    assert seed_ids == list(range(1, 1001))
+
+
+def test_postgres_ticks_go_through_notify(app, monkeypatch):
+    broadcaster = MarketBroadcaster()
+    subscription = broadcaster.subscribe()
+    broadcaster._postgres = True
+    notified = []
+    monkeypatch.setattr(broadcaster, '_notify', notified.append)
+
+    broadcaster.publish(_event(1))
+    # Delivered by this worker's LISTEN connection, like every other worker's
+    assert notified and subscription.queue.empty()
+
+    def fail(event):
+        raise RuntimeError('connection refused')
+    monkeypatch.setattr(broadcaster, '_notify', fail)
+    broadcaster.publish(_event(1))
+    assert subscription.queue.qsize() == 1
+
+
+def test_multi_process_without_fan_out_is_reported(app, caplog):
+    app.config['WEB_CONCURRENCY'] = 4
+    MarketBroadcaster().init_app(app)
+    assert 'set REDIS_URL or use PostgreSQL' in caplog.text
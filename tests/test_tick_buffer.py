@@ -0,0 +1,133 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from models.models import db, Seed, SeedPrice
+from services.engine import MarketEngine
+from services.market import MarketService
+from services.simulation import BatchPriceEngine, Tick
+from services.tick_buffer import BufferFull, TickBuffer
+from utils.broadcast import market_stream
+
+
+def _tick(seed_ids, at, price=1.0):
+    return [Tick(seed_id, price, 100, at) for seed_id in seed_ids], {}
+
+
+def test_many_ticks_flush_as_one_insert(app, make_seeds, count_queries):
+    make_seeds(3, ticks=0)
+    buffer = TickBuffer(app)
+    engine = MarketEngine(BatchPriceEngine(seed=5), buffer=buffer)
+    for _ in range(10):
+        engine.tick()
+    assert len(buffer) == 30 and SeedPrice.query.count() == 0
+
+    subscription = market_stream.subscribe()
+    with count_queries() as queries:
+        assert buffer.flush() == 30
+    market_stream.unsubscribe(subscription)
+
+    assert sum('INSERT INTO seed_prices' in statement for statement in queries.statements) == 1
+    assert SeedPrice.query.count() == 30 and len(buffer) == 0
+    # Stream clients still see every tick, once it is committed
+    assert subscription.queue.qsize() == 10
+
+
+def test_flush_is_capped_by_flush_rows(app, make_seeds):
+    seed_ids = [seed.id for seed in make_seeds(2, ticks=0)]
+    buffer = TickBuffer(app, flush_rows=4)
+    start = datetime.now()
+    for i in range(5):
+        buffer.put(*_tick(seed_ids, start + timedelta(seconds=i)))
+
+    assert buffer.flush() == 4
+    assert buffer.flush() == 4
+    assert buffer.flush() == 2
+    assert buffer.flush() == 0
+
+
+def test_full_buffer_applies_backpressure(app, make_seeds):
+    seed_ids = [seed.id for seed in make_seeds(2, ticks=0)]
+    buffer = TickBuffer(app, flush_rows=2, max_rows=4, block_seconds=0.05)
+    now = datetime.now()
+    buffer.put(*_tick(seed_ids, now))
+    buffer.put(*_tick(seed_ids, now))
+
+    with pytest.raises(BufferFull):
+        buffer.put(*_tick(seed_ids, now))
+
+    buffer.block_seconds = 5
+    waiting = threading.Thread(target=buffer.put, args=_tick(seed_ids, now))
+    waiting.start()
+    buffer.flush()
+    waiting.join(5)
+    assert not waiting.is_alive()
+    assert len(buffer) == 4
+
+
+def test_rejected_batch_is_dropped(app, make_seeds):
+    seed_ids = [seed.id for seed in make_seeds(1, ticks=0)]
+    buffer = TickBuffer(app)
+    buffer.put(*_tick(seed_ids, datetime.now(), price=None))
+
+    assert buffer.flush() == 0
+    assert len(buffer) == 0 and SeedPrice.query.count() == 0
+
+
+def test_ticks_for_a_deleted_seed_do_not_sink_the_batch(app, make_seeds, monkeypatch):
+    seeds = make_seeds(3, ticks=0)
+    buffer = TickBuffer(app)
+    engine = MarketEngine(BatchPriceEngine(seed=6), buffer=buffer)
+    engine.tick()
+    engine.tick()
+    db.session.delete(seeds[1])
+    db.session.commit()
+
+    write_ticks = MarketService.write_ticks
+
+    def enforce_foreign_key(updates):
+        # SQLite in the tests doesn't enforce FKs; Postgres rejects the insert
+        if any(db.session.get(Seed, tick.seed_id) is None for tick in updates):
+            raise IntegrityError('INSERT INTO seed_prices', {}, Exception('violates foreign key constraint'))
+        write_ticks(updates)
+    monkeypatch.setattr(MarketService, 'write_ticks', enforce_foreign_key)
+
+    assert buffer.flush() == 4
+    assert len(buffer) == 0
+    assert {row.seed_id for row in SeedPrice.query} == {seeds[0].id, seeds[2].id}
+    # The engine reloads its seeds before the next tick
+    assert engine.tick() == 2 and seeds[1].id not in engine.seed_ids
+
+
+def test_lost_lease_discards_unwritten_ticks(app, make_seeds):
+    make_seeds(2, ticks=0)
+    buffer = TickBuffer(app)
+    engine = MarketEngine(BatchPriceEngine(seed=7), buffer=buffer)
+
+    class FlakyLease:
+        renewals = 0
+
+        def renew(self):
+            self.renewals += 1
+            return self.renewals == 1
+
+    lease = FlakyLease()
+    queued = []
+    original_tick = engine.tick
+    engine.tick = lambda: queued.append(original_tick()) or queued.append(len(buffer))
+    engine.run(0, lease, renew_seconds=0, should_stop=lambda: lease.renewals >= 2)
+
+    # Leading for one tick queued two rows; losing the lease dropped them
+    assert queued == [2, 2]
+    assert len(buffer) == 0 and buffer.flush() == 0
+    assert SeedPrice.query.count() == 0
+
+
+def test_stop_flushes_what_is_queued(app, make_seeds):
+    seed_ids = [seed.id for seed in make_seeds(2, ticks=0)]
+    buffer = TickBuffer(app, flush_ms=60000)
+    buffer.start()
+    buffer.put(*_tick(seed_ids, datetime.now()))
+    buffer.stop()
+
+    assert SeedPrice.query.count() == 2
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import delete, select
+
+try:
+    import redis
+except ImportError:  # Redis is optional; workers then catch up by polling the table
+    redis = None
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TokenBlocklist:
+    """
+    Revoked JWT ids held in an in-process dict (jti -> expiry), so the
+    token_in_blocklist_loader check on every protected request is a dict
+    lookup with no database round-trip.
+
+    Revocations are written to the revoked_tokens table, which is the source of
+    truth. Each worker pulls rows revoked since its last sync at most every
+    TOKEN_BLOCKLIST_SYNC_SECONDS. With REDIS_URL set they are also published so
+    other workers apply them immediately. Entries leave the dict and the table
+    once the token would have expired anyway, which keeps both bounded by the
+    number of live revoked tokens.
+    """
+
+    CHANNEL = 'seedmart:auth:revoked'
+    # Re-read a little before the last sync so rows committed late are not missed
+    SYNC_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self, sync_interval=5):
+        self.sync_interval = sync_interval
+        self._revoked = {}
+        self._synced_at = None
+        self._synced_until = None
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener = None
+
+    def init_app(self, app, jwt):
+        self.sync_interval = app.config.get('TOKEN_BLOCKLIST_SYNC_SECONDS', 5)
+        self._revoked = {}
+        self._synced_at = self._synced_until = None
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url)
+        jwt.token_in_blocklist_loader(self._check)
+        app.extensions['token_blocklist'] = self
+
+    def _check(self, jwt_header, jwt_payload):
+        return self.is_revoked(jwt_payload['jti'])
+
+    def is_revoked(self, jti):
+        self._ensure_listener()
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        return jti in self._revoked
+
+    def revoke(self, payload):
+        """Revoke a decoded token (e.g. get_jwt()) until its exp"""
+        from models.models import db, RevokedToken
+
+        jti = payload['jti']
+        if self.is_revoked(jti):
+            return
+        now = _utcnow()
+        expires_at = (datetime.fromtimestamp(payload['exp'], timezone.utc).replace(tzinfo=None)
+                      if payload.get('exp') else now + current_app.config.get(
+                          'JWT_REFRESH_TOKEN_EXPIRES', timedelta(days=30)))
+        db.session.add(RevokedToken(jti=jti, token_type=payload.get('type'), subject=str(payload.get('sub')),
+                                    expires_at=expires_at, revoked_at=now))
+        # Expired revocations can never match a valid token again
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.session.commit()
+
+        self._add(jti, expires_at)
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.CHANNEL, json.dumps({'jti': jti, 'exp': expires_at.isoformat()}))
+            except Exception as e:
+                current_app.logger.warning(f"Redis publish of token revocation failed: {e}")
+
+    def sync(self):
+        """Pull revocations made by other workers since the last sync"""
+        from models.models import db, RevokedToken
+
+        with self._lock:
+            now = _utcnow()
+            query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+            if self._synced_until is not None:
+                query = query.where(RevokedToken.revoked_at >= self._synced_until - self.SYNC_OVERLAP)
+            rows = db.session.execute(query).all()
+            for jti, expires_at in rows:
+                self._revoked[jti] = expires_at
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+            self._synced_until = now
+            self._synced_at = time.monotonic()
+
+    def _add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def _ensure_listener(self):
+        # Started lazily in the serving process so it survives gunicorn's fork
+        if self._redis is None or (self._listener and self._listener.is_alive()):
+            return
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='token-blocklist-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CHANNEL)
+        for message in pubsub.listen():
+            try:
+                revoked = json.loads(message['data'])
+                self._add(revoked['jti'], datetime.fromisoformat(revoked['exp']))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+token_blocklist = TokenBlocklist()
@@ -0,0 +1,219 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import make_url
+
+try:
+    import redis
+except ImportError:  # Redis is optional; fall back to in-process fan-out
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One streaming client: an optional seed filter and a bounded buffer"""
+
+    def __init__(self, seed_ids=None, buffer_size=100):
+        self.seed_ids = set(seed_ids) if seed_ids else None
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def accepts(self, seed_id):
+        return self.seed_ids is None or seed_id in self.seed_ids
+
+
+class MarketBroadcaster:
+    """
+    Fans price tick events out to streaming clients. With REDIS_URL set, ticks
+    are published to a Redis channel; otherwise, on PostgreSQL, they go out
+    with NOTIFY. Either way every worker relays them to its own subscribers,
+    so a tick produced anywhere (the scheduler leader or run-engine) reaches
+    every client. Only on other databases are events delivered in-process.
+    """
+
+    CHANNEL = 'seedmart:market:ticks'
+    PG_CHANNEL = 'seedmart_market_ticks'
+    # NOTIFY payloads must stay under 8000 bytes; larger ticks are split
+    PG_PAYLOAD_LIMIT = 7900
+
+    def __init__(self, buffer_size=100):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._postgres = False
+        self._listener = None
+
+    def init_app(self, app):
+        self.buffer_size = app.config.get('STREAM_BUFFER_SIZE', 100)
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url)
+        else:
+            url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+            self._postgres = url.get_backend_name() == 'postgresql'
+            if not self._postgres and (app.config.get('WEB_CONCURRENCY', 1) > 1
+                                       or app.config.get('MARKET_ENGINE') == 'process'):
+                app.logger.error(
+                    "Market stream clients only get ticks produced in their own process: "
+                    "set REDIS_URL or use PostgreSQL when running several processes")
+        app.extensions['market_stream'] = self
+
+    def subscribe(self, seed_ids=None):
+        self._ensure_listener()
+        subscription = Subscription(seed_ids, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        """Send a tick event to every subscriber; never raises into the tick job"""
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.CHANNEL, json.dumps(event))
+                return
+            except Exception as e:
+                current_app.logger.warning(f"Redis publish failed, delivering locally: {e}")
+        elif self._postgres:
+            try:
+                self._notify(event)
+                return
+            except Exception as e:
+                current_app.logger.warning(f"NOTIFY failed, delivering locally: {e}")
+        self._deliver(event)
+
+    def _notify(self, event):
+        from models.models import db
+        # One transaction, so listeners get every chunk of a tick together
+        with db.engine.begin() as connection:
+            for payload in self._payloads(event):
+                connection.execute(sql_select(func.pg_notify(self.PG_CHANNEL, payload)))
+
+    def _payloads(self, event):
+        """Serialize an event as one or more NOTIFY payloads, splitting its prices"""
+        empty = len(json.dumps(dict(event, prices=[])))
+        chunk, size = [], empty
+        for price in event['prices']:
+            price_size = len(json.dumps(price)) + 2  # Plus the ', ' separator
+            if chunk and size + price_size > self.PG_PAYLOAD_LIMIT:
+                yield json.dumps(dict(event, prices=chunk))
+                chunk, size = [], empty
+            chunk.append(price)
+            size += price_size
+        yield json.dumps(dict(event, prices=chunk))
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            prices = [p for p in event['prices'] if subscription.accepts(p['seed_id'])]
+            if not prices:
+                continue
+            payload = json.dumps(dict(event, prices=prices))
+            try:
+                subscription.queue.put_nowait(payload)
+            except queue.Full:
+                self._drop(subscription)
+
+    def _drop(self, subscription):
+        """Disconnect a consumer that can't keep up instead of buffering forever"""
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        while True:
+            try:
+                subscription.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscription.queue.put_nowait(None)
+
+    def _ensure_listener(self):
+        # Started lazily in the serving process so it survives gunicorn's fork
+        if self._redis is None and not self._postgres:
+            return
+        if self._listener and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            if self._redis is not None:
+                target, args = self._listen, ()
+            else:
+                from models.models import db
+                target, args = self._listen_postgres, (db.engine,)
+            self._listener = threading.Thread(target=target, args=args, name='market-stream-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CHANNEL)
+        for message in pubsub.listen():
+            try:
+                self._deliver(json.loads(message['data']))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def _listen_postgres(self, engine, poll_timeout=30):
+        while True:
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                # Held for good, so take it out of the pool rather than starve it
+                connection.detach()
+                listener = connection.dbapi_connection
+                listener.autocommit = True
+                listener.cursor().execute(f'LISTEN {self.PG_CHANNEL}')
+                while True:
+                    if not select.select([listener], [], [], poll_timeout)[0]:
+                        continue
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        try:
+                            self._deliver(json.loads(notify.payload))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except Exception as e:
+                logger.warning(f"Market stream LISTEN connection lost, reconnecting: {e}")
+                time.sleep(5)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def stream(self, subscription, heartbeat=15):
+        """Yield Server-Sent Events for a subscription until the client goes away"""
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    payload = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Comment lines keep proxies and load balancers from timing out
+                    yield ': keep-alive\n\n'
+                    continue
+                if payload is None:
+                    yield 'event: dropped\ndata: {"reason": "slow consumer"}\n\n'
+                    return
+                yield f'event: tick\ndata: {payload}\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+
+market_stream = MarketBroadcaster()
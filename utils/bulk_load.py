@@ -0,0 +1,75 @@
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from models.models import db, SeedPrice
+
+PRICE_COLUMNS = ('seed_id', 'price', 'volume', 'recorded_at')
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_rows(generator, tasks, workers=1):
+    """
+    Yield price rows from generator(task) for every task (typically one per
+    seed). With workers > 1 each task is generated in a separate process; only
+    a bounded window of finished tasks is held in memory at a time.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield from generator(task)
+        return
+
+    tasks = list(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submit in windows so finished-but-unconsumed results stay bounded
+        for window in _chunks(tasks, workers * 2):
+            for rows in executor.map(generator, window):
+                yield from rows
+
+
+def load_price_rows(rows, chunk_size=10000, progress=None):
+    """
+    Stream (seed_id, price, volume, recorded_at) tuples into seed_prices.
+
+    On PostgreSQL with psycopg2 each chunk is sent with COPY FROM STDIN,
+    otherwise chunks go through executemany inserts. Only one chunk is held in
+    memory and nothing passes through the ORM identity map. Everything is
+    written in the current transaction; the caller commits.
+    `progress(count)` is called after each chunk.
+    """
+    connection = db.session.connection()
+    raw = connection.connection.dbapi_connection
+    use_copy = connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+    total = 0
+    for chunk in _chunks(rows, chunk_size):
+        if use_copy:
+            _copy_chunk(raw, chunk)
+        else:
+            connection.execute(SeedPrice.__table__.insert(),
+                               [dict(zip(PRICE_COLUMNS, row)) for row in chunk])
+        total += len(chunk)
+        if progress:
+            progress(len(chunk))
+    return total
+
+
+def _copy_chunk(raw_connection, chunk):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for seed_id, price, volume, recorded_at in chunk:
+        writer.writerow((seed_id, price, volume, recorded_at.isoformat(sep=' ')))
+    buffer.seek(0)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY seed_prices ({', '.join(PRICE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
@@ -0,0 +1,344 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, has_request_context, make_response, request
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # Redis is optional; fall back to the in-process cache
+    redis = None
+
+
+class DatabaseVersion:
+    """
+    Data version kept in the cache_versions table, so every gunicorn worker
+    and task sees the same version (and the time it last changed) without
+    Redis. Each process reuses what it read for `ttl` seconds, so cache hits
+    skip the database; another worker's bump is seen within that window, and
+    this process's own bumps immediately.
+    """
+
+    def __init__(self, name='responses', ttl=1.0):
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memo = None
+
+    def get_state(self):
+        with self._lock:
+            if self._memo is not None and time.monotonic() - self._memo[0] < self.ttl:
+                return self._memo[1]
+        return self._remember(self._read())
+
+    def _read(self):
+        from models.models import db, CacheVersion
+        row = db.session.execute(
+            select(CacheVersion.version, CacheVersion.updated_at).where(CacheVersion.name == self.name)
+        ).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    def _remember(self, state):
+        with self._lock:
+            self._memo = (time.monotonic(), state)
+        return state
+
+    def bump(self):
+        from models.models import db, CacheVersion
+        now = datetime.now()
+        try:
+            for _ in range(2):
+                bumped = db.session.execute(
+                    update(CacheVersion).where(CacheVersion.name == self.name)
+                    .values(version=CacheVersion.version + 1, updated_at=now)
+                ).rowcount
+                if not bumped:
+                    try:
+                        db.session.add(CacheVersion(name=self.name, version=1, updated_at=now))
+                        db.session.flush()
+                    except IntegrityError:
+                        # Another process created the row first; bump that one
+                        db.session.rollback()
+                        continue
+                db.session.commit()
+                return self._remember(self._read())[0]
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+class MemoryBackend:
+    """
+    Bounded in-process LRU cache with per-entry TTL. With `versions` (a
+    DatabaseVersion) the data version is shared across processes, so a write
+    handled by one worker invalidates every worker's entries; without it the
+    version is local, which only suits a single process.
+    """
+
+    def __init__(self, max_entries=512, versions=None):
+        self.max_entries = max_entries
+        self.versions = versions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._bumped_at = None
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_state(self):
+        """(data version, when it last changed)"""
+        if self.versions is not None:
+            return self.versions.get_state()
+        return self._version, self._bumped_at
+
+    def get_version(self):
+        return self.get_state()[0]
+
+    def bump_version(self):
+        version = self.versions.bump() if self.versions is not None else None
+        with self._lock:
+            if version is None:
+                self._version += 1
+                self._bumped_at = datetime.now()
+                version = self._version
+            # Entries for older versions can never be read again
+            self._entries.clear()
+            return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        version = self.get_version()
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), version=version)
+
+
+class RedisBackend:
+    """Redis-backed cache shared by every gunicorn worker and task.
+    Eviction is left to Redis (maxmemory-policy allkeys-lru) plus entry TTLs."""
+
+    PREFIX = 'seedmart:cache:'
+
+    def __init__(self, url, prefix=PREFIX):
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_state(self):
+        version, bumped_at = self._client.mget(self.prefix + 'version', self.prefix + 'version_at')
+        return int(version or 0), datetime.fromisoformat(bumped_at.decode()) if bumped_at else None
+
+    def get_version(self):
+        return self.get_state()[0]
+
+    def bump_version(self):
+        pipeline = self._client.pipeline()
+        pipeline.incr(self.prefix + 'version')
+        pipeline.set(self.prefix + 'version_at', datetime.now().isoformat())
+        return pipeline.execute()[0]
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        self._client.incr(self.prefix + ('stats:hits' if value is not None else 'stats:misses'))
+        return value
+
+    def set(self, key, value, timeout):
+        self._client.set(self.prefix + key, value, ex=max(1, int(timeout)))
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def stats(self):
+        hits, misses, version = self._client.mget(
+            self.prefix + 'stats:hits', self.prefix + 'stats:misses', self.prefix + 'version')
+        return {
+            'hits': int(hits or 0),
+            'misses': int(misses or 0),
+            'version': int(version or 0),
+            'size': None,
+            'evictions': None
+        }
+
+
+class ResponseCache:
+    """
+    Cache for public market responses. Keys embed a global data version, so a
+    single version bump after a price tick or seed write invalidates everything.
+    The version lives in Redis when REDIS_URL is set and in the database
+    otherwise, never only in one worker's memory.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.timeout = 30
+
+    def init_app(self, app):
+        self.timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 30)
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url and redis is not None:
+            self.backend = RedisBackend(redis_url)
+        else:
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 512), versions=DatabaseVersion(ttl=app.config.get('CACHE_VERSION_TTL', 1.0)))
+        app.teardown_request(self._forget_state)
+        app.extensions['response_cache'] = self
+
+    @staticmethod
+    def _forget_state(exc=None):
+        g.pop('cache_state', None)
+
+    def bump_version(self):
+        """Invalidate every cached response; call after committing market data"""
+        if has_request_context():
+            g.pop('cache_state', None)
+        try:
+            return self.backend.bump_version()
+        except Exception as e:
+            # A cache outage must never fail the write that triggered it
+            current_app.logger.warning(f"Cache invalidation failed: {e}")
+
+    def state(self):
+        """(data version, when it last changed), or None when the backend is
+        unreachable. Read once per request and shared with conditional GETs."""
+        if has_request_context() and 'cache_state' in g:
+            return g.cache_state
+        try:
+            state = self.backend.get_state()
+        except Exception as e:
+            current_app.logger.warning(f"Cache version lookup failed: {e}")
+            return None
+        if has_request_context():
+            g.cache_state = state
+        return state
+
+    def version(self):
+        """Current data version, or None when the backend is unreachable"""
+        state = self.state()
+        return state[0] if state is not None else None
+
+    def stats(self):
+        return self.backend.stats()
+
+    def cached(self, view):
+        """Serve a JSON view from the cache, keyed by path, query and data version"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = self.version()
+            if version is None:
+                return view(*args, **kwargs)
+            key = f"{version}:{request.full_path}"
+            try:
+                body = self.backend.get(key)
+            except Exception as e:
+                current_app.logger.warning(f"Cache lookup failed: {e}")
+                return view(*args, **kwargs)
+
+            if body is not None:
+                return current_app.response_class(body, mimetype='application/json')
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                try:
+                    self.backend.set(key, response.get_data(), self.timeout)
+                except Exception as e:
+                    current_app.logger.warning(f"Cache store failed: {e}")
+            return response
+        return wrapper
+
+
+class IdentityCache:
+    """
+    Short-lived cache of serialized users keyed by JWT subject, so /me and
+    /refresh skip the users-table lookup. An entry is dropped once a session
+    that updated or deleted that user commits; IDENTITY_CACHE_TIMEOUT bounds
+    how stale other workers can be when the cache is per process.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.timeout = 60
+
+    def init_app(self, app):
+        self.timeout = app.config.get('IDENTITY_CACHE_TIMEOUT', 60)
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url and redis is not None:
+            self.backend = RedisBackend(redis_url, prefix='seedmart:identity:')
+        else:
+            self.backend = MemoryBackend(app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 1024))
+        self._watch_users()
+        app.extensions['identity_cache'] = self
+
+    def load(self, subject, loader):
+        """Cached payload for `subject`, else loader() (cached unless None)"""
+        key = str(subject)
+        try:
+            cached = self.backend.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            current_app.logger.warning(f"Identity cache lookup failed: {e}")
+
+        payload = loader()
+        if payload is not None:
+            try:
+                self.backend.set(key, json.dumps(payload), self.timeout)
+            except Exception as e:
+                current_app.logger.warning(f"Identity cache store failed: {e}")
+        return payload
+
+    def invalidate(self, subject):
+        try:
+            self.backend.delete(str(subject))
+        except Exception as e:
+            current_app.logger.warning(f"Identity cache invalidation failed: {e}")
+
+    def _watch_users(self):
+        from models.models import User
+        if event.contains(User, 'after_update', _queue_identity_invalidation):
+            return
+        event.listen(User, 'after_update', _queue_identity_invalidation)
+        event.listen(User, 'after_delete', _queue_identity_invalidation)
+        event.listen(Session, 'after_commit', _flush_identity_invalidations)
+        event.listen(Session, 'after_soft_rollback', _discard_identity_invalidations)
+
+
+def _queue_identity_invalidation(mapper, connection, target):
+    # Invalidate only after commit, or a concurrent read could re-cache the old row
+    inspect(target).session.info.setdefault('identity_invalidations', set()).add(target.id)
+
+
+def _flush_identity_invalidations(session):
+    for user_id in session.info.pop('identity_invalidations', ()):
+        identity_cache.invalidate(user_id)
+
+
+def _discard_identity_invalidations(session, previous_transaction):
+    session.info.pop('identity_invalidations', None)
+
+
+response_cache = ResponseCache()
+identity_cache = IdentityCache()
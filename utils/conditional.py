@@ -0,0 +1,54 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, make_response, request
+
+
+def conditional(validator):
+    """
+    Add strong ETag / Last-Modified validators to a GET view and answer
+    304 Not Modified before the view runs when the client is current.
+
+    validator(**view_kwargs) returns (tag, last_modified) describing the data
+    the view would render, or None to skip conditional handling. It should be
+    a cheap single-row lookup, never the data itself.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            state = validator(**kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+
+            tag, last_modified = state
+            etag = hashlib.sha1(f"{tag}|{request.full_path}".encode()).hexdigest()
+            if last_modified is not None:
+                # HTTP dates have second precision; naive timestamps are treated as UTC
+                last_modified = last_modified.replace(microsecond=0)
+                if last_modified.tzinfo is None:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if _is_current(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Clients may store the body but must revalidate before reuse
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _is_current(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
@@ -1,5 +1,6 @@
 import pg8000
 import ssl
+import database
 from config import Config
 
 def get_db_connection():
@@ -41,14 +42,24 @@ def get_db_connection():
         raise
 
 def execute_query(query, params=None, fetch=True):
-    """Execute a query and optionally return results"""
-    conn = get_db_connection()
+    """
+    Execute a query and optionally return results. The connection is
+    borrowed from the shared engine pool (database.py), so no call pays a
+    new TLS handshake and nothing is opened beyond the connection budget.
+    """
+    conn = database.engine.raw_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(query, params or ())
-        result = cursor.fetchall() if fetch else None
-        conn.commit()
-        return result
+        try:
+            cursor.execute(query, params or ())
+            result = cursor.fetchall() if fetch else None
+            conn.commit()
+            return result
+        finally:
+            cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        cursor.close()
+        # Returns the connection to the pool
         conn.close()
@@ -0,0 +1,237 @@
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+try:
+    from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+    from prometheus_flask_exporter import PrometheusMetrics
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+except ImportError:  # Metrics are optional; without the exporter nothing is recorded
+    PrometheusMetrics = None
+
+from database import InstrumentedQueuePool
+
+
+if PrometheusMetrics is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    # gunicorn.conf.py creates the directory on start, but run-engine, uvicorn
+    # and `python app.py` never run it, and every metric below writes a file there
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+if PrometheusMetrics is not None:
+    # Gauges pick a multiprocess_mode so the gunicorn workers' values combine
+    # sensibly when PROMETHEUS_MULTIPROC_DIR is set: live workers are summed
+    # (pool usage) or maxed (scheduler lag); counters and histograms just add.
+    DB_STATEMENTS = Histogram(
+        'seedmart_db_statements_per_request', 'SQL statements executed per request',
+        ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+    DB_SECONDS = Histogram(
+        'seedmart_db_seconds_per_request', 'Time spent executing SQL per request',
+        ['endpoint'], buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+    POOL_IN_USE = Gauge(
+        'seedmart_db_pool_checked_out', 'Connections currently checked out of the pool',
+        multiprocess_mode='livesum')
+    POOL_CAPACITY = Gauge(
+        'seedmart_db_pool_capacity', 'pool_size + max_overflow across live workers',
+        multiprocess_mode='livesum')
+    POOL_WAIT = Histogram(
+        'seedmart_db_pool_wait_seconds', 'Time spent waiting for a pooled connection',
+        buckets=(.0005, .001, .005, .01, .05, .1, .5, 1, 5, 10, 30))
+    POOL_TIMEOUTS = Counter(
+        'seedmart_db_pool_timeouts', 'Checkouts that gave up after pool_timeout')
+    JOB_DURATION = Histogram(
+        'seedmart_job_duration_seconds', 'Wall time of scheduled jobs run by the leader',
+        ['job'], buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300, 900))
+    JOB_RUNS = Counter(
+        'seedmart_job_runs', 'Scheduled job runs on the leader by outcome', ['job', 'status'])
+    JOB_LAG = Gauge(
+        'seedmart_job_lag_seconds', 'Delay between a job\'s scheduled and actual start',
+        ['job'], multiprocess_mode='livemax')
+    JOB_MISSED = Counter(
+        'seedmart_job_missed_runs', 'Job runs skipped by the scheduler', ['job', 'reason'])
+    SCHEDULER_LEADER = Gauge(
+        'seedmart_scheduler_leader', '1 while this node holds the leader lease for `lock`, else 0',
+        ['node', 'lock'], multiprocess_mode='livemax')
+    TICK_ROWS = Histogram(
+        'seedmart_tick_rows_written', 'Price rows written per market tick',
+        buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000))
+    TICK_BUFFER_ROWS = Gauge(
+        'seedmart_tick_buffer_rows', 'Price rows queued or being flushed by the write-behind buffer',
+        multiprocess_mode='livesum')
+    TICK_FLUSH_ROWS = Histogram(
+        'seedmart_tick_flush_rows', 'Price rows written per write-behind flush',
+        buckets=(1, 10, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000))
+    TICK_FLUSH_SECONDS = Histogram(
+        'seedmart_tick_flush_seconds', 'Time to write and commit one write-behind flush',
+        buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+    TICK_BACKPRESSURE = Histogram(
+        'seedmart_tick_backpressure_seconds', 'Time a tick waited for room in the write-behind buffer',
+        buckets=(.001, .01, .05, .1, .25, .5, 1, 2.5, 5))
+    TICK_ROWS_DROPPED = Counter(
+        'seedmart_tick_rows_dropped', 'Price rows discarded by the write-behind buffer', ['reason'])
+
+
+class AppMetrics:
+    """
+    Prometheus instrumentation served at /metrics. Request latency histograms
+    come from prometheus-flask-exporter (grouped by endpoint to keep label
+    cardinality bounded); SQL per request, pool usage, scheduler jobs and tick
+    sizes are recorded here. With PROMETHEUS_MULTIPROC_DIR set (see
+    gunicorn.conf.py) every worker writes to shared files and a scrape of any
+    worker reports the aggregate.
+    """
+
+    EXCLUDED_PATHS = ['/api/market/stream']
+
+    def __init__(self):
+        self.exporter = None
+
+    @property
+    def enabled(self):
+        return PrometheusMetrics is not None
+
+    def init_app(self, app, registry=None):
+        if not self.enabled or not app.config.get('METRICS_ENABLED', True):
+            return
+        options = dict(group_by='endpoint', excluded_paths=self.EXCLUDED_PATHS)
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            self.exporter = GunicornInternalPrometheusMetrics(app, **options)
+        else:
+            self.exporter = PrometheusMetrics(app, registry=registry, **options)
+
+        from models.models import db
+        with app.app_context():
+            self.instrument_engine(db.engine)
+        if _observe_pool_wait not in InstrumentedQueuePool.wait_observers:
+            InstrumentedQueuePool.wait_observers.append(_observe_pool_wait)
+        app.after_request(_record_request_queries)
+        app.extensions['metrics'] = self
+
+    def serve(self, port, addr='0.0.0.0'):
+        """
+        Serve /metrics from a background thread, for processes without the
+        Flask exporter (run-engine). In multiprocess mode this reports the
+        whole PROMETHEUS_MULTIPROC_DIR, like a gunicorn worker would.
+        Returns the HTTP server, or None when metrics are off or port is 0.
+        """
+        if not self.enabled or not port:
+            return None
+        registry = REGISTRY
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        server, _ = start_http_server(port, addr, registry=registry)
+        return server
+
+    def instrument_engine(self, engine):
+        """Count statements, SQL time and checked-out connections for `engine`"""
+        if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            return
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'checkout', _on_checkout)
+        event.listen(engine, 'checkin', _on_checkin)
+        if isinstance(engine.pool, QueuePool):
+            POOL_CAPACITY.inc(engine.pool.size() + engine.pool._max_overflow)
+
+    def watch_scheduler(self, scheduler):
+        """Record start lag and skipped runs for every job of an APScheduler"""
+        if not self.enabled:
+            return
+        from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+        reasons = {EVENT_JOB_MISSED: 'missed', EVENT_JOB_MAX_INSTANCES: 'max_instances'}
+
+        def listener(job_event):
+            if job_event.code == EVENT_JOB_SUBMITTED:
+                scheduled = job_event.scheduled_run_times[-1]
+                # APScheduler passes timezone-aware run times
+                lag = (datetime.now(scheduled.tzinfo) - scheduled).total_seconds()
+                JOB_LAG.labels(job_event.job_id).set(max(0.0, lag))
+            else:
+                JOB_MISSED.labels(job_event.job_id, reasons[job_event.code]).inc()
+
+        scheduler.add_listener(listener, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+
+    @contextmanager
+    def time_job(self, job_id):
+        """Time one leader-side run of a scheduled job and count its outcome"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            yield
+            status = 'success'
+        finally:
+            JOB_DURATION.labels(job_id).observe(time.perf_counter() - start)
+            JOB_RUNS.labels(job_id, status).inc()
+
+    def observe_leader(self, node, lock_key, leader):
+        """Record whether `node` holds the lease; set on acquire, renewal and loss"""
+        if self.enabled:
+            SCHEDULER_LEADER.labels(node, str(lock_key)).set(1 if leader else 0)
+
+    def observe_tick(self, rows):
+        """Record how many price rows one market tick wrote"""
+        if self.enabled:
+            TICK_ROWS.observe(rows)
+
+    def observe_tick_buffer(self, rows):
+        """Record the write-behind buffer's current depth"""
+        if self.enabled:
+            TICK_BUFFER_ROWS.set(rows)
+
+    def observe_tick_flush(self, rows, seconds):
+        if self.enabled:
+            TICK_FLUSH_ROWS.observe(rows)
+            TICK_FLUSH_SECONDS.observe(seconds)
+
+    def observe_tick_backpressure(self, seconds):
+        if self.enabled:
+            TICK_BACKPRESSURE.observe(seconds)
+
+    def count_dropped_ticks(self, rows, reason):
+        if self.enabled:
+            TICK_ROWS_DROPPED.labels(reason).inc(rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    if start is not None and has_request_context():
+        g.metrics_db_statements = g.get('metrics_db_statements', 0) + 1
+        g.metrics_db_seconds = g.get('metrics_db_seconds', 0.0) + time.perf_counter() - start
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_IN_USE.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_IN_USE.dec()
+
+
+def _observe_pool_wait(waited, timed_out):
+    POOL_WAIT.observe(waited)
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+
+
+def _record_request_queries(response):
+    endpoint = request.endpoint or 'unknown'
+    if endpoint != 'prometheus_metrics':
+        DB_STATEMENTS.labels(endpoint).observe(g.get('metrics_db_statements', 0))
+        DB_SECONDS.labels(endpoint).observe(g.get('metrics_db_seconds', 0.0))
+    return response
+
+
+app_metrics = AppMetrics()
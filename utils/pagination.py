@@ -0,0 +1,120 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+# What a client asked for: rows after (next) or before (prev) `key`, or the first page
+PageRequest = namedtuple('PageRequest', ['size', 'key', 'direction'])
+Page = namedtuple('Page', ['rows', 'next_cursor', 'prev_cursor', 'size'])
+
+LEGACY_VALUES = ('false', '0', 'no')
+
+
+class InvalidCursor(ValueError):
+    """A cursor this API did not issue, or one issued for another listing"""
+
+
+def encode_cursor(kind, key, direction):
+    """Opaque token for the rows after ('next') or before ('prev') `key`"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    payload = json.dumps([kind, direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, kind, key_types):
+    """Return (key, direction) from a cursor made by encode_cursor"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_kind, direction, values = json.loads(payload)
+        if cursor_kind != kind or direction not in ('next', 'prev') or len(values) != len(key_types):
+            raise ValueError
+        key = []
+        for value, key_type in zip(values, key_types):
+            if key_type is datetime:
+                key.append(datetime.fromisoformat(value))
+            elif isinstance(value, key_type) and not isinstance(value, bool):
+                key.append(value)
+            else:
+                raise ValueError
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor('cursor is invalid or belongs to another listing') from None
+    return tuple(key), direction
+
+
+def parse_page_args(args, kind, key_types, default_size=100, max_size=1000):
+    """
+    Read page_size, cursor and paginate from query arguments. Returns None
+    when the client opted out with paginate=false (the legacy, unbounded
+    response). page_size is capped at max_size. Raises ValueError on bad input.
+    """
+    if str(args.get('paginate', 'true')).lower() in LEGACY_VALUES:
+        return None
+    size = args.get('page_size')
+    try:
+        size = int(size) if size else default_size
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise ValueError('page_size must be a positive integer')
+    cursor = args.get('cursor')
+    key, direction = decode_cursor(cursor, kind, key_types) if cursor else (None, 'next')
+    return PageRequest(min(size, max_size), key, direction)
+
+
+def page_args(kind, key_types):
+    """parse_page_args for the current Flask request, sized by PAGE_SIZE_DEFAULT/MAX"""
+    return parse_page_args(request.args, kind, key_types,
+                           current_app.config.get('PAGE_SIZE_DEFAULT', 100),
+                           current_app.config.get('PAGE_SIZE_MAX', 1000))
+
+
+def keyset_query(stmt, columns, page):
+    """
+    Restrict and order a select to one page on `columns` (a unique key).
+    Seeks past the cursor with a row comparison the index can range-scan, so
+    every page costs the same as the first, unlike OFFSET. Fetches one extra
+    row to tell whether another page follows.
+    """
+    if page.key is not None:
+        bound = tuple_(*columns) if len(columns) > 1 else columns[0]
+        value = tuple_(*page.key) if len(columns) > 1 else page.key[0]
+        stmt = stmt.where(bound > value if page.direction == 'next' else bound < value)
+    order = columns if page.direction == 'next' else [column.desc() for column in columns]
+    return stmt.order_by(*order).limit(page.size + 1)
+
+
+def assemble_page(rows, page, kind, key):
+    """
+    Turn the rows fetched for `page` (page.size + 1 at most, in fetch order)
+    into a Page in ascending order with cursors to its neighbours. `key(row)`
+    returns the row's key values.
+    """
+    rows = list(rows)
+    more = len(rows) > page.size
+    rows = rows[:page.size]
+    if page.direction == 'prev':
+        rows.reverse()
+    # Arriving from one side proves that side is non-empty
+    has_next = more if page.direction == 'next' else True
+    has_prev = more if page.direction == 'prev' else page.key is not None
+    first = key(rows[0]) if rows else page.key
+    last = key(rows[-1]) if rows else page.key
+    return Page(
+        rows,
+        encode_cursor(kind, last, 'next') if has_next and last is not None else None,
+        encode_cursor(kind, first, 'prev') if has_prev and first is not None else None,
+        page.size
+    )
+
+
+def page_body(items, page):
+    """JSON body for one page of already-serialized items"""
+    return {
+        'items': items,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'page_size': page.size
+    }
@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Every hashing slot was taken when a hash was requested"""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, bounded thread pool. hashlib releases
+    the GIL while it hashes, so the request thread just waits; capping the
+    pool at PASSWORD_HASH_WORKERS keeps a login burst from taking every core
+    away from market reads. At most PASSWORD_HASH_QUEUE hashes may be running
+    or waiting; beyond that callers get HashingBusy at once (a 503), so a
+    burst never parks gunicorn's request threads. Keep the queue well below
+    the worker's --threads.
+
+    PASSWORD_HASH_METHOD sets the werkzeug method and cost (e.g.
+    'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'). Hashes made with another
+    method still verify and report needs_rehash so login can upgrade them.
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, queue_size=4):
+        self._configure(method, workers, queue_size)
+
+    def init_app(self, app):
+        self._configure(
+            app.config.get('PASSWORD_HASH_METHOD', self.method),
+            app.config.get('PASSWORD_HASH_WORKERS', self.workers),
+            app.config.get('PASSWORD_HASH_QUEUE', self.queue_size),
+        )
+        app.extensions['password_hasher'] = self
+
+    def _configure(self, method, workers, queue_size):
+        self.method = method
+        self.workers = workers
+        self.queue_size = max(queue_size, workers)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        # Created on first use so a forked gunicorn worker never inherits threads
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("Password hashing is saturated, retry shortly")
+        try:
+            if self._executor is None:
+                with self._executor_lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix='password-hash')
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
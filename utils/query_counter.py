@@ -0,0 +1,139 @@
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryCounter:
+    """SQL statements executed while the counter is active"""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+
+    def record(self, statement, parameters):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def n_plus_one_suspects(self, threshold=3):
+        """
+        Statements run at least `threshold` times with different parameters,
+        the signature of a query issued once per row of an earlier result.
+        Returns {statement: times executed}.
+        """
+        seen = defaultdict(set)
+        runs = defaultdict(int)
+        for statement, parameters in zip(self.statements, self.parameters):
+            runs[statement] += 1
+            seen[statement].add(repr(parameters))
+        return {statement: times for statement, times in runs.items()
+                if times >= threshold and len(seen[statement]) > 1}
+
+    def report(self):
+        lines = [f"{self.count} statements"]
+        for statement, times in self.n_plus_one_suspects().items():
+            lines.append(f"possible N+1 ({times}x): {' '.join(statement.split())[:200]}")
+        return '\n'.join(lines)
+
+
+def _active_counters():
+    counters = list(getattr(_local, 'counters', ()))
+    if has_request_context() and 'query_counter' in g:
+        counters.append(g.query_counter)
+    return counters
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters():
+        counter.record(statement, parameters)
+
+
+def instrument(engine):
+    """Feed statements run on `engine` to the active counters; idempotent"""
+    if not event.contains(engine, 'before_cursor_execute', _record_statement):
+        event.listen(engine, 'before_cursor_execute', _record_statement)
+
+
+@contextmanager
+def track_queries(engine=None):
+    """
+    Count statements issued by this thread inside the block:
+
+        with track_queries() as queries:
+            MarketService.get_market_summary()
+        assert queries.count == 1, queries.report()
+    """
+    if engine is None:
+        from models.models import db
+        engine = db.engine
+    instrument(engine)
+    counter = QueryCounter()
+    counters = _local.__dict__.setdefault('counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def query_budget(limit):
+    """Declare the most statements a view may run; place directly under the route decorator"""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class RequestQueryCounter:
+    """
+    Development aid: counts the statements each request runs, returns the
+    count in an X-Query-Count header and logs a warning when a view exceeds
+    its @query_budget (QUERY_BUDGET by default) or repeats a statement with
+    different parameters. Enabled by QUERY_COUNTER_ENABLED, or in debug mode.
+    """
+
+    HEADER = 'X-Query-Count'
+
+    def init_app(self, app):
+        if not app.config.get('QUERY_COUNTER_ENABLED', app.debug):
+            return
+        from models.models import db
+        with app.app_context():
+            instrument(db.engine)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['query_counter'] = self
+
+    @staticmethod
+    def budget_for(endpoint):
+        view = current_app.view_functions.get(endpoint)
+        return getattr(view, 'query_budget', current_app.config.get('QUERY_BUDGET', 20))
+
+    @staticmethod
+    def _start():
+        g.query_counter = QueryCounter()
+
+    def _finish(self, response):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return response
+        response.headers[self.HEADER] = str(counter.count)
+        budget = self.budget_for(request.endpoint)
+        suspects = counter.n_plus_one_suspects()
+        if counter.count > budget or suspects:
+            logger.warning(f"{request.method} {request.path} ({request.endpoint}) "
+                           f"ran {counter.count} SQL statements, budget {budget}\n{counter.report()}")
+        return response
+
+
+request_query_counter = RequestQueryCounter()
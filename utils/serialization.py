@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+
+# Key order matches jsonify's sort_keys output for SeedPrice.to_dict()
+_PRICE_ROW = '{"id":%d,"price":%s,"recorded_at":%s,"seed_id":%d,"volume":%s}'
+
+
+def dumps_like_jsonify(obj):
+    """Encode exactly as Flask's jsonify does outside debug mode"""
+    return (json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+def encode_price_rows(rows):
+    """
+    Encode (id, price, recorded_at, seed_id, volume) tuples straight to the
+    JSON array jsonify would produce for [SeedPrice.to_dict(), ...], without
+    building ORM objects or intermediate dicts.
+    """
+    return ('[' + ','.join(map(_encode_price_row, rows)) + ']\n').encode()
+
+
+def encode_price_page(rows, page):
+    """
+    Encode a utils.pagination.Page of price tuples exactly as
+    jsonify(page_body([...to_dict()], page)) would.
+    """
+    return ('{"items":[' + ','.join(map(_encode_price_row, rows)) + ']'
+            + ',"next_cursor":' + json.dumps(page.next_cursor)
+            + ',"page_size":%d' % page.size
+            + ',"prev_cursor":' + json.dumps(page.prev_cursor) + '}\n').encode()
+
+
+def _encode_price_row(row):
+    price_id, price, recorded_at, seed_id, volume = row
+    return _PRICE_ROW % (
+        price_id,
+        repr(float(price)),
+        f'"{recorded_at.isoformat()}"' if recorded_at is not None else 'null',
+        seed_id,
+        'null' if volume is None else int(volume)
+    )
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_ndjson(rows, batch_size=1000):
+    """Yield newline-delimited JSON for price tuples, one string per batch of rows"""
+    for batch in _batched(rows, batch_size):
+        yield '\n'.join(map(_encode_price_row, batch)) + '\n'
+
+
+PRICE_CSV_HEADER = ('id', 'seed_id', 'price', 'volume', 'recorded_at')
+
+
+def iter_csv(rows, batch_size=1000):
+    """Yield CSV (with header) for price tuples, one string per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(PRICE_CSV_HEADER)
+    yield buffer.getvalue()
+    for batch in _batched(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (price_id, seed_id, price, volume, recorded_at.isoformat() if recorded_at else '')
+            for price_id, price, recorded_at, seed_id, volume in batch
+        )
+        yield buffer.getvalue()